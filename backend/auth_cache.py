@@ -0,0 +1,109 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import metrics
+
+
+class AuthVerifier:
+    """Verifies auth tokens against the auth API, caching the answers.
+
+    Valid tokens are remembered for ttl seconds and invalid ones for
+    negative_ttl seconds, in an LRU of at most max_entries keyed by a hash of
+    the token (so tokens themselves are never kept). Requests go through one
+    pooled HTTP session. If the auth API cannot be reached, tokens are
+    rejected, unless stale_ttl is set: then a token that was valid within the
+    last stale_ttl seconds is still accepted, so an outage does not log out
+    everyone at once. That keeps a revoked token working for up to stale_ttl
+    seconds while the auth API is down, so it is off by default.
+    """
+
+    def __init__(self, url: str, ttl: float = 60.0, negative_ttl: float = 10.0,
+                 stale_ttl: float = 0.0, max_entries: int = 10000,
+                 pool_size: int = 16, timeout: float = 5.0):
+        self.url = url
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.stale_hits = 0
+        # hash -> (is valid, user info, time verified), least recently used first
+        self._entries: 'OrderedDict[str, Tuple[bool, Optional[Dict], float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        # Tokens are sent per request; never let one user's cookies carry over to another's check
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def verify(self, auth_token: str) -> Tuple[bool, Optional[Dict]]:
+        """Return whether the token is valid, and the user info the auth API gave for it."""
+        key = hashlib.sha256(auth_token.encode('utf-8')).hexdigest()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                is_valid, user_info, verified = entry
+                if now - verified < (self.ttl if is_valid else self.negative_ttl):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self._record(now, 'hit')
+                    return is_valid, user_info
+            self.misses += 1
+
+        try:
+            response = self.session.get(
+                self.url, cookies={"auth_token": auth_token}, timeout=self.timeout)
+            # A server error says nothing about the token, so treat it like an outage
+            if response.status_code >= 500:
+                raise requests.HTTPError(f"Auth API returned {response.status_code}")
+            if response.status_code == 200:
+                result = (True, response.json())
+            else:
+                result = (False, None)
+        except Exception as e:
+            print(f"Error verifying auth token: {e}")
+            with self._lock:
+                self.errors += 1
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] and now - entry[2] < self.stale_ttl:
+                    self.stale_hits += 1
+                    self._record(now, 'stale')
+                    return True, entry[1]
+            self._record(now, 'error')
+            return False, None
+
+        with self._lock:
+            self._entries[key] = (result[0], result[1], time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self._record(now, 'valid' if result[0] else 'invalid')
+        return result
+
+    def _record(self, start: float, result: str) -> None:
+        metrics.observe('auth_check', time.monotonic() - start, result=result)
+        metrics.inc('auth_checks', result=result)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters, failed verifications and the number of cached tokens."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'errors': self.errors,
+                'stale_hits': self.stale_hits,
+                'entries': len(self._entries),
+            }
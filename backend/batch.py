@@ -0,0 +1,274 @@
+import argparse
+import csv
+import json
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from clue_cache import ClueCache
+from clue_provider import ClueProviderError, OpenAIClueProvider, StubClueProvider
+from generator import SEARCH_MODES, CrosswordGenerator
+from layout_cache import LayoutCache, derive_seed
+from pdf import create_crossword_pdfs
+
+# Written into each puzzle's folder once everything else is there; its presence marks the puzzle done
+RESULT_FILE = 'puzzle.json'
+MANIFEST_FILE = 'manifest.json'
+
+
+def read_puzzles(path: str) -> List[Dict]:
+    """Read word lists from a JSONL or CSV file, or a directory of text files.
+
+    JSONL lines are objects with "words" (a list, or a string of words) and
+    optionally "id" and "seed". CSV files need a "words" column of words
+    separated by spaces, commas or semicolons, and may have "id" and "seed"
+    columns. In a directory, each .txt file is one puzzle named after the file.
+    """
+    puzzles = []
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.endswith('.txt'):
+                with open(os.path.join(path, name), 'r', encoding='utf-8') as f:
+                    puzzles.append({'id': name[:-len('.txt')], 'words': f.read()})
+    elif path.endswith('.csv'):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                puzzles.append({'id': row.get('id'), 'words': row['words'],
+                                'seed': row.get('seed') or None})
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    puzzles.append(json.loads(line))
+
+    seen = set()
+    for index, puzzle in enumerate(puzzles, 1):
+        words = puzzle['words']
+        if isinstance(words, str):
+            words = re.split(r'[\s,;]+', words)
+        puzzle['words'] = [word.strip() for word in words if word.strip()]
+        # Ids become folder names, so keep them to a safe character set
+        puzzle_id = re.sub(r'[^A-Za-z0-9._-]+', '-', str(puzzle.get('id') or '')).strip('.-')
+        puzzle['id'] = puzzle_id or f'puzzle-{index:04d}'
+        if puzzle['id'] in seen:
+            raise ValueError(f"Duplicate puzzle id '{puzzle['id']}' in {path}")
+        seen.add(puzzle['id'])
+        puzzle['seed'] = int(puzzle['seed']) if puzzle.get('seed') is not None else None
+    return puzzles
+
+
+def load_result(puzzle_dir: str) -> Optional[Dict]:
+    """Return a puzzle's recorded result, or None if it has not been finished."""
+    try:
+        with open(os.path.join(puzzle_dir, RESULT_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(path: str, data: Dict) -> None:
+    """Write JSON via a temporary file, so an interrupted run never leaves a partial file."""
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+# Set per grid worker process, as in grid_jobs
+_layout_caches: Dict[str, LayoutCache] = {}
+
+
+def _search_grid(words: List[str], seed: Optional[int], options: Dict) -> Optional[Dict]:
+    """Grid stage, run in a worker process: return the generator state, or None if no grid fits."""
+    cache = None
+    if options['layout_cache']:
+        if options['layout_cache'] not in _layout_caches:
+            _layout_caches[options['layout_cache']] = LayoutCache(directory=options['layout_cache'])
+        cache = _layout_caches[options['layout_cache']]
+        # Unseeded puzzles are only cached under a seed derived from their words
+        if seed is None:
+            seed = derive_seed(words)
+    generator = CrosswordGenerator(words, seed=seed)
+    if not generator.generate_grid(max_attempts=options['max_attempts'], search=options['search'],
+                                   time_limit=options['time_limit'], cache=cache):
+        return None
+    return generator.export_state()
+
+
+def _finish_puzzle(puzzle: Dict, state: Dict, puzzle_dir: str, options: Dict,
+                   clue_provider, clue_cache: Optional[ClueCache]) -> None:
+    """Clue and PDF stage, run on a thread in the main process: write the puzzle's files."""
+    generator = CrosswordGenerator.from_state(
+        state, clue_provider=clue_provider, clue_cache=clue_cache)
+    missing = generator.generate_clues(
+        concurrency=options['clue_concurrency'], batch_size=options['clue_batch_size'])
+    # Leave the puzzle unfinished, so the next run retries it (reusing any clues already cached)
+    if missing:
+        raise ClueProviderError(f"No clues generated for {', '.join(missing)}")
+    generator.save_clues_text(puzzle_dir)
+    if options['images']:
+        generator.draw_grids(output_dir=puzzle_dir)
+
+    with open(os.path.join(puzzle_dir, 'crossword_clues.txt'), 'r', encoding='utf-8') as f:
+        clues_text = f.read()
+    create_crossword_pdfs(
+        clues_text,
+        question_pdf_path=os.path.join(puzzle_dir, 'crossword_puzzle.pdf'),
+        answer_pdf_path=os.path.join(puzzle_dir, 'crossword_puzzle_answer.pdf'),
+        combined_pdf_path=(os.path.join(puzzle_dir, 'crossword_puzzle_combined.pdf')
+                           if options['combined_pdf'] else None),
+        grid=generator.grid_drawing()
+    )
+    # Keep the session-style state next to the files, so a puzzle can be reopened later
+    write_json(os.path.join(puzzle_dir, RESULT_FILE), {
+        'id': puzzle['id'],
+        'status': 'done',
+        'words': puzzle['words'],
+        'state': generator.export_state(),
+    })
+
+
+def run_batch(puzzles: List[Dict], output_dir: str, options: Dict, workers: int = 1,
+              clue_workers: int = 4, clue_provider=None,
+              clue_cache: Optional[ClueCache] = None) -> Dict:
+    """Generate every puzzle not already finished in output_dir and return the manifest.
+
+    Grids are searched in worker processes; as each is found it moves on to
+    clue generation and PDF export on a thread, while further grids are
+    searched. The manifest is rewritten after every puzzle, so an interrupted
+    run can be resumed by running it again.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    entries = {puzzle['id']: {'id': puzzle['id'], 'dir': puzzle['id'], 'words': len(puzzle['words']),
+                              'status': 'pending'} for puzzle in puzzles}
+
+    def record(puzzle_id: str, **fields) -> None:
+        entries[puzzle_id].update(fields)
+        write_json(manifest_path, {'puzzles': list(entries.values())})
+
+    todo = []
+    for puzzle in puzzles:
+        result = load_result(os.path.join(output_dir, puzzle['id']))
+        # A finished puzzle is only reused if its word list has not changed since
+        if result is not None and result.get('status') == 'done' and result['words'] == puzzle['words']:
+            layout = result['state']['layout']
+            entries[puzzle['id']].update(status='done', overlaps=layout['overlap_count'], skipped=True)
+        else:
+            todo.append(puzzle)
+    write_json(manifest_path, {'puzzles': list(entries.values())})
+    print(f"{len(puzzles) - len(todo)} of {len(puzzles)} puzzles already done")
+
+    with ProcessPoolExecutor(max_workers=workers) as grid_pool, \
+            ThreadPoolExecutor(max_workers=clue_workers) as clue_pool:
+        pending = {}
+        for puzzle in todo:
+            future = grid_pool.submit(_search_grid, puzzle['words'], puzzle['seed'], options)
+            pending[future] = ('grid', puzzle, time.monotonic())
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, puzzle, started = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Puzzle {puzzle['id']} failed: {e}")
+                    record(puzzle['id'], status='failed', error=str(e),
+                           seconds=round(time.monotonic() - started, 3))
+                    continue
+
+                if stage == 'grid':
+                    if result is None:
+                        record(puzzle['id'], status='failed', error='No grid fits all words',
+                               seconds=round(time.monotonic() - started, 3))
+                        continue
+                    puzzle_dir = os.path.join(output_dir, puzzle['id'])
+                    os.makedirs(puzzle_dir, exist_ok=True)
+                    entries[puzzle['id']]['overlaps'] = result['layout']['overlap_count']
+                    future = clue_pool.submit(_finish_puzzle, puzzle, result, puzzle_dir,
+                                              options, clue_provider, clue_cache)
+                    pending[future] = ('clues', puzzle, started)
+                else:
+                    record(puzzle['id'], status='done', error=None,
+                           seconds=round(time.monotonic() - started, 3))
+                    print(f"Puzzle {puzzle['id']} done")
+
+    manifest = {'puzzles': list(entries.values())}
+    write_json(manifest_path, manifest)
+    return manifest
+
+
+def main():
+    """Generate puzzles, clues and PDFs for many word lists at once."""
+    parser = argparse.ArgumentParser(
+        description="Generate crossword puzzles for a batch of word lists.")
+    parser.add_argument("input",
+                        help="JSONL or CSV file of word lists, or a directory of .txt word lists")
+    parser.add_argument("--output-dir", default="output",
+                        help="Directory to create one folder per puzzle in")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of processes searching for grids")
+    parser.add_argument("--clue-workers", type=int, default=4,
+                        help="Number of puzzles generating clues and PDFs at once")
+    parser.add_argument("--max-attempts", type=int, default=30,
+                        help="Maximum number of attempts to generate each grid")
+    parser.add_argument("--search", default="restart", choices=SEARCH_MODES,
+                        help="Placement strategy: restart each failed attempt, or backtrack first")
+    parser.add_argument("--time-limit", type=float, default=None,
+                        help="Stop searching for a grid after this many seconds and keep the best")
+    parser.add_argument("--layout-cache", default=None,
+                        help="Directory of cached layouts to reuse across runs")
+    parser.add_argument("--clue-concurrency", type=int, default=8,
+                        help="Maximum number of clue requests in flight per puzzle")
+    parser.add_argument("--clue-batch-size", type=int, default=1,
+                        help="Number of words to ask for in each clue request")
+    parser.add_argument("--clue-cache", default=None,
+                        help="SQLite file of previously generated clues to reuse")
+    parser.add_argument("--stub-clues", action="store_true",
+                        help="Use canned offline clues instead of calling the model API")
+    parser.add_argument("--images", action="store_true",
+                        help="Also save PNG images of each grid")
+    parser.add_argument("--combined-pdf", action="store_true",
+                        help="Also write each puzzle's question and answer pages as one PDF")
+    args = parser.parse_args()
+
+    load_dotenv()
+    api_address = os.getenv("API_ADDRESS")
+    api_secret = os.getenv("API_SECRET")
+    model_id = os.getenv("MODEL_ID")
+    if args.stub_clues:
+        clue_provider = StubClueProvider()
+    elif api_address and api_secret and model_id:
+        clue_provider = OpenAIClueProvider(api_address, api_secret, model_id)
+    else:
+        parser.error("Missing required environment variables (API_ADDRESS, API_SECRET, MODEL_ID); "
+                     "use --stub-clues to run without the model API")
+
+    options = {
+        'max_attempts': args.max_attempts,
+        'search': args.search,
+        'time_limit': args.time_limit,
+        'layout_cache': args.layout_cache,
+        'clue_concurrency': args.clue_concurrency,
+        'clue_batch_size': args.clue_batch_size,
+        'images': args.images,
+        'combined_pdf': args.combined_pdf,
+    }
+    manifest = run_batch(
+        read_puzzles(args.input), args.output_dir, options, workers=args.workers,
+        clue_workers=args.clue_workers, clue_provider=clue_provider,
+        clue_cache=ClueCache(path=args.clue_cache) if args.clue_cache else None)
+
+    failed = [entry['id'] for entry in manifest['puzzles'] if entry['status'] != 'done']
+    print(f"{len(manifest['puzzles']) - len(failed)} of {len(manifest['puzzles'])} puzzles done")
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
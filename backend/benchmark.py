@@ -0,0 +1,239 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from generator import SEARCH_MODES, CrosswordGenerator
+from grid import GRID_BACKENDS
+from scoring import SCORERS
+
+# Letters weighted by their frequency in English text, for synthetic words
+ENGLISH_LETTERS = 'eeeeeeeeeeeetttttttttaaaaaaaaooooooooiiiiiiinnnnnnnsssssshhhhhhrrrrrrdddllluuucccmmwwffggyyppbbvkjxqz'
+# Rare letters only, so few words can cross
+POOR_LETTERS = 'jqxzkvwyfbgp'
+
+# Everyday vocabulary for realistic lists, as a teacher might pick for worksheets
+VOCABULARY = '''
+apple banana cherry grape lemon mango melon orange peach pear plum kiwi lime papaya guava fig
+apricot coconut date olive tomato potato carrot onion garlic pepper cabbage lettuce spinach
+bean pea corn rice wheat bread butter cheese milk cream yogurt honey sugar salt flour pasta
+horse zebra tiger lion eagle otter rabbit turtle monkey giraffe elephant dolphin whale shark
+salmon falcon parrot penguin camel donkey goat sheep cow pig chicken duck goose mouse squirrel
+river stream ocean lake pond island valley mountain desert forest meadow canyon glacier volcano
+beach coast harbor bridge castle tower village city street garden field farm orchard market
+school teacher student lesson pencil paper notebook library science history music painting
+poetry theatre dance guitar piano violin trumpet drum flute concert singer author reader
+planet comet galaxy rocket orbit moon star sun eclipse meteor asteroid telescope gravity
+winter summer autumn spring thunder lightning rainbow cloud storm breeze frost snow rain fog
+doctor nurse farmer baker pilot sailor soldier painter builder chemist lawyer judge driver
+kitchen bedroom window door ceiling floor chair table sofa lamp mirror blanket pillow carpet
+engine wheel bicycle train airplane subway tractor truck wagon canoe yacht ferry scooter
+silver golden copper iron marble granite crystal diamond emerald ruby pearl amber coral
+journey adventure mystery treasure secret puzzle riddle legend dragon wizard knight princess
+'''.split()
+
+LENGTH_DISTRIBUTIONS: Dict[str, Callable[[random.Random], int]] = {
+    'short': lambda rng: rng.randint(3, 5),
+    'mixed': lambda rng: rng.randint(3, 12),
+    'long': lambda rng: rng.randint(8, 14),
+}
+DEFAULT_SIZES = (5, 10, 20, 50, 100, 200)
+
+
+def synthetic_words(rng: random.Random, count: int, lengths: Callable[[random.Random], int],
+                    letters: str = ENGLISH_LETTERS) -> List[str]:
+    """Return count distinct random words drawn from letters with the given length distribution."""
+    words = set()
+    while len(words) < count:
+        words.add(''.join(rng.choice(letters) for _ in range(lengths(rng))))
+    return sorted(words)
+
+
+def letter_poor_words(rng: random.Random, count: int) -> List[str]:
+    """Return words mostly of rare letters, with one vowel each so some can still cross."""
+    words = set()
+    while len(words) < count:
+        word = [rng.choice(POOR_LETTERS) for _ in range(rng.randint(3, 7))]
+        word[rng.randrange(len(word))] = rng.choice('aeiou')
+        words.add(''.join(word))
+    return sorted(words)
+
+
+def make_workloads(sizes=DEFAULT_SIZES, seed: int = 0) -> List[Dict]:
+    """Build the named, seeded word lists to benchmark, the same for the same seed."""
+    workloads = []
+    for size in sizes:
+        rng = random.Random(f'{seed}:{size}')
+        for name, lengths in LENGTH_DISTRIBUTIONS.items():
+            workloads.append({'name': f'synthetic-{name}-{size}',
+                              'words': synthetic_words(rng, size, lengths)})
+        workloads.append({'name': f'letter-poor-{size}', 'words': letter_poor_words(rng, size)})
+        if size <= len(VOCABULARY):
+            workloads.append({'name': f'realistic-{size}',
+                              'words': sorted(rng.sample(VOCABULARY, size))})
+    return workloads
+
+
+def bounding_box_density(generator: CrosswordGenerator) -> float:
+    """Share of the grid's bounding box that is filled with letters."""
+    drawing = generator.grid_drawing()
+    return len(drawing['cells']) / (drawing['columns'] * drawing['rows'])
+
+
+def run_once(words: List[str], seed: int, options: Dict, count_calls: bool = False) -> Dict:
+    """Generate one grid and measure it."""
+    generator = CrosswordGenerator(
+        words, grid_backend=options['grid_backend'], scoring=options['scoring'], seed=seed)
+    attempts = [0]
+    first_valid: List[Optional[float]] = [None]
+    calls = {'can_place': 0, 'try_place_word': 0}
+    if count_calls:
+        # Counting wrappers on this instance only; they slow the search, so timings are not comparable
+        can_place, try_place_word = generator.can_place, generator._try_place_word
+
+        def counted_can_place(*args):
+            calls['can_place'] += 1
+            return can_place(*args)
+
+        def counted_try_place_word(*args):
+            calls['try_place_word'] += 1
+            return try_place_word(*args)
+
+        generator.can_place = counted_can_place
+        generator._try_place_word = counted_try_place_word
+
+    start = time.perf_counter()
+
+    def progress(attempt, best_overlaps):
+        attempts[0] = attempt
+        if best_overlaps is not None and first_valid[0] is None:
+            first_valid[0] = time.perf_counter() - start
+
+    # The generator reports each new best layout on stdout; keep the JSON output clean
+    with contextlib.redirect_stdout(io.StringIO()):
+        success = generator.generate_grid(
+            max_attempts=options['max_attempts'], search=options['search'],
+            time_limit=options['time_limit'], workers=options['workers'], progress=progress)
+    seconds = time.perf_counter() - start
+
+    result = {
+        'seed': seed,
+        'success': success,
+        'seconds': round(seconds, 6),
+        'attempts': attempts[0],
+        'time_to_first_valid': round(first_valid[0], 6) if first_valid[0] is not None else None,
+        'overlaps': generator.overlap_count if success else None,
+        'upper_bound': generator.overlap_upper_bound(),
+        'density': round(bounding_box_density(generator), 4) if success else None,
+    }
+    if count_calls:
+        result['calls'] = calls
+    return result
+
+
+def summarize(runs: List[Dict]) -> Dict:
+    """Aggregate the runs of one workload."""
+    found = [run for run in runs if run['success']]
+    seconds = sum(run['seconds'] for run in runs)
+    first_valid = [run['time_to_first_valid'] for run in found if run['time_to_first_valid'] is not None]
+    return {
+        'success_rate': len(found) / len(runs),
+        'attempts_per_sec': round(sum(run['attempts'] for run in runs) / seconds, 2) if seconds else None,
+        'median_seconds': round(statistics.median(run['seconds'] for run in runs), 6),
+        'median_time_to_first_valid': round(statistics.median(first_valid), 6) if first_valid else None,
+        'best_overlaps': max((run['overlaps'] for run in found), default=None),
+        'mean_overlaps': round(statistics.mean(run['overlaps'] for run in found), 2) if found else None,
+        'mean_density': round(statistics.mean(run['density'] for run in found), 4) if found else None,
+    }
+
+
+def git_commit() -> Optional[str]:
+    """The checked-out commit, so results can be compared across commits."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(workloads: List[Dict], options: Dict, repeats: int = 3,
+                  count_calls: bool = False) -> Dict:
+    """Run every workload with repeats generator seeds and return the report."""
+    results = []
+    for workload in workloads:
+        runs = [run_once(workload['words'], seed, options, count_calls) for seed in range(repeats)]
+        summary = summarize(runs)
+        print(f"{workload['name']}: {summary['success_rate']:.0%} found, "
+              f"{summary['attempts_per_sec']} attempts/s, best {summary['best_overlaps']} overlaps",
+              file=sys.stderr, flush=True)
+        results.append({'name': workload['name'], 'words': len(workload['words']),
+                        'summary': summary, 'runs': runs})
+    return {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'options': dict(options, repeats=repeats, count_calls=count_calls),
+        'workloads': results,
+    }
+
+
+def main():
+    """Benchmark grid generation on seeded workloads and write the results as JSON."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark crossword grid generation on reproducible word lists.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Word list sizes to generate workloads for")
+    parser.add_argument("--only", default=None,
+                        help="Only run workloads whose name contains this text, e.g. 'realistic'")
+    parser.add_argument("--workload-seed", type=int, default=0,
+                        help="Seed for building the word lists")
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="Number of generator seeds to run each workload with")
+    parser.add_argument("--max-attempts", type=int, default=30,
+                        help="Maximum number of attempts per grid")
+    parser.add_argument("--time-limit", type=float, default=None,
+                        help="Stop each search after this many seconds")
+    parser.add_argument("--search", default="restart", choices=SEARCH_MODES,
+                        help="Placement strategy: restart each failed attempt, or backtrack first")
+    parser.add_argument("--grid-backend", default="array", choices=sorted(GRID_BACKENDS),
+                        help="Grid storage backend used during placement")
+    parser.add_argument("--scoring", default="compact", choices=sorted(SCORERS),
+                        help="How layouts are ranked")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of processes to spread grid attempts over")
+    parser.add_argument("--count-calls", action="store_true",
+                        help="Also count can_place and _try_place_word calls (slows the search)")
+    parser.add_argument("--output", default=None,
+                        help="File to write the JSON report to (default: stdout)")
+    args = parser.parse_args()
+
+    workloads = [workload for workload in make_workloads(args.sizes, args.workload_seed)
+                 if args.only is None or args.only in workload['name']]
+    options = {
+        'max_attempts': args.max_attempts,
+        'time_limit': args.time_limit,
+        'search': args.search,
+        'grid_backend': args.grid_backend,
+        'scoring': args.scoring,
+        'workers': args.workers,
+    }
+    report = run_benchmark(workloads, options, repeats=args.repeats, count_calls=args.count_calls)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f"Results written to {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
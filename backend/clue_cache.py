@@ -0,0 +1,169 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+ClueKey = Tuple[str, str, str, int]
+TopicKey = Tuple[str, str, int]
+
+
+def make_clue_key(word: str, topic: str, model_id: str, prompt_version: int) -> ClueKey:
+    """Build a cache key; words and topics are compared case-insensitively."""
+    return word.strip().casefold(), (topic or '').strip().casefold(), model_id, prompt_version
+
+
+def make_topic_key(words: Iterable[str], model_id: str, prompt_version: int) -> TopicKey:
+    """Build a topic cache key from the normalized (case-folded, sorted) word set."""
+    normalized = sorted({word.strip().casefold() for word in words if word.strip()})
+    return '\n'.join(normalized), model_id, prompt_version
+
+
+class ClueCache:
+    """Two-tier cache of generated clues: an in-memory LRU in front of an optional SQLite file.
+
+    The topics inferred for whole word sets are cached alongside the clues.
+    Entries expire after ttl seconds in both tiers. Hit and miss counts are
+    kept for reporting via stats().
+    """
+
+    def __init__(self, max_entries: int = 4096, path: Optional[str] = None,
+                 ttl: float = 90 * 24 * 3600):
+        self.max_entries = max_entries
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.topic_hits = 0
+        self.topic_misses = 0
+        self._entries: 'OrderedDict[ClueKey, Tuple[str, float]]' = OrderedDict()
+        self._topics: 'OrderedDict[TopicKey, Tuple[str, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS clues ('
+                ' word TEXT, topic TEXT, model_id TEXT, prompt_version INTEGER,'
+                ' clue TEXT NOT NULL, created REAL NOT NULL,'
+                ' PRIMARY KEY (word, topic, model_id, prompt_version))')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS topics ('
+                ' words TEXT, model_id TEXT, prompt_version INTEGER,'
+                ' topic TEXT NOT NULL, created REAL NOT NULL,'
+                ' PRIMARY KEY (words, model_id, prompt_version))')
+            self._db.commit()
+            self.purge_expired()
+
+    def get(self, key: ClueKey) -> Optional[str]:
+        """Return the cached clue for a key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            row = None
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT clue, created FROM clues WHERE word = ? AND topic = ?'
+                    ' AND model_id = ? AND prompt_version = ?', key).fetchone()
+            if row is not None and now - row[1] < self.ttl:
+                self._remember(key, row[0], row[1])
+                self.hits += 1
+                return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: ClueKey, clue: str) -> None:
+        """Store a clue in memory and, if configured, in the SQLite tier."""
+        created = time.time()
+        with self._lock:
+            self._remember(key, clue, created)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO clues VALUES (?, ?, ?, ?, ?, ?)',
+                        (*key, clue, created))
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    print(f"Error writing clue cache entry for {key[0]}: {e}")
+
+    def get_topic(self, key: TopicKey) -> Optional[str]:
+        """Return the cached topic for a word set, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._topics.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._topics.move_to_end(key)
+                self.topic_hits += 1
+                return entry[0]
+
+            row = None
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT topic, created FROM topics WHERE words = ? AND model_id = ?'
+                    ' AND prompt_version = ?', key).fetchone()
+            if row is not None and now - row[1] < self.ttl:
+                self._remember_topic(key, row[0], row[1])
+                self.topic_hits += 1
+                return row[0]
+
+            self.topic_misses += 1
+            return None
+
+    def put_topic(self, key: TopicKey, topic: str) -> None:
+        """Store the topic inferred for a word set."""
+        created = time.time()
+        with self._lock:
+            self._remember_topic(key, topic, created)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO topics VALUES (?, ?, ?, ?, ?)',
+                        (*key, topic, created))
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    print(f"Error writing topic cache entry: {e}")
+
+    def purge_expired(self) -> int:
+        """Delete expired rows from the SQLite tier and return how many were removed."""
+        if self._db is None:
+            return 0
+        with self._lock:
+            cutoff = time.time() - self.ttl
+            removed = self._db.execute(
+                'DELETE FROM clues WHERE created < ?', (cutoff,)).rowcount
+            removed += self._db.execute(
+                'DELETE FROM topics WHERE created < ?', (cutoff,)).rowcount
+            self._db.commit()
+            return removed
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the number of entries held in memory."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'topic_hits': self.topic_hits,
+                'topic_misses': self.topic_misses,
+            }
+
+    def _remember(self, key: ClueKey, clue: str, created: float) -> None:
+        self._entries[key] = (clue, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _remember_topic(self, key: TopicKey, topic: str, created: float) -> None:
+        self._topics[key] = (topic, created)
+        self._topics.move_to_end(key)
+        while len(self._topics) > self.max_entries:
+            self._topics.popitem(last=False)
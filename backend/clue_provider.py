@@ -0,0 +1,135 @@
+import json
+import random
+import time
+from typing import Dict, Optional, Tuple
+
+import httpx
+import openai
+
+from metrics import metrics
+
+
+class ClueProviderError(Exception):
+    """Raised when a provider cannot produce a completion."""
+
+
+class RateLimitedError(ClueProviderError):
+    """Raised when the API is still rate limiting requests after all retries."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class OpenAIClueProvider:
+    """Chat completions through one shared OpenAI-compatible client.
+
+    The client keeps a pool of keep-alive connections, so concurrent requests
+    reuse connections instead of opening (and TLS-handshaking) a new one each
+    time. Rate-limited and transient failures are retried with jittered
+    exponential backoff, honouring the server's Retry-After header. Rate
+    limits get rate_limit_retries retries (max_retries if None); set it to 0
+    when a scheduler in front of the provider handles them instead.
+    """
+
+    def __init__(self, base_url: str, api_key: str, model_id: str, timeout: float = 60.0,
+                 max_retries: int = 4, max_connections: int = 16,
+                 backoff_base: float = 1.0, backoff_max: float = 30.0,
+                 rate_limit_retries: Optional[int] = None):
+        self.model_id = model_id
+        self.max_retries = max_retries
+        self.rate_limit_retries = max_retries if rate_limit_retries is None else rate_limit_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.client = openai.OpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            timeout=timeout,
+            max_retries=0,  # Retries are handled in complete()
+            http_client=openai.DefaultHttpxClient(
+                limits=httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_connections),
+            ),
+        )
+
+    def complete(self, system_prompt: str, user_prompt: str) -> str:
+        """Return the model's reply to a system + user prompt pair."""
+        return self.complete_with_usage(system_prompt, user_prompt)[0]
+
+    def complete_with_usage(self, system_prompt: str, user_prompt: str) -> Tuple[str, Dict[str, int]]:
+        """Return the model's reply and the prompt and completion tokens the API reported for it."""
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model_id,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ]
+                )
+                self._record(start, 'ok')
+                usage = {'prompt_tokens': 0, 'completion_tokens': 0}
+                if response.usage is not None:
+                    usage = {'prompt_tokens': response.usage.prompt_tokens or 0,
+                             'completion_tokens': response.usage.completion_tokens or 0}
+                metrics.inc('llm_tokens', usage['prompt_tokens'], kind='prompt')
+                metrics.inc('llm_tokens', usage['completion_tokens'], kind='completion')
+                return response.choices[0].message.content or '', usage
+            except (openai.RateLimitError, openai.APIConnectionError,
+                    openai.InternalServerError) as e:
+                rate_limited = isinstance(e, openai.RateLimitError)
+                self._record(start, 'rate_limited' if rate_limited else 'error')
+                delay = self._retry_delay(e, attempt)
+                if attempt >= (self.rate_limit_retries if rate_limited else self.max_retries):
+                    if rate_limited:
+                        raise RateLimitedError(str(e), retry_after=delay) from e
+                    raise ClueProviderError(str(e)) from e
+                print(f"{type(e).__name__} from model API, retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+            except openai.APIError as e:
+                self._record(start, 'error')
+                raise ClueProviderError(str(e)) from e
+
+    def _record(self, start: float, outcome: str) -> None:
+        metrics.observe('llm_request', time.perf_counter() - start, outcome=outcome)
+        metrics.inc('llm_requests', outcome=outcome)
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Seconds to wait before retrying: Retry-After if given, else jittered backoff."""
+        response = getattr(error, 'response', None)
+        if response is not None:
+            try:
+                return min(float(response.headers.get('retry-after')), self.backoff_max)
+            except (TypeError, ValueError):
+                pass
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    def close(self) -> None:
+        """Close the pooled HTTP connections."""
+        self.client.close()
+
+
+class StubClueProvider:
+    """Offline provider returning canned replies, for tests and local development."""
+
+    def __init__(self, model_id: str = 'stub', latency: float = 0.0,
+                 topic: Optional[str] = 'General knowledge'):
+        self.model_id = model_id
+        self.latency = latency
+        self.topic = topic
+
+    def complete(self, system_prompt: str, user_prompt: str) -> str:
+        """Answer topic, batch and single-clue prompts with deterministic text."""
+        if self.latency:
+            time.sleep(self.latency)
+        if system_prompt.startswith('Deduce'):
+            return self.topic or ''
+        if user_prompt.startswith('Words: ['):
+            words = json.loads(user_prompt[len('Words: '):])
+            return json.dumps({word: f"n. Stub clue for a {len(word)}-letter word." for word in words})
+        word = user_prompt.split(':', 1)[-1].strip()
+        return f"n. Stub clue for a {len(word)}-letter word."
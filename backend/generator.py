@@ -1,12 +1,28 @@
 import os
 from dataclasses import dataclass
 import random
-from typing import List, Tuple, Dict
+import threading
+import time
+from typing import Callable, List, Tuple, Dict, Iterator, Optional
 import argparse
+import json
+from xml.sax.saxutils import escape
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-import openai
 from PIL import Image, ImageDraw, ImageFont
-from pdf import create_crossword_pdf
+from pdf import create_crossword_pdfs
+from grid import GRID_BACKENDS, make_grid
+from scoring import SCORERS, make_scorer
+from layout_cache import LayoutCache, make_layout_key
+from clue_cache import ClueCache, make_clue_key, make_topic_key
+from clue_provider import ClueProviderError, OpenAIClueProvider, StubClueProvider
+from metrics import metrics
+
+SEARCH_MODES = ('restart', 'backtrack')
+# Bump whenever the clue prompts change so cached clues from older prompts are not reused
+CLUE_PROMPT_VERSION = 1
+# Shown in place of a clue the provider could not produce
+MISSING_CLUE = "Clue not generated."
 
 
 @dataclass
@@ -21,153 +37,449 @@ class PlacedWord:
 class CrosswordGenerator:
     """Generator for crossword puzzles from a list of words."""
 
-    def __init__(self, words: List[str]):
+    def __init__(self, words: List[str], grid_backend: str = 'array', scoring: str = 'compact',
+                 seed: Optional[int] = None, clue_cache: Optional[ClueCache] = None,
+                 clue_provider=None):
         """Initialize the crossword generator with a list of words."""
-        self.words: List[str] = list(set(words))  # Remove duplicates
-        self.grid: Dict[Tuple[int, int], str] = {}  # (row, col): char
+        self.words: List[str] = sorted(set(words))  # Remove duplicates, fix the order
+        self.grid_backend: str = grid_backend
+        self.seed: Optional[int] = seed
+        self.rng = random.Random(seed)
+        self.clue_cache: Optional[ClueCache] = clue_cache
+        # Any object with a model_id and complete(system_prompt, user_prompt) -> str
+        self.clue_provider = clue_provider
+        self.scorer = make_scorer(scoring)
+        self.score: float = 0.0
+        self.grid = make_grid(grid_backend)  # (row, col) -> char backend
         self.placed_words: List[PlacedWord] = []
         self.clue_ids: Dict[str, Dict[int, str]] = {'across': {}, 'down': {}}
         self.clues: Dict[str, Dict[int, str]] = {'across': {}, 'down': {}}
         self.overlap_count: int = 0
+        # letter -> [(row, col, direction)] for cells crossed by exactly one word
+        self.letter_index: Dict[str, List[Tuple[int, int, str]]] = {}
+        self._anchor_slots: Dict[Tuple[int, int], int] = {}  # (row, col) -> slot in letter_index
+
+    def _reset_layout(self) -> None:
+        """Start a new, empty layout attempt."""
+        self.grid = make_grid(self.grid_backend)
+        self.placed_words = []
+        self.overlap_count = 0
+        self.score = 0.0
+        self.clue_ids = {'across': {}, 'down': {}}
+        self.letter_index = {}
+        self._anchor_slots = {}
 
     def can_place(self, word: str, row: int, col: int, direction: str) -> bool:
         """Check if a word can be placed at the specified position and direction."""
-        overlap = False
-        is_horizontal = direction == 'horizontal'
-
-        # Check before the word starts and after it ends
-        if is_horizontal:
-            if (row, col-1) in self.grid or (row, col+len(word)) in self.grid:
-                return False
-        else:  # vertical
-            if (row-1, col) in self.grid or (row+len(word), col) in self.grid:
-                return False
-
-        for i, letter in enumerate(word):
-            r = row + (i if not is_horizontal else 0)
-            c = col + (i if is_horizontal else 0)
-
-            if (r, c) in self.grid:
-                if self.grid[(r, c)] != letter:
-                    return False
-                overlap = True
-            else:
-                # Check adjacent cells in perpendicular direction to avoid adjacency
-                if is_horizontal:
-                    if (r-1, c) in self.grid or (r+1, c) in self.grid:
-                        return False
-                else:
-                    if (r, c-1) in self.grid or (r, c+1) in self.grid:
-                        return False
-
-        return overlap
+        return self.grid.can_place(word, row, col, direction == 'horizontal')
 
     def place_word(self, word: str, row: int, col: int, direction: str) -> None:
         """Place a word on the grid at the specified position and direction."""
-        overlaps = 0
         is_horizontal = direction == 'horizontal'
+        self.overlap_count += self.grid.place(word, row, col, is_horizontal)
+        self.placed_words.append(PlacedWord(word, row, col, direction))
+        self._update_score()
 
         for i, letter in enumerate(word):
-            r = row + (i if not is_horizontal else 0)
-            c = col + (i if is_horizontal else 0)
-
-            if (r, c) in self.grid:
-                overlaps += 1
-            self.grid[(r, c)] = letter
-
-        self.overlap_count += overlaps
-        self.placed_words.append(PlacedWord(word, row, col, direction))
+            pos = (row, col + i) if is_horizontal else (row + i, col)
+            if pos in self._anchor_slots:
+                # Cells crossed by two words can no longer anchor anything
+                self._remove_anchor(pos, letter)
+            else:
+                self._add_anchor(pos, letter, direction)
+
+    def undo_last_word(self) -> PlacedWord:
+        """Remove the most recently placed word from the grid and return it."""
+        pw = self.placed_words.pop()
+        self.overlap_count -= self.grid.undo()
+        self._update_score()
+
+        is_horizontal = pw.direction == 'horizontal'
+        crossing_dir = 'vertical' if is_horizontal else 'horizontal'
+        for i, letter in enumerate(pw.word):
+            pos = (pw.row, pw.col + i) if is_horizontal else (pw.row + i, pw.col)
+            if pos in self._anchor_slots:
+                # Only this word ran through the cell, which is now empty again
+                self._remove_anchor(pos, letter)
+            else:
+                # The crossing word is left, so the cell becomes an anchor again
+                self._add_anchor(pos, letter, crossing_dir)
+        return pw
+
+    def _update_score(self) -> None:
+        """Rescore the layout from its running overlap count, cell count and bounds."""
+        self.score = self.scorer.score(
+            self.overlap_count, len(self.grid), self.grid.bounds())
+
+    def _is_hopeless(self, remaining_overlaps: int, best_score: Optional[float]) -> bool:
+        """Check whether finishing this layout could no longer beat best_score."""
+        if best_score is None:
+            return False
+        return self.scorer.upper_bound(
+            self.overlap_count, len(self.grid), self.grid.bounds(),
+            remaining_overlaps) <= best_score
+
+    def _add_anchor(self, pos: Tuple[int, int], letter: str, direction: str) -> None:
+        """Register a cell crossed by a single word in the letter index."""
+        anchors = self.letter_index.setdefault(letter, [])
+        self._anchor_slots[pos] = len(anchors)
+        anchors.append((pos[0], pos[1], direction))
+
+    def _remove_anchor(self, pos: Tuple[int, int], letter: str) -> None:
+        """Drop a cell from the letter index by swapping in the last entry."""
+        anchors = self.letter_index[letter]
+        slot = self._anchor_slots.pop(pos)
+        last = anchors.pop()
+        if slot < len(anchors):
+            anchors[slot] = last
+            self._anchor_slots[(last[0], last[1])] = slot
+
+    def _candidate_positions(self, word: str) -> Iterator[Tuple[int, int, str]]:
+        """Lazily yield (row, col, direction) placements that cross an existing letter."""
+        offsets = list(range(len(word)))
+        self.rng.shuffle(offsets)
+
+        for idx_new in offsets:
+            anchors = self.letter_index.get(word[idx_new])
+            if not anchors:
+                continue
+            # Snapshot so that placing and undoing while iterating cannot reorder it
+            anchors = tuple(anchors)
+            # Walk the anchors from a random start instead of shuffling the whole list
+            count = len(anchors)
+            start = self.rng.randrange(count)
+            for i in range(count):
+                r, c, anchor_dir = anchors[(start + i) % count]
+                if anchor_dir == 'horizontal':
+                    yield r - idx_new, c, 'vertical'
+                else:
+                    yield r, c - idx_new, 'horizontal'
 
     def _try_place_word(self, word: str) -> bool:
         """Try to place a single word in the existing grid."""
-        random.shuffle(self.placed_words)
-
-        for placed_word in self.placed_words:
-            pw_row = placed_word.row
-            pw_col = placed_word.col
-            pw_dir = placed_word.direction
-            pw_word = placed_word.word
-
-            target_dir = 'vertical' if pw_dir == 'horizontal' else 'horizontal'
-
-            for idx_placed, char in enumerate(pw_word):
-                if char not in word:
-                    continue
-
-                for idx_new, c in enumerate(word):
-                    if c != char:
-                        continue
-
-                    # Calculate new position
-                    if target_dir == 'vertical':
-                        new_row = pw_row - idx_new if pw_dir == 'horizontal' else pw_row + \
-                            (idx_placed - idx_new)
-                        new_col = pw_col + idx_placed if pw_dir == 'horizontal' else pw_col
-                    else:
-                        new_row = pw_row + idx_placed if pw_dir == 'vertical' else pw_row
-                        new_col = pw_col - idx_new if pw_dir == 'vertical' else pw_col + \
-                            (idx_placed - idx_new)
-
-                    if self.can_place(word, new_row, new_col, target_dir):
-                        self.place_word(word, new_row, new_col, target_dir)
-                        return True
+        for new_row, new_col, target_dir in self._candidate_positions(word):
+            if self.can_place(word, new_row, new_col, target_dir):
+                self.place_word(word, new_row, new_col, target_dir)
+                return True
 
         return False
 
-    def generate_grid(self, max_attempts: int = 50) -> bool:
-        """Generate a crossword grid by trying multiple layouts."""
+    def _place_backtracking(self, words: List[str], node_budget: int, backtrack_depth: int,
+                            deadline: Optional[float], remaining: List[int],
+                            best_score: Optional[float]) -> bool:
+        """Place words depth-first, undoing up to backtrack_depth recent words on a dead end.
+
+        remaining[i] bounds the overlaps words[i + 1:] can still add once words[i]
+        is placed; the attempt is abandoned once it can no longer beat best_score.
+        """
+        candidates: List[Optional[Iterator[Tuple[int, int, str]]]] = [None] * len(words)
+        level = 0
+        frontier = 0
+        nodes = 0
+
+        while level < len(words):
+            word = words[level]
+            if candidates[level] is None:
+                candidates[level] = self._candidate_positions(word)
+
+            placed = False
+            for new_row, new_col, target_dir in candidates[level]:
+                if self.can_place(word, new_row, new_col, target_dir):
+                    self.place_word(word, new_row, new_col, target_dir)
+                    placed = True
+                    break
+
+            if placed:
+                level += 1
+                frontier = max(frontier, level)
+                if level < len(words):
+                    candidates[level] = None
+                nodes += 1
+                if level < len(words) and (
+                        nodes >= node_budget or
+                        (deadline is not None and time.monotonic() >= deadline) or
+                        self._is_hopeless(remaining[level - 1], best_score)):
+                    return False
+                continue
+
+            # Dead end: revisit the previous word's remaining anchors, unless that
+            # would unwind further than backtrack_depth from the deepest level reached
+            candidates[level] = None
+            level -= 1
+            if level < 0 or level < frontier - backtrack_depth:
+                return False
+            self.undo_last_word()
+
+        return True
+
+    def generate_grid(self, max_attempts: int = 50, search: str = 'restart',
+                      node_budget: int = 5000, backtrack_depth: int = 3,
+                      time_limit: Optional[float] = None, workers: int = 1,
+                      target_overlaps: Optional[int] = None,
+                      cache: Optional[LayoutCache] = None,
+                      progress: Optional[Callable[[int, Optional[int]], None]] = None) -> bool:
+        """Generate a crossword grid by trying multiple layouts.
+
+        search='restart' abandons an attempt as soon as one word cannot be placed;
+        search='backtrack' first undoes and re-places up to backtrack_depth recent
+        words, spending at most node_budget placements per attempt. time_limit
+        (seconds) bounds the whole call; the best layout found so far is kept.
+        The search also stops early once a layout reaches target_overlaps, which
+        defaults to overlap_upper_bound(). With workers > 1 the attempts are
+        split into seeded batches that run in a shared process pool.
+
+        With a seed, every call repeats the same search. When a cache is given
+        and the generator is seeded, a layout stored for the same words, seed,
+        scoring and options is loaded without searching. A new layout is only
+        stored if its search was not cut short by time_limit, or if it reached
+        target_overlaps anyway. Unseeded runs never use the cache, so each one
+        can find a different layout.
+
+        progress, if given, is called as progress(attempts_done, best_overlaps)
+        as the search advances; best_overlaps is None until a layout is found.
+        """
+        if search not in SEARCH_MODES:
+            raise ValueError(
+                f"Unknown search mode '{search}'. Choose from: {', '.join(SEARCH_MODES)}")
+
+        options = {
+            'max_attempts': max_attempts,
+            'search': search,
+            'node_budget': node_budget,
+            'backtrack_depth': backtrack_depth,
+            'workers': workers,
+            'target_overlaps': target_overlaps,
+        }
+        if self.seed is None:
+            cache = None
+        cache_key = None
+        if cache is not None:
+            cache_key = make_layout_key(self.words, self.seed, self.scorer, options)
+            layout = cache.get(cache_key)
+            if layout is not None:
+                self.load_layout(layout)
+                print(f"Loaded cached layout with {self.overlap_count} overlaps")
+                return True
+
+        if self.seed is not None:
+            self.rng.seed(self.seed)
+
+        crossing_caps = self._crossing_caps()
+        if target_overlaps is None:
+            target_overlaps = self.overlap_upper_bound(crossing_caps)
+
+        attempts = [0]
+
+        def report(attempts_done, best_overlaps):
+            attempts[0] = attempts_done
+            if progress is not None:
+                progress(attempts_done, best_overlaps)
+
+        start = time.perf_counter()
+        if workers > 1 and max_attempts > 1:
+            success = self._generate_grid_parallel(
+                max_attempts, workers, search=search, node_budget=node_budget,
+                backtrack_depth=backtrack_depth, time_limit=time_limit,
+                target_overlaps=target_overlaps, progress=report)
+        else:
+            success = self._generate_grid_serial(
+                max_attempts, search, node_budget, backtrack_depth, time_limit,
+                target_overlaps, crossing_caps, report)
+        seconds = time.perf_counter() - start
+        metrics.observe('grid_search', seconds, outcome='found' if success else 'failed')
+        metrics.inc('grid_attempts', attempts[0])
+
+        # time_limit is not part of the key, so a search it cut short must not stand in for a full one
+        completed = time_limit is None or seconds < time_limit
+        if success and cache is not None and (completed or self.overlap_count >= target_overlaps):
+            cache.put(cache_key, self.export_layout())
+        return success
+
+    def _generate_grid_serial(self, max_attempts: int, search: str, node_budget: int,
+                              backtrack_depth: int, time_limit: Optional[float],
+                              target_overlaps: int, crossing_caps: Dict[str, int],
+                              progress: Optional[Callable[[int, Optional[int]], None]] = None) -> bool:
+        """Run the attempts in this process and keep the best-scoring layout."""
+        deadline = time.monotonic() + time_limit if time_limit is not None else None
         best_grid = None
         best_placed_words = None
         best_overlap_count = -1
+        best_score: Optional[float] = None
         best_clues = None
+        best_index = None
 
-        for attempt in range(max_attempts):
-            self.grid = {}
-            self.placed_words = []
-            self.overlap_count = 0
-            self.clue_ids = {'across': {}, 'down': {}}
+        attempt = 0
+        while attempt < max_attempts:
+            if deadline is not None and attempt > 0 and time.monotonic() >= deadline:
+                print(f"Time limit reached after {attempt} attempts")
+                break
+            attempt += 1
+
+            self._reset_layout()
 
             # Sort words by length (longest first) with some randomization
             sorted_words = sorted(
-                self.words, key=lambda x: (-len(x), random.random()))
+                self.words, key=lambda x: (-len(x), self.rng.random()))
 
             if not sorted_words:
                 return False
 
+            # remaining[i]: most overlaps that words i+1 onwards can still add
+            remaining = [0] * len(sorted_words)
+            for i in range(len(sorted_words) - 2, -1, -1):
+                remaining[i] = remaining[i + 1] + crossing_caps[sorted_words[i + 1]]
+
             # Place the first word horizontally in the center
             first_word = sorted_words[0]
             start_col = -len(first_word) // 2
             self.place_word(first_word, 0, start_col, 'horizontal')
 
             # Try to place remaining words
-            all_placed = True
-            for word in sorted_words[1:]:
-                if not self._try_place_word(word):
-                    all_placed = False
-                    break
+            if search == 'backtrack':
+                all_placed = self._place_backtracking(
+                    sorted_words[1:], node_budget, backtrack_depth, deadline,
+                    remaining[1:], best_score)
+            else:
+                all_placed = True
+                for i, word in enumerate(sorted_words[1:], start=1):
+                    if not self._try_place_word(word) or self._is_hopeless(remaining[i], best_score):
+                        all_placed = False
+                        break
 
             if all_placed:
                 self._assign_clue_numbers()
-                if self.overlap_count > best_overlap_count:
-                    best_grid = dict(self.grid)
+                if best_score is None or self.score > best_score:
+                    # Each attempt builds a fresh grid, so the layout can be kept without copying
+                    best_grid = self.grid
                     best_placed_words = list(self.placed_words)
                     best_overlap_count = self.overlap_count
+                    best_score = self.score
                     best_clues = dict(self.clue_ids)
+                    best_index = (self.letter_index, self._anchor_slots)
+                    print(
+                        f"Attempt {attempt} of {max_attempts}: {self.overlap_count} overlaps")
 
-            print(
-                f"Attempt {attempt + 1} of {max_attempts}: {self.overlap_count} overlaps")
+                    if best_overlap_count >= target_overlaps:
+                        print(f"Target of {target_overlaps} overlaps reached")
+                        break
+
+            if progress is not None:
+                progress(attempt, best_overlap_count if best_grid is not None else None)
 
         # Use the best grid found
         if best_grid is not None:
             self.grid = best_grid
             self.placed_words = best_placed_words
             self.overlap_count = best_overlap_count
+            self.score = best_score
             self.clue_ids = best_clues
-            print(f"Best number of overlaps: {self.overlap_count}")
+            self.letter_index, self._anchor_slots = best_index
+            print(
+                f"Best number of overlaps: {self.overlap_count} after {attempt} attempts")
             return True
 
         return False
 
+    def _crossing_caps(self) -> Dict[str, int]:
+        """Most words each word could cross: one per letter, and only words sharing a letter."""
+        letter_sets = [set(word) for word in self.words]
+        caps = {}
+        for i, (word, letters) in enumerate(zip(self.words, letter_sets)):
+            partners = sum(1 for j, other in enumerate(letter_sets)
+                           if j != i and letters & other)
+            caps[word] = min(len(word), partners)
+        return caps
+
+    def overlap_upper_bound(self, crossing_caps: Optional[Dict[str, int]] = None) -> int:
+        """Upper bound on the overlaps any layout of the current words can reach.
+
+        Each overlap is counted by both words it joins, so it is at most half the
+        sum of the per-word crossing caps. Crossings also only join across and
+        down words, so there can be no more than a complete bipartite graph's n^2 / 4.
+        """
+        if crossing_caps is None:
+            crossing_caps = self._crossing_caps()
+        return min(sum(crossing_caps.values()) // 2, len(self.words) ** 2 // 4)
+
+    def _generate_grid_parallel(self, max_attempts: int, workers: int,
+                                progress: Optional[Callable[[int, Optional[int]], None]] = None,
+                                **options) -> bool:
+        """Spread attempts over the process pool and keep the layout with most overlaps."""
+        # Derive the batch seeds from the generator's RNG so a seeded run is reproducible
+        base_seed = self.rng.getrandbits(32)
+        batches = min(workers, max_attempts)
+        pool = _get_process_pool(workers)
+        futures = []
+        for i in range(batches):
+            attempts = max_attempts // batches + (1 if i < max_attempts % batches else 0)
+            futures.append(pool.submit(
+                _run_attempt_batch, self.words, self.grid_backend, self.scorer,
+                attempts, base_seed + i, options))
+
+        best_layout = None
+        attempts_done = 0
+        for i, future in enumerate(futures):
+            layout = future.result()
+            # Ties go to the lowest batch so the result does not depend on scheduling
+            if layout is not None and (
+                    best_layout is None or layout['score'] > best_layout['score']):
+                best_layout = layout
+            attempts_done += max_attempts // batches + (1 if i < max_attempts % batches else 0)
+            if progress is not None:
+                progress(attempts_done, best_layout['overlap_count'] if best_layout else None)
+            if best_layout is not None and best_layout['overlap_count'] >= options['target_overlaps']:
+                # Later batches cannot win ties, so skip any that have not started
+                for pending in futures:
+                    pending.cancel()
+                break
+
+        if best_layout is None:
+            return False
+
+        self.load_layout(best_layout)
+        print(f"Best number of overlaps: {self.overlap_count}")
+        return True
+
+    def export_layout(self) -> Dict:
+        """Serialize the current layout into a compact, JSON-compatible dict."""
+        return {
+            'overlap_count': self.overlap_count,
+            'score': self.score,
+            'placed_words': [[pw.word, pw.row, pw.col, pw.direction[0]]
+                             for pw in self.placed_words],
+            'clue_ids': {direction: {str(number): word for number, word in ids.items()}
+                         for direction, ids in self.clue_ids.items()},
+        }
+
+    def load_layout(self, layout: Dict) -> None:
+        """Rebuild the grid, placed words and clue numbers from export_layout() output."""
+        self._reset_layout()
+        for word, row, col, direction in layout['placed_words']:
+            self.place_word(word, row, col,
+                            'horizontal' if direction == 'h' else 'vertical')
+        self.clue_ids = {direction: {int(number): word for number, word in ids.items()}
+                         for direction, ids in layout['clue_ids'].items()}
+
+    def export_state(self) -> Dict:
+        """Serialize the word list, seed, layout and clues into a JSON-compatible dict."""
+        return {
+            'words': self.words,
+            'seed': self.seed,
+            'layout': self.export_layout() if self.placed_words else None,
+            'clues': {direction: {str(number): clue for number, clue in clues.items()}
+                      for direction, clues in self.clues.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict, **kwargs) -> 'CrosswordGenerator':
+        """Recreate a generator from export_state() output; kwargs go to the constructor."""
+        generator = cls(state['words'], seed=state['seed'], **kwargs)
+        if state['layout'] is not None:
+            generator.load_layout(state['layout'])
+        generator.clues = {direction: {int(number): clue for number, clue in clues.items()}
+                           for direction, clues in state['clues'].items()}
+        return generator
+
     def _assign_clue_numbers(self) -> None:
         """Assign sequential numbers to each word's starting position."""
         start_positions = []
@@ -175,10 +487,10 @@ class CrosswordGenerator:
         for pw in self.placed_words:
             row, col = pw.row, pw.col
             if pw.direction == 'horizontal':
-                if (row, col - 1) not in self.grid:
+                if not self.grid.is_filled(row, col - 1):
                     start_positions.append((row, col))
             else:
-                if (row - 1, col) not in self.grid:
+                if not self.grid.is_filled(row - 1, col):
                     start_positions.append((row, col))
 
         # Sort positions by row then column
@@ -200,68 +512,219 @@ class CrosswordGenerator:
                 direction = 'across' if pw.direction == 'horizontal' else 'down'
                 self.clue_ids[direction][number] = pw.word
 
-    def generate_clues(self, base_url: str, api_key: str, model_id: str) -> None:
-        """Generate clues for the crossword using an AI API."""
-        openai.base_url = base_url
-        openai.api_key = api_key
-
-        topic = self.analyze_topic(base_url, api_key, model_id)
-
+    def generate_clues(self, concurrency: int = 8, batch_size: int = 1) -> List[str]:
+        """Generate clues for the crossword using the clue provider.
+
+        Returns the words no clue could be generated for; their clues are set to MISSING_CLUE.
+        """
+        missing = []
+        for direction, number, word, clue in self.iter_clues(None, concurrency, batch_size):
+            if clue is None:
+                missing.append(word)
+                clue = MISSING_CLUE
+            self.clues[direction][number] = clue
+        return missing
+
+    def iter_clues(self, topic: Optional[str], concurrency: int = 8,
+                   batch_size: int = 1) -> Iterator[Tuple[str, int, str, Optional[str]]]:
+        """Generate clues with up to `concurrency` requests in flight.
+
+        With batch_size > 1 each request asks for that many clues at once.
+        When topic is None it is taken from the topic cache, or else inferred by
+        analyze_topic alongside the clue requests: requests that start before
+        it arrives use the topic-free prompt. Yields (direction, number, word,
+        clue) tuples in completion order, with clue None if the provider failed.
+        """
+        self._require_provider()
+        if topic is None:
+            topic = self._cached_topic()
+
+        entries = []
         for direction in ['across', 'down']:
-            for number, word in list(self.clue_ids[direction].items()):
-                clue = self.generate_single_clue(
-                    topic, word, base_url, api_key, model_id)
-                self.clues[direction][number] = clue
-
-    def analyze_topic(self, base_url: str, api_key: str, model_id: str) -> str:
-        """Analyze the topics of the words provided using the AI API."""
-        openai.base_url = base_url
-        openai.api_key = api_key
-
-        response = openai.chat.completions.create(
-            model=model_id,
-            messages=[
-                {"role": "system",
-                    "content": "Deduce the academic topic from the following words. Your output should be a single word or a phrase."},
-                {"role": "user", "content": f"Words: {', '.join(self.words)}"}
-            ]
-        )
-        topic = response.choices[0].message.content.strip()
+            for number, word in self.clue_ids[direction].items():
+                # Cached clues go out straight away, without waiting on any request
+                clue = self._cached_clue(topic, word) if topic is not None else None
+                if clue is not None:
+                    yield direction, number, word, clue
+                else:
+                    entries.append((direction, number, word))
+        if not entries:
+            return
+
+        batch_size = max(1, batch_size)
+        batches = [entries[i:i + batch_size] for i in range(0, len(entries), batch_size)]
+        workers = max(1, min(concurrency, len(batches)))
+        executor = ThreadPoolExecutor(max_workers=workers + (1 if topic is None else 0))
+        try:
+            topic_future = None
+            if topic is None:
+                # Submitted first so it starts right away next to the first clue requests
+                topic_future = executor.submit(self._fetch_topic)
+
+            def current_topic() -> str:
+                if topic_future is None:
+                    return topic
+                if topic_future.done() and topic_future.exception() is None:
+                    return topic_future.result()
+                return ''
+
+            # With a known topic the cache hits were already sent above
+            check_cache = topic_future is not None
+            futures = {
+                executor.submit(self._clue_batch_task, current_topic, batch, check_cache): batch
+                for batch in batches
+            }
+            for future in as_completed(futures):
+                clues = future.result()
+                for direction, number, word in futures[future]:
+                    yield direction, number, word, clues.get(word)
+        finally:
+            # If the consumer stops early (e.g. the SSE client went away), drop queued requests
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _clue_batch_task(self, current_topic: Callable[[], str], batch: List[Tuple[str, int, str]],
+                         check_cache: bool) -> Dict[str, str]:
+        """Produce clues for one batch of (direction, number, word) entries, leaving out failed words."""
+        # Resolve the topic when the request starts, so later batches pick it up once known
+        topic = current_topic()
+        words = [word for _, _, word in batch]
+        if len(words) == 1:
+            fetch_single = self.generate_single_clue if check_cache else self._fetch_single_clue
+            try:
+                return {words[0]: fetch_single(topic, words[0])}
+            except ClueProviderError:
+                return {}
+        fetch_batch = self.generate_clue_batch if check_cache else self._fetch_clue_batch
+        return fetch_batch(topic, words)
+
+    def analyze_topic(self) -> str:
+        """Analyze the topics of the words provided using the clue provider."""
+        self._require_provider()
+        topic = self._cached_topic()
+        if topic is not None:
+            print(f"Using cached topic: {topic}")
+            return topic
+        return self._fetch_topic()
+
+    def _fetch_topic(self) -> str:
+        """Ask the clue provider for the topic, bypassing the cache lookup."""
+        try:
+            topic = self.clue_provider.complete(
+                "Deduce the academic topic from the following words. Your output should be a single word or a phrase.",
+                f"Words: {', '.join(self.words)}"
+            ).strip()
+        except ClueProviderError as e:
+            # Not cached, so the next puzzle with these words tries again
+            print(f"Error analyzing topic: {str(e)}")
+            return ""
         print(f"Analyzed topic: {topic}")
         words_in_topic = len(topic.split())
         if words_in_topic > 4:
             print(
                 f"Error: Topic '{topic}' has {words_in_topic} words, which exceeds the 4-word limit.")
-            return ""
+            topic = ""
+        if self.clue_cache is not None:
+            self.clue_cache.put_topic(self._topic_key(), topic)
         return topic
 
-    def generate_single_clue(self, topic: str, word: str, base_url: str, api_key: str, model_id: str) -> str:
-        """Generate a single clue for a word using the AI API."""
-        try:
-            openai.api_key = api_key
-            openai.base_url = base_url
-
-            system_prompt = (
-                f"Generate a concise 1-line crossword clue for children studying {topic}. "
-                if topic else
-                "Generate a concise 1-line crossword clue for children. "
-            ) + "Avoid mentioning the word directly. Do not include the word length. Start with word type such as verb., n., adj., etc. Your response should be in this format: 'n. <Description>.'"
-
-            response = openai.chat.completions.create(
-                model=model_id,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Word: {word}"}
-                ]
-            )
-            clue = response.choices[0].message.content.strip()
-            clue = clue.replace('<', '').replace('>', '')
-            print(f"Generated clue for {word}: {clue}")
+    def _topic_key(self):
+        return make_topic_key(self.words, self.clue_provider.model_id, CLUE_PROMPT_VERSION)
+
+    def _cached_topic(self) -> Optional[str]:
+        """Look up the topic previously inferred for this word set, if a clue cache is attached."""
+        if self.clue_cache is None:
+            return None
+        return self.clue_cache.get_topic(self._topic_key())
+
+    def generate_single_clue(self, topic: str, word: str) -> str:
+        """Generate a single clue for a word using the clue provider.
+
+        Raises ClueProviderError if the provider fails.
+        """
+        self._require_provider()
+        clue = self._cached_clue(topic, word)
+        if clue is not None:
             return clue
-        except (openai.APIError, openai.APIConnectionError, openai.RateLimitError) as e:
-            error_message = f"Clue not generated: {str(e)}"
+        return self._fetch_single_clue(topic, word)
+
+    def _fetch_single_clue(self, topic: str, word: str) -> str:
+        """Request a single clue from the clue provider, bypassing the cache lookup."""
+        system_prompt = _clue_instructions(topic) + \
+            " Your response should be in this format: 'n. <Description>.'"
+        try:
+            clue = _clean_clue(self.clue_provider.complete(system_prompt, f"Word: {word}"))
+        except ClueProviderError as e:
             print(f"Error generating clue for {word}: {str(e)}")
-            return error_message
+            raise
+        print(f"Generated clue for {word}: {clue}")
+        self._store_clue(topic, word, clue)
+        return clue
+
+    def generate_clue_batch(self, topic: str, words: List[str]) -> Dict[str, str]:
+        """Generate clues for several words in one request.
+
+        Words the model skipped or answered with something unusable fall back
+        to generate_single_clue; words that still get no clue are left out.
+        """
+        self._require_provider()
+        clues: Dict[str, str] = {}
+        missing = []
+        for word in words:
+            clue = self._cached_clue(topic, word)
+            if clue is not None:
+                clues[word] = clue
+            else:
+                missing.append(word)
+        if missing:
+            clues.update(self._fetch_clue_batch(topic, missing))
+        return clues
+
+    def _fetch_clue_batch(self, topic: str, words: List[str]) -> Dict[str, str]:
+        """Request clues for several words in one call, bypassing the cache lookup.
+
+        Words no clue could be generated for are left out.
+        """
+        clues: Dict[str, str] = {}
+        try:
+            system_prompt = _clue_instructions(topic) + (
+                " You will be given a list of words. Respond with only a JSON object that maps"
+                " each word, exactly as given, to its clue in the format 'n. Description.'")
+            content = self.clue_provider.complete(
+                system_prompt, "Words: " + json.dumps(words, ensure_ascii=False))
+            clues = _parse_clue_batch(content, words)
+        except ClueProviderError as e:
+            print(f"Error generating clue batch for {', '.join(words)}: {str(e)}")
+
+        for word in words:
+            if word in clues:
+                print(f"Generated clue for {word}: {clues[word]}")
+                self._store_clue(topic, word, clues[word])
+            else:
+                try:
+                    clues[word] = self._fetch_single_clue(topic, word)
+                except ClueProviderError:
+                    pass
+        return clues
+
+    def _require_provider(self) -> None:
+        if self.clue_provider is None:
+            raise ValueError("No clue provider configured for clue generation.")
+
+    def _cached_clue(self, topic: str, word: str) -> Optional[str]:
+        """Look up a previously generated clue, if a clue cache is attached."""
+        if self.clue_cache is None:
+            return None
+        clue = self.clue_cache.get(make_clue_key(
+            word, topic, self.clue_provider.model_id, CLUE_PROMPT_VERSION))
+        if clue is not None:
+            print(f"Using cached clue for {word}: {clue}")
+        return clue
+
+    def _store_clue(self, topic: str, word: str, clue: str) -> None:
+        """Remember a successfully generated clue, if a clue cache is attached."""
+        if self.clue_cache is not None:
+            self.clue_cache.put(make_clue_key(
+                word, topic, self.clue_provider.model_id, CLUE_PROMPT_VERSION), clue)
 
     def save_clues_text(self, output_dir: str = 'output') -> None:
         """Save the crossword clues to a text file in the format '1: <clue text>'."""
@@ -286,12 +749,7 @@ class CrosswordGenerator:
 
     def get_grid_bounds(self) -> Tuple[int, int, int, int]:
         """Get the minimum and maximum row and column values of the grid."""
-        if not self.grid:
-            return 0, 0, 0, 0
-
-        rows = [r for r, _ in self.grid.keys()]
-        cols = [c for _, c in self.grid.keys()]
-        return min(rows), max(rows), min(cols), max(cols)
+        return self.grid.bounds()
 
     def display_grid(self) -> None:
         """Display the grid in text form to the console."""
@@ -304,91 +762,258 @@ class CrosswordGenerator:
         for r in range(min_row, max_row + 1):
             row_str = []
             for c in range(min_col, max_col + 1):
-                if (r, c) in self.grid:
-                    row_str.append(self.grid[(r, c)])
-                else:
-                    row_str.append(' ')
+                row_str.append(self.grid.get(r, c) or ' ')
             print(' '.join(row_str))
 
-    def draw_grid(self, answer: bool = False, output_dir: str = 'output') -> None:
-        """Draw the crossword grid as an image with clue numbers."""
+    def draw_grid(self, answer: bool = False, output_dir: Optional[str] = 'output',
+                  background: bool = False) -> Image.Image:
+        """Render the grid and return the image, also saving it as a PNG in output_dir if given.
+
+        With background=True the file is written by a background thread.
+        """
+        img = self.render_grid(answer)
+        if output_dir is not None:
+            self._save_grid_image(img, answer, output_dir, background)
+        return img
+
+    def draw_grids(self, output_dir: Optional[str] = 'output',
+                   background: bool = False) -> Tuple[Image.Image, Image.Image]:
+        """Render the question and answer grids in one pass, saving them as in draw_grid()."""
+        question_img, answer_img = self.render_grids()
+        if output_dir is not None:
+            self._save_grid_image(question_img, False, output_dir, background)
+            self._save_grid_image(answer_img, True, output_dir, background)
+        return question_img, answer_img
+
+    def _save_grid_image(self, img: Image.Image, answer: bool, output_dir: str,
+                         background: bool) -> None:
+        os.makedirs(output_dir, exist_ok=True)
+        filename = f'{output_dir}/crossword_puzzle_{"answer" if answer else "question"}.png'
+        save_image(img, filename, background=background)
+
+    def render_grid(self, answer: bool = False) -> Image.Image:
+        """Draw the crossword grid as an in-memory image with clue numbers."""
+        with metrics.timer('grid_render', format='png'):
+            layout = self._render_layout()
+            img = self._render_base(layout)
+            if answer:
+                self._render_letters(img, layout)
+        return img
+
+    def render_grids(self) -> Tuple[Image.Image, Image.Image]:
+        """Draw the question and answer images, sharing the cell and number layer."""
+        with metrics.timer('grid_render', format='png'):
+            layout = self._render_layout()
+            question_img = self._render_base(layout)
+            answer_img = question_img.copy()
+            self._render_letters(answer_img, layout)
+        return question_img, answer_img
+
+    def grid_drawing(self) -> Dict:
+        """Describe the grid for renderers, in cell units.
+
+        Returns the grid's size in columns and rows, and a (column, row, letter,
+        clue number or None) entry for each filled cell, counted from the top left.
+        """
         min_row, max_row, min_col, max_col = self.get_grid_bounds()
 
-        # Create a mapping of starting positions to clue numbers
+        # Map each word's starting cell to its clue number
+        starts = {(pw.word, 'across' if pw.direction == 'horizontal' else 'down'): (pw.row, pw.col)
+                  for pw in self.placed_words}
         clue_positions = {}
-        for pw in self.placed_words:
-            row, col = pw.row, pw.col
-            direction = pw.direction
-
-            for direction_key in ['across', 'down']:
-                for number, word in self.clue_ids[direction_key].items():
-                    if word == pw.word and (
-                        (direction == 'horizontal' and direction_key == 'across') or
-                        (direction == 'vertical' and direction_key == 'down')
-                    ):
-                        clue_positions[(row, col)] = number
-                        break
-
-        # Image settings
-        cell_size = 40
-        padding = 20
-        font_size = 20
-        number_size = 10
-
-        # Calculate image dimensions
-        grid_width = max_col - min_col + 1
-        grid_height = max_row - min_row + 1
-        img_width = grid_width * cell_size + 2 * padding
-        img_height = grid_height * cell_size + 2 * padding
-
-        # Create image
-        img = Image.new('RGB', (img_width, img_height), 'white')
+        for direction_key in ('across', 'down'):
+            for number, word in self.clue_ids[direction_key].items():
+                clue_positions[starts[(word, direction_key)]] = number
+
+        return {
+            'columns': max_col - min_col + 1,
+            'rows': max_row - min_row + 1,
+            'cells': [(c - min_col, r - min_row, letter, clue_positions.get((r, c)))
+                      for (r, c), letter in self.grid.items()],
+        }
+
+    def render_svg(self, answer: bool = False) -> str:
+        """Draw the grid as an SVG document, with the same geometry as render_grid()."""
+        return self.render_svgs()[1 if answer else 0]
+
+    def render_svgs(self) -> Tuple[str, str]:
+        """Draw the question and answer grids as SVG documents, sharing the cell and number layer."""
+        start = time.perf_counter()
+        drawing = self.grid_drawing()
+        width = drawing['columns'] * RENDER_CELL_SIZE + 2 * RENDER_PADDING
+        height = drawing['rows'] * RENDER_CELL_SIZE + 2 * RENDER_PADDING
+        base = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}" font-family="Arial, Helvetica, sans-serif">',
+            f'<rect width="{width}" height="{height}" fill="white"/>',
+            '<g fill="none" stroke="black" stroke-width="1">',
+        ]
+        numbers = ['<g font-size="{}">'.format(RENDER_NUMBER_SIZE)]
+        letters = [f'<g font-size="{RENDER_FONT_SIZE}" text-anchor="middle">']
+        half = RENDER_CELL_SIZE // 2
+        # Explicit baselines rather than dominant-baseline, which not every viewer supports
+        number_baseline = 2 + RENDER_NUMBER_SIZE * 0.8
+        letter_baseline = half + RENDER_FONT_SIZE * 0.35
+        for column, row, letter, number in drawing['cells']:
+            x = RENDER_PADDING + column * RENDER_CELL_SIZE
+            y = RENDER_PADDING + row * RENDER_CELL_SIZE
+            base.append(f'<rect x="{x}" y="{y}" width="{RENDER_CELL_SIZE}" height="{RENDER_CELL_SIZE}"/>')
+            if number is not None:
+                numbers.append(f'<text x="{x + 2}" y="{y + number_baseline:g}">{number}</text>')
+            letters.append(f'<text x="{x + half}" y="{y + letter_baseline:g}">{escape(letter.upper())}</text>')
+        base.append('</g>')
+        base.extend(numbers)
+        base.append('</g>')
+        question = ''.join(base) + '</svg>'
+        answer = ''.join(base) + ''.join(letters) + '</g></svg>'
+        metrics.observe('grid_render', time.perf_counter() - start, format='svg')
+        return question, answer
+
+    def _render_layout(self) -> Dict:
+        """Compute image size and cell origins in pixels once for both renders."""
+        drawing = self.grid_drawing()
+        return {
+            'size': (drawing['columns'] * RENDER_CELL_SIZE + 2 * RENDER_PADDING,
+                     drawing['rows'] * RENDER_CELL_SIZE + 2 * RENDER_PADDING),
+            'cells': [(RENDER_PADDING + column * RENDER_CELL_SIZE,
+                       RENDER_PADDING + row * RENDER_CELL_SIZE, letter, number)
+                      for column, row, letter, number in drawing['cells']],
+        }
+
+    def _render_base(self, layout: Dict) -> Image.Image:
+        """Draw the cell outlines and clue numbers shared by the question and answer images."""
+        img = Image.new('RGB', layout['size'], 'white')
         draw = ImageDraw.Draw(img)
-
-        try:
-            main_font = ImageFont.truetype("Arial", font_size)
-            number_font = ImageFont.truetype("Arial", number_size)
-        except IOError:
-            main_font = ImageFont.load_default()
-            number_font = ImageFont.load_default()
-
-        # Draw the grid cells
-        for r in range(min_row, max_row + 1):
-            for c in range(min_col, max_col + 1):
-                x = padding + (c - min_col) * cell_size
-                y = padding + (r - min_row) * cell_size
-
-                if (r, c) in self.grid:
-                    # Draw cell rectangle
-                    draw.rectangle([x, y, x + cell_size, y +
-                                   cell_size], outline='black', width=1)
-
-                    # Draw letter if answer grid
-                    letter = ' '
-                    if answer:
-                        letter = self.grid[(r, c)].upper()
-                    draw.text(
-                        (x + cell_size//2, y + cell_size//2),
-                        letter,
-                        fill='black',
-                        font=main_font,
-                        anchor="mm"
-                    )
-
-                    # Draw clue number if this is a starting position
-                    if (r, c) in clue_positions:
-                        draw.text(
-                            (x + 2, y + 2),
-                            str(clue_positions[(r, c)]),
-                            fill='black',
-                            font=number_font
-                        )
-
-        os.makedirs(output_dir, exist_ok=True)
-        filename = f'{output_dir}/crossword_puzzle_{"answer" if answer else "question"}.png'
+        number_font = _get_font(RENDER_NUMBER_SIZE)
+        for x, y, _, number in layout['cells']:
+            draw.rectangle([x, y, x + RENDER_CELL_SIZE, y + RENDER_CELL_SIZE],
+                           outline='black', width=1)
+            if number is not None:
+                draw.text((x + 2, y + 2), str(number), fill='black', font=number_font)
+        return img
+
+    def _render_letters(self, img: Image.Image, layout: Dict) -> None:
+        """Stamp the answer letters onto a base image."""
+        for x, y, letter, _ in layout['cells']:
+            img.paste('black', (x, y), _letter_stamp(letter.upper()))
+
+
+# Grid image settings, in pixels
+RENDER_CELL_SIZE = 40
+RENDER_PADDING = 20
+RENDER_FONT_SIZE = 20
+RENDER_NUMBER_SIZE = 10
+
+_fonts: Dict[int, ImageFont.ImageFont] = {}
+_fonts_lock = threading.Lock()
+# letter -> cell-sized mask with the letter drawn centred, pasted instead of drawing text per cell
+_letter_stamps: Dict[str, Image.Image] = {}
+
+
+def _get_font(size: int) -> ImageFont.ImageFont:
+    """Load Arial at the given size once per process, falling back to PIL's default font."""
+    with _fonts_lock:
+        if size not in _fonts:
+            try:
+                _fonts[size] = ImageFont.truetype("Arial", size)
+            except IOError:
+                _fonts[size] = ImageFont.load_default()
+        return _fonts[size]
+
+
+def _letter_stamp(letter: str) -> Image.Image:
+    """Return the cached cell-sized mask for a letter, drawing it on first use."""
+    stamp = _letter_stamps.get(letter)
+    if stamp is None:
+        stamp = Image.new('L', (RENDER_CELL_SIZE, RENDER_CELL_SIZE), 0)
+        half = RENDER_CELL_SIZE // 2
+        ImageDraw.Draw(stamp).text((half, half), letter, fill=255,
+                                   font=_get_font(RENDER_FONT_SIZE), anchor="mm")
+        _letter_stamps[letter] = stamp
+    return stamp
+
+
+_io_pool: Optional[ThreadPoolExecutor] = None
+_io_pool_lock = threading.Lock()
+
+
+def save_image(img: Image.Image, filename: str, background: bool = False) -> Optional[Future]:
+    """Save an image as a file, or queue the write on a background thread and return its future."""
+    def write():
         img.save(filename)
         print(f"Crossword image saved as '{filename}'")
 
+    if not background:
+        write()
+        return None
+    global _io_pool
+    with _io_pool_lock:
+        if _io_pool is None:
+            _io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-writer')
+    return _io_pool.submit(write)
+
+
+def _clue_instructions(topic: str) -> str:
+    """Shared system prompt describing the clue style."""
+    return (
+        f"Generate a concise 1-line crossword clue for children studying {topic}. "
+        if topic else
+        "Generate a concise 1-line crossword clue for children. "
+    ) + "Avoid mentioning the word directly. Do not include the word length. Start with word type such as verb., n., adj., etc."
+
+
+def _clean_clue(text: str) -> str:
+    """Normalize a clue returned by the model."""
+    return text.strip().replace('<', '').replace('>', '')
+
+
+def _parse_clue_batch(content: str, words: List[str]) -> Dict[str, str]:
+    """Extract {word: clue} for the requested words from a JSON reply, skipping bad entries."""
+    # Models sometimes wrap the object in a code fence or add a sentence around it
+    start, end = content.find('{'), content.rfind('}')
+    if start < 0 or end < start:
+        return {}
+    try:
+        data = json.loads(content[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    clues = {}
+    for word in words:
+        clue = data.get(word)
+        if isinstance(clue, str) and clue.strip():
+            clues[word] = _clean_clue(clue)
+    return clues
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_size = 0
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """Return a process pool shared across calls, recreating it if the size changes."""
+    global _process_pool, _process_pool_size
+    with _process_pool_lock:
+        if _process_pool is None or _process_pool_size != workers:
+            if _process_pool is not None:
+                _process_pool.shutdown(wait=False)
+            _process_pool = ProcessPoolExecutor(max_workers=workers)
+            _process_pool_size = workers
+        return _process_pool
+
+
+def _run_attempt_batch(words: List[str], grid_backend: str, scorer, attempts: int,
+                       seed: int, options: Dict) -> Optional[Dict]:
+    """Run a seeded batch of attempts in a worker process and return the best layout."""
+    generator = CrosswordGenerator(words, grid_backend=grid_backend, seed=seed)
+    generator.scorer = scorer
+    if not generator.generate_grid(max_attempts=attempts, **options):
+        return None
+    return generator.export_layout()
+
 
 def main():
     """Main function to run the crossword generator."""
@@ -400,6 +1025,36 @@ def main():
                         help="Maximum number of attempts to generate a grid")
     parser.add_argument("--output-dir", default="output",
                         help="Directory to save output files")
+    parser.add_argument("--grid-backend", default="array", choices=sorted(GRID_BACKENDS),
+                        help="Grid storage backend used during placement")
+    parser.add_argument("--scoring", default="compact", choices=sorted(SCORERS),
+                        help="How layouts are ranked: crossings only, or crossings plus compactness")
+    parser.add_argument("--search", default="restart", choices=SEARCH_MODES,
+                        help="Placement strategy: restart each failed attempt, or backtrack first")
+    parser.add_argument("--node-budget", type=int, default=5000,
+                        help="Maximum placements per attempt when backtracking")
+    parser.add_argument("--backtrack-depth", type=int, default=3,
+                        help="How many recent words a backtracking attempt may re-place")
+    parser.add_argument("--time-limit", type=float, default=None,
+                        help="Stop searching after this many seconds and keep the best grid")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of processes to spread grid attempts over")
+    parser.add_argument("--target-overlaps", type=int, default=None,
+                        help="Stop as soon as a grid has this many overlaps (default: upper bound)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Random seed for reproducible grids")
+    parser.add_argument("--layout-cache", default=None,
+                        help="Directory of cached layouts to reuse across runs")
+    parser.add_argument("--clue-concurrency", type=int, default=8,
+                        help="Maximum number of clue requests in flight at once")
+    parser.add_argument("--clue-batch-size", type=int, default=1,
+                        help="Number of words to ask for in each clue request")
+    parser.add_argument("--clue-cache", default=None,
+                        help="SQLite file of previously generated clues to reuse")
+    parser.add_argument("--stub-clues", action="store_true",
+                        help="Use canned offline clues instead of calling the model API")
+    parser.add_argument("--combined-pdf", action="store_true",
+                        help="Also write the question and answer pages as one PDF")
     args = parser.parse_args()
 
     # Read configuration from environment variables
@@ -407,36 +1062,55 @@ def main():
     api_address = os.getenv("API_ADDRESS")
     api_secret = os.getenv("API_SECRET")
     model_id = os.getenv("MODEL_ID")
-    if not all([api_address, api_secret, model_id]):
+    if not args.stub_clues and not all([api_address, api_secret, model_id]):
         print("Error: Missing required environment variables (API_ADDRESS, API_SECRET, MODEL_ID)")
 
+    clue_provider = None
+    if args.stub_clues:
+        clue_provider = StubClueProvider()
+    elif api_address and api_secret:
+        clue_provider = OpenAIClueProvider(api_address, api_secret, model_id)
+
     # Generate the crossword
-    generator = CrosswordGenerator(args.words)
-    if generator.generate_grid(max_attempts=args.max_attempts):
+    generator = CrosswordGenerator(
+        args.words, grid_backend=args.grid_backend, scoring=args.scoring, seed=args.seed,
+        clue_cache=ClueCache(path=args.clue_cache) if args.clue_cache else None,
+        clue_provider=clue_provider)
+    layout_cache = LayoutCache(directory=args.layout_cache) if args.layout_cache else None
+    if generator.generate_grid(max_attempts=args.max_attempts, search=args.search,
+                               node_budget=args.node_budget,
+                               backtrack_depth=args.backtrack_depth,
+                               time_limit=args.time_limit,
+                               workers=args.workers,
+                               target_overlaps=args.target_overlaps,
+                               cache=layout_cache):
         print("Grid generated successfully!\nGrid Preview:")
         generator.display_grid()
 
         # Generate clues if API credentials are available
-        if api_address and api_secret:
-            generator.generate_clues(api_address, api_secret, model_id)
+        if clue_provider is not None:
+            missing = generator.generate_clues(
+                concurrency=args.clue_concurrency, batch_size=args.clue_batch_size)
+            if missing:
+                print(f"No clues generated for: {', '.join(missing)}")
             generator.save_clues_text(args.output_dir)
         else:
             print("API credentials not available. Skipping clue generation.")
 
-        # Save as images
-        generator.draw_grid(answer=False, output_dir=args.output_dir)
-        generator.draw_grid(answer=True, output_dir=args.output_dir)
-
-        # Create PDF
-        create_crossword_pdf(
-            image_path=f"{args.output_dir}/crossword_puzzle_question.png",
-            clues_path=f"{args.output_dir}/crossword_clues.txt",
-            output_pdf_path=f"{args.output_dir}/crossword_puzzle.pdf"
-        )
-        create_crossword_pdf(
-            image_path=f"{args.output_dir}/crossword_puzzle_answer.png",
-            clues_path=f"{args.output_dir}/crossword_clues.txt",
-            output_pdf_path=f"{args.output_dir}/crossword_puzzle_answer.pdf"
+        # Save as images; the PDFs draw the grid as vector shapes
+        generator.draw_grids(output_dir=args.output_dir)
+        drawing = generator.grid_drawing()
+
+        # Create the question and answer PDFs (and optionally both in one file) together
+        with open(f"{args.output_dir}/crossword_clues.txt", 'r', encoding='utf-8') as f:
+            clues_text = f.read()
+        create_crossword_pdfs(
+            clues_text,
+            question_pdf_path=f"{args.output_dir}/crossword_puzzle.pdf",
+            answer_pdf_path=f"{args.output_dir}/crossword_puzzle_answer.pdf",
+            combined_pdf_path=(f"{args.output_dir}/crossword_puzzle_combined.pdf"
+                               if args.combined_pdf else None),
+            grid=drawing
         )
     else:
         print("Failed to generate grid with all words.")
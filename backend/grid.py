@@ -0,0 +1,285 @@
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+def _extend_bounds(bounds: Optional[Tuple[int, int, int, int]], row: int, col: int,
+                   length: int, horizontal: bool) -> Tuple[int, int, int, int]:
+    """Grow (min_row, max_row, min_col, max_col) to cover a newly written word."""
+    end_row = row if horizontal else row + length - 1
+    end_col = col + length - 1 if horizontal else col
+    if bounds is None:
+        return row, end_row, col, end_col
+    min_row, max_row, min_col, max_col = bounds
+    return (min(min_row, row), max(max_row, end_row),
+            min(min_col, col), max(max_col, end_col))
+
+
+class DictGrid:
+    """Sparse grid storing letters in a dict keyed by (row, col)."""
+
+    def __init__(self):
+        self.cells: Dict[Tuple[int, int], str] = {}
+        # Bounds of filled cells, maintained on write
+        self._bounds: Optional[Tuple[int, int, int, int]] = None
+        # Undo stack: (cells written fresh by a placement, overlaps it made, bounds before)
+        self._history: List[Tuple[List[Tuple[int, int]], int,
+                                  Optional[Tuple[int, int, int, int]]]] = []
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def __contains__(self, pos: Tuple[int, int]) -> bool:
+        return pos in self.cells
+
+    def __getitem__(self, pos: Tuple[int, int]) -> str:
+        return self.cells[pos]
+
+    def get(self, row: int, col: int) -> Optional[str]:
+        """Return the letter at (row, col), or None if the cell is empty."""
+        return self.cells.get((row, col))
+
+    def is_filled(self, row: int, col: int) -> bool:
+        """Check whether the cell at (row, col) holds a letter."""
+        return (row, col) in self.cells
+
+    def items(self) -> Iterator[Tuple[Tuple[int, int], str]]:
+        """Iterate over ((row, col), letter) pairs of filled cells."""
+        return iter(self.cells.items())
+
+    def can_place(self, word: str, row: int, col: int, horizontal: bool) -> bool:
+        """Check if a word fits at the position, crossing at least one existing letter."""
+        cells = self.cells
+        overlap = False
+
+        # Check before the word starts and after it ends
+        if horizontal:
+            if (row, col-1) in cells or (row, col+len(word)) in cells:
+                return False
+        else:
+            if (row-1, col) in cells or (row+len(word), col) in cells:
+                return False
+
+        for i, letter in enumerate(word):
+            r = row + (i if not horizontal else 0)
+            c = col + (i if horizontal else 0)
+
+            if (r, c) in cells:
+                if cells[(r, c)] != letter:
+                    return False
+                overlap = True
+            else:
+                # Check adjacent cells in perpendicular direction to avoid adjacency
+                if horizontal:
+                    if (r-1, c) in cells or (r+1, c) in cells:
+                        return False
+                else:
+                    if (r, c-1) in cells or (r, c+1) in cells:
+                        return False
+
+        return overlap
+
+    def place(self, word: str, row: int, col: int, horizontal: bool) -> int:
+        """Write a word into the grid and return the number of overlapping cells."""
+        overlaps = 0
+        fresh = []
+        for i, letter in enumerate(word):
+            pos = (row, col + i) if horizontal else (row + i, col)
+            if pos in self.cells:
+                overlaps += 1
+            else:
+                fresh.append(pos)
+            self.cells[pos] = letter
+        self._history.append((fresh, overlaps, self._bounds))
+        self._bounds = _extend_bounds(self._bounds, row, col, len(word), horizontal)
+        return overlaps
+
+    def undo(self) -> int:
+        """Remove the most recently placed word and return the overlaps it had made."""
+        fresh, overlaps, bounds = self._history.pop()
+        for pos in fresh:
+            del self.cells[pos]
+        self._bounds = bounds
+        return overlaps
+
+    def bounds(self) -> Tuple[int, int, int, int]:
+        """Get the minimum and maximum row and column of filled cells."""
+        return self._bounds or (0, 0, 0, 0)
+
+
+class ArrayGrid:
+    """Dense grid storing letter code points in a flat, offset-indexed array.
+
+    Cell (row, col) lives at index (row - row0) * width + (col - col0); a code
+    of 0 marks an empty cell. The plane grows (with slack) whenever a probe or
+    write reaches outside it, so neighbour checks never need bounds tests.
+    """
+
+    GROW_MARGIN = 8
+
+    def __init__(self):
+        self._cells = array('I')
+        self._row0 = 0
+        self._col0 = 0
+        self._width = 0
+        self._height = 0
+        self._count = 0
+        # Bounds of filled cells, maintained on write
+        self._bounds: Optional[Tuple[int, int, int, int]] = None
+        # Undo stack: (row, col, horizontal, fresh offsets, overlaps, bounds before the write)
+        self._history: List[Tuple[int, int, bool, Tuple[int, ...],
+                                  int, Optional[Tuple[int, int, int, int]]]] = []
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, pos: Tuple[int, int]) -> bool:
+        return self.is_filled(*pos)
+
+    def __getitem__(self, pos: Tuple[int, int]) -> str:
+        letter = self.get(*pos)
+        if letter is None:
+            raise KeyError(pos)
+        return letter
+
+    def _index(self, row: int, col: int) -> int:
+        """Return the flat index of (row, col), or -1 if it is outside the plane."""
+        r = row - self._row0
+        c = col - self._col0
+        if 0 <= r < self._height and 0 <= c < self._width:
+            return r * self._width + c
+        return -1
+
+    def _reserve(self, min_row: int, min_col: int, max_row: int, max_col: int) -> None:
+        """Grow the plane so that the given inclusive rectangle is addressable."""
+        row0, col0 = self._row0, self._col0
+        if (self._width and min_row >= row0 and min_col >= col0 and
+                max_row < row0 + self._height and max_col < col0 + self._width):
+            return
+
+        margin = max(self.GROW_MARGIN, self._width // 2, self._height // 2)
+        if self._width:
+            min_row = min(min_row, row0)
+            min_col = min(min_col, col0)
+            max_row = max(max_row, row0 + self._height - 1)
+            max_col = max(max_col, col0 + self._width - 1)
+        new_row0 = min_row - margin
+        new_col0 = min_col - margin
+        new_height = max_row - new_row0 + 1 + margin
+        new_width = max_col - new_col0 + 1 + margin
+
+        cells = array('I', bytes(4 * new_width * new_height))
+        old_width = self._width
+        for r in range(self._height):
+            src = r * old_width
+            dst = (row0 + r - new_row0) * new_width + (col0 - new_col0)
+            cells[dst:dst + old_width] = self._cells[src:src + old_width]
+
+        self._cells = cells
+        self._row0, self._col0 = new_row0, new_col0
+        self._width, self._height = new_width, new_height
+
+    def get(self, row: int, col: int) -> Optional[str]:
+        """Return the letter at (row, col), or None if the cell is empty."""
+        idx = self._index(row, col)
+        if idx < 0 or not self._cells[idx]:
+            return None
+        return chr(self._cells[idx])
+
+    def is_filled(self, row: int, col: int) -> bool:
+        """Check whether the cell at (row, col) holds a letter."""
+        idx = self._index(row, col)
+        return idx >= 0 and self._cells[idx] != 0
+
+    def items(self) -> Iterator[Tuple[Tuple[int, int], str]]:
+        """Iterate over ((row, col), letter) pairs of filled cells."""
+        width = self._width
+        for idx, code in enumerate(self._cells):
+            if code:
+                yield (self._row0 + idx // width, self._col0 + idx % width), chr(code)
+
+    def can_place(self, word: str, row: int, col: int, horizontal: bool) -> bool:
+        """Check if a word fits at the position, crossing at least one existing letter."""
+        n = len(word)
+        if horizontal:
+            self._reserve(row - 1, col - 1, row + 1, col + n)
+            step, side = 1, self._width
+        else:
+            self._reserve(row - 1, col - 1, row + n, col + 1)
+            step, side = self._width, 1
+
+        cells = self._cells
+        idx = (row - self._row0) * self._width + (col - self._col0)
+
+        # Check before the word starts and after it ends
+        if cells[idx - step] or cells[idx + n * step]:
+            return False
+
+        overlap = False
+        for letter in word:
+            code = cells[idx]
+            if code:
+                if code != ord(letter):
+                    return False
+                overlap = True
+            elif cells[idx - side] or cells[idx + side]:
+                # Empty cell with a perpendicular neighbour would form a stray word
+                return False
+            idx += step
+
+        return overlap
+
+    def place(self, word: str, row: int, col: int, horizontal: bool) -> int:
+        """Write a word into the grid and return the number of overlapping cells."""
+        n = len(word)
+        end_row = row if horizontal else row + n - 1
+        end_col = col + n - 1 if horizontal else col
+        self._reserve(row, col, end_row, end_col)
+
+        cells = self._cells
+        step = 1 if horizontal else self._width
+        idx = (row - self._row0) * self._width + (col - self._col0)
+        overlaps = 0
+        fresh = []
+        for i, letter in enumerate(word):
+            if cells[idx]:
+                overlaps += 1
+            else:
+                fresh.append(i)
+            cells[idx] = ord(letter)
+            idx += step
+        self._count += len(fresh)
+        self._history.append(
+            (row, col, horizontal, tuple(fresh), overlaps, self._bounds))
+
+        self._bounds = _extend_bounds(self._bounds, row, col, n, horizontal)
+        return overlaps
+
+    def undo(self) -> int:
+        """Remove the most recently placed word and return the overlaps it had made."""
+        row, col, horizontal, fresh, overlaps, bounds = self._history.pop()
+        step = 1 if horizontal else self._width
+        idx = (row - self._row0) * self._width + (col - self._col0)
+        for i in fresh:
+            self._cells[idx + i * step] = 0
+        self._count -= len(fresh)
+        self._bounds = bounds
+        return overlaps
+
+    def bounds(self) -> Tuple[int, int, int, int]:
+        """Get the minimum and maximum row and column of filled cells."""
+        return self._bounds or (0, 0, 0, 0)
+
+
+GRID_BACKENDS = {
+    'array': ArrayGrid,
+    'dict': DictGrid,
+}
+
+
+def make_grid(backend: str = 'array'):
+    """Create an empty grid using the named backend."""
+    try:
+        return GRID_BACKENDS[backend]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown grid backend '{backend}'. Choose from: {', '.join(GRID_BACKENDS)}") from None
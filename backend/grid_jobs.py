@@ -0,0 +1,298 @@
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from generator import CrosswordGenerator
+from layout_cache import LayoutCache
+from metrics import metrics
+
+JOB_STATES = ('queued', 'running', 'done', 'failed', 'timeout', 'cancelled')
+FINISHED_STATES = ('done', 'failed', 'timeout', 'cancelled')
+
+# Minimum seconds between progress messages from one job, apart from new best layouts
+PROGRESS_INTERVAL = 0.2
+
+
+class JobQueueFull(Exception):
+    """Raised when submitting a job while the queue is at its configured depth."""
+
+
+# Set in each worker process by _init_worker
+_progress_queue = None
+_layout_caches: Dict[str, LayoutCache] = {}
+
+
+def _init_worker(progress_queue) -> None:
+    global _progress_queue
+    _progress_queue = progress_queue
+    # A forked worker starts with a copy of the server's samples; drop them so they are not merged back twice
+    metrics.drain()
+
+
+def _worker_layout_cache(directory: Optional[str], max_entries: int,
+                         max_disk_entries: int) -> Optional[LayoutCache]:
+    """One layout cache per worker process; the disk tier is shared with the server."""
+    if not directory:
+        return None
+    if directory not in _layout_caches:
+        _layout_caches[directory] = LayoutCache(
+            max_entries=max_entries, directory=directory, max_disk_entries=max_disk_entries)
+    return _layout_caches[directory]
+
+
+def _run_grid_job(job_id: str, words: List[str], seed: Optional[int], max_attempts: int,
+                  time_limit: float, output_dir: Optional[str], cache_dir: Optional[str],
+                  cache_size: int, cache_disk_size: int) -> Optional[Dict]:
+    """Search for a grid and render it, reporting progress to the server process.
+
+    If output_dir is given, PNG renders are also written there in the background.
+
+    Returns the layout, both grids as SVG and the timings recorded in this
+    process, or just the timings if no grid fits all words.
+    """
+    _progress_queue.put((job_id, 'running', None, None))
+    last_report = [0.0, None]
+
+    def report(attempt, best_overlaps):
+        now = time.monotonic()
+        if best_overlaps != last_report[1] or now - last_report[0] >= PROGRESS_INTERVAL:
+            last_report[:] = [now, best_overlaps]
+            _progress_queue.put((job_id, 'progress', attempt, best_overlaps))
+
+    generator = CrosswordGenerator(words, seed=seed)
+    if not generator.generate_grid(max_attempts=max_attempts, time_limit=time_limit,
+                                   cache=_worker_layout_cache(cache_dir, cache_size, cache_disk_size),
+                                   progress=report):
+        return {'layout': None, 'metrics': metrics.drain()}
+
+    if output_dir is not None:
+        generator.draw_grids(output_dir=output_dir, background=True)
+    question_svg, answer_svg = generator.render_svgs()
+    return {
+        'layout': generator.export_layout(),
+        'questionSvg': question_svg,
+        'answerSvg': answer_svg,
+        # Timers run in this worker process; the server adds them to its own metrics
+        'metrics': metrics.drain(),
+    }
+
+
+class GridJobManager:
+    """Runs grid generation jobs in a bounded pool of worker processes.
+
+    At most max_queue jobs may be queued or running at once; further
+    submissions raise JobQueueFull. A job that has not finished timeout
+    seconds after submission is marked as timed out (its search is also
+    given a time limit, so the worker frees itself shortly after).
+    Finished jobs are kept for retention seconds so clients can fetch the result.
+    on_update, if given, receives a snapshot of a job whenever it changes,
+    e.g. to publish it to other server processes. It is called in order of
+    change, but never while the job lock is held.
+    """
+
+    def __init__(self, workers: int = 1, max_queue: int = 16, timeout: float = 60.0,
+                 retention: float = 600.0, cache_dir: Optional[str] = None,
+                 cache_size: int = 256, cache_disk_size: int = 10000,
+                 on_update: Optional[Callable[[Dict], None]] = None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.retention = retention
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        self.cache_disk_size = cache_disk_size
+        self.on_update = on_update
+        self._jobs: Dict[str, Dict] = {}
+        self._futures = {}
+        self._callbacks: Dict[str, Callable[[Dict], None]] = {}
+        self._cond = threading.Condition()
+        # Snapshots waiting for on_update; the publish lock keeps them in order across threads
+        self._unpublished: List[Dict] = []
+        self._publish_lock = threading.Lock()
+        self._progress = multiprocessing.Queue()
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(self._progress,))
+        threading.Thread(target=self._drain_progress, daemon=True).start()
+
+    def submit(self, words: List[str], seed: Optional[int], max_attempts: int,
+               time_limit: float, output_dir: Optional[str] = None, client_id: Optional[str] = None,
+               on_done: Optional[Callable[[Dict], None]] = None, job_id: Optional[str] = None) -> str:
+        """Queue a grid job and return its id, which is generated unless given.
+
+        on_done is called with the job's result before the job is marked done.
+        """
+        now = time.monotonic()
+        with self._cond:
+            self._expire(now)
+            active = sum(1 for job in self._jobs.values() if job['status'] not in FINISHED_STATES)
+            if active >= self.max_queue:
+                raise JobQueueFull(f"{active} grid jobs already queued or running")
+
+            job_id = job_id or uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'id': job_id,
+                'client_id': client_id,
+                'status': 'queued',
+                'attempt': 0,
+                'max_attempts': max_attempts,
+                'best_overlaps': None,
+                'result': None,
+                'error': None,
+                'submitted': now,
+                'finished': None,
+                'version': 0,
+            }
+            self._changed(self._jobs[job_id])
+            if on_done is not None:
+                self._callbacks[job_id] = on_done
+            # Leave a little room for rendering within the job's timeout
+            future = self._pool.submit(
+                _run_grid_job, job_id, words, seed, max_attempts,
+                min(time_limit, self.timeout * 0.8), output_dir, self.cache_dir, self.cache_size,
+                self.cache_disk_size)
+            self._futures[job_id] = future
+        self._publish()
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return a snapshot of a job's state, or None for an unknown job."""
+        with self._cond:
+            self._expire(time.monotonic())
+            job = self._jobs.get(job_id)
+            snapshot = dict(job) if job is not None else None
+        self._publish()
+        return snapshot
+
+    def wait(self, job_id: str, version: int, timeout: float) -> Optional[Dict]:
+        """Wait up to timeout seconds for the job to change past version, then return a snapshot."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                job = self._jobs.get(job_id)
+                if job is None or job['version'] > version or now >= deadline:
+                    snapshot = dict(job) if job is not None else None
+                    break
+                self._cond.wait(timeout=deadline - now)
+        self._publish()
+        return snapshot
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet; return whether it was cancelled.
+
+        A job already running in a worker cannot be stopped and finishes as usual.
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            future = self._futures.get(job_id)
+            if job is None or future is None or not future.cancel():
+                return False
+            del self._futures[job_id]
+            self._callbacks.pop(job_id, None)
+            job['status'] = 'cancelled'
+            job['error'] = "Replaced by a newer grid job."
+            job['finished'] = time.monotonic()
+            self._changed(job)
+        self._publish()
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of jobs in each state."""
+        with self._cond:
+            counts = {state: 0 for state in JOB_STATES}
+            for job in self._jobs.values():
+                counts[job['status']] += 1
+            return counts
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _drain_progress(self) -> None:
+        while True:
+            job_id, kind, attempt, best_overlaps = self._progress.get()
+            with self._cond:
+                job = self._jobs.get(job_id)
+                if job is None or job['status'] in FINISHED_STATES:
+                    continue
+                job['status'] = 'running'
+                if kind == 'progress':
+                    job['attempt'] = attempt
+                    job['best_overlaps'] = best_overlaps
+                self._changed(job)
+            self._publish()
+
+    def _finish(self, job_id: str, future) -> None:
+        if future.cancelled():
+            return
+        error = future.exception()
+        result = future.result() if error is None else None
+        if result is not None:
+            metrics.merge(result.pop('metrics'))
+            if result['layout'] is None:
+                result = None
+        callback = self._callbacks.pop(job_id, None)
+        if result is not None and callback is not None:
+            try:
+                callback(result)
+            except Exception as e:
+                error = e
+        with self._cond:
+            self._futures.pop(job_id, None)
+            job = self._jobs.get(job_id)
+            if job is None or job['status'] in FINISHED_STATES:
+                return
+            if error is not None:
+                job['status'] = 'failed'
+                job['error'] = str(error)
+            else:
+                job['status'] = 'done'
+                job['result'] = result
+                if result is not None:
+                    job['best_overlaps'] = result['layout']['overlap_count']
+            job['finished'] = time.monotonic()
+            metrics.inc('grid_jobs', status=job['status'])
+            self._changed(job)
+        self._publish()
+
+    def _changed(self, job: Dict) -> None:
+        """Record a change to a job and wake its waiters. Caller holds the lock.
+
+        The caller passes the snapshot to on_update by calling _publish() once it has released the lock.
+        """
+        job['version'] += 1
+        self._cond.notify_all()
+        if self.on_update is not None:
+            self._unpublished.append(dict(job))
+
+    def _publish(self) -> None:
+        """Pass the snapshots recorded by _changed() to on_update. Caller must not hold the lock."""
+        with self._publish_lock:
+            with self._cond:
+                snapshots, self._unpublished = self._unpublished, []
+            for snapshot in snapshots:
+                try:
+                    self.on_update(snapshot)
+                except Exception as e:
+                    print(f"Error publishing grid job {snapshot['id']}: {e}")
+
+    def _expire(self, now: float) -> None:
+        """Time out overdue jobs and forget finished ones past retention. Caller holds the lock."""
+        for job_id, job in list(self._jobs.items()):
+            if job['status'] in FINISHED_STATES:
+                if now - job['finished'] > self.retention:
+                    del self._jobs[job_id]
+            elif now - job['submitted'] > self.timeout:
+                future = self._futures.pop(job_id, None)
+                if future is not None:
+                    future.cancel()
+                self._callbacks.pop(job_id, None)
+                job['status'] = 'timeout'
+                job['error'] = f"Grid generation did not finish within {self.timeout:g} seconds."
+                job['finished'] = now
+                metrics.inc('grid_jobs', status='timeout')
+                self._changed(job)
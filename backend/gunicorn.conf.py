@@ -0,0 +1,21 @@
+# Gunicorn settings for serving web.py with several worker processes:
+#   gunicorn --pythonpath backend -c backend/gunicorn.conf.py web:app
+# Run from the project root, which web.py uses to find data/ and the frontend build.
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+bind = os.getenv("WEB_LISTEN_ADDRESS") or "127.0.0.1:80"
+workers = int(os.getenv("WEB_WORKERS") or 2)
+# Clue and grid progress are streamed over SSE, which holds a thread per open stream
+worker_class = "gthread"
+threads = int(os.getenv("WEB_THREADS") or 16)
+# Streams can stay open for as long as a grid job or clue generation takes
+timeout = int(os.getenv("WEB_TIMEOUT") or 300)
+
+if workers > 1 and (os.getenv("SESSION_STORE") or "memory") == "memory":
+    raise SystemExit(
+        "SESSION_STORE=memory keeps sessions in one process; "
+        "set SESSION_STORE=sqlite to run more than one worker.")
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+
+def normalize_words(words: Iterable[str]) -> list:
+    """Strip, de-duplicate and sort words so equivalent lists share a cache key."""
+    return sorted({word.strip() for word in words if word.strip()})
+
+
+def derive_seed(words: Iterable[str]) -> int:
+    """Derive a seed from the normalized word set, so the same list always gets the same search."""
+    encoded = json.dumps(normalize_words(words), ensure_ascii=False)
+    return int.from_bytes(hashlib.sha256(encoded.encode('utf-8')).digest()[:4], 'big')
+
+
+def make_layout_key(words: Iterable[str], seed: Optional[int], scorer, options: Dict) -> str:
+    """Build a cache key from the normalized word set, seed, scorer settings and search options."""
+    payload = {
+        'words': normalize_words(words),
+        'seed': seed,
+        'scoring': {'name': scorer.name, **vars(scorer)},
+        'options': options,
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class LayoutCache:
+    """LRU cache of winning layouts with an optional on-disk tier.
+
+    Layouts are the JSON-compatible dicts produced by CrosswordGenerator.export_layout().
+    When a directory is given, every stored layout is also written there as
+    <key>.json, so entries survive restarts and memory evictions. The
+    directory holds at most max_disk_entries files: reading an entry refreshes
+    its modification time, and the least recently used are deleted first.
+    """
+
+    # Share of max_disk_entries kept after pruning, so the directory is not scanned and sorted on every write
+    PRUNE_TO = 0.9
+
+    def __init__(self, max_entries: int = 256, directory: Optional[str] = None,
+                 max_disk_entries: int = 10000):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self._entries: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached layout for a key, or None on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                layout = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+
+        self._remember(key, layout)
+        return layout
+
+    def put(self, key: str, layout: Dict) -> None:
+        """Store a layout in memory and, if configured, on disk."""
+        self._remember(key, layout)
+        if not self.directory:
+            return
+        # Write to a temporary file first so readers never see a partial entry
+        tmp_path = f'{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(layout, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"Error writing layout cache entry {key}: {e}")
+            return
+        self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """Delete the least recently used files once the directory holds more than max_disk_entries."""
+        try:
+            with os.scandir(self.directory) as scan:
+                files = [entry for entry in scan if entry.name.endswith('.json')]
+        except OSError:
+            return
+        if len(files) <= self.max_disk_entries:
+            return
+
+        def last_used(entry) -> float:
+            try:
+                return entry.stat().st_mtime
+            except OSError:
+                return time.time()
+
+        files.sort(key=last_used)
+        for entry in files[:len(files) - int(self.max_disk_entries * self.PRUNE_TO)]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                # Already removed by another process sharing the directory
+                pass
+
+    def _remember(self, key: str, layout: Dict) -> None:
+        with self._lock:
+            self._entries[key] = layout
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
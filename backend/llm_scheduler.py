@@ -0,0 +1,167 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Optional
+
+from clue_provider import RateLimitedError
+from metrics import metrics
+
+
+class TokenBucket:
+    """Refills `per_minute` units evenly over each minute, holding at most a minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self._updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (amounts above capacity wait for a full bucket)."""
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+
+class LLMScheduler:
+    """Process-wide admission control for model requests.
+
+    Requests wait for both a requests-per-minute and a tokens-per-minute
+    bucket (a limit of 0 disables that bucket). Waiting requests are served
+    round-robin across clients, so one session with a long puzzle cannot
+    starve the others. When the API reports a rate limit, all requests are
+    held back until the suggested retry time.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._cond = threading.Condition()
+        # client id -> waiting tickets; order is the round-robin service order
+        self._queues: 'OrderedDict[str, Deque[object]]' = OrderedDict()
+        self._paused_until = 0.0
+
+    def acquire(self, client_id: str, tokens: int) -> None:
+        """Block until this client's request may be sent."""
+        ticket = object()
+        with self._cond:
+            self._queues.setdefault(client_id, deque()).append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._paused_until - now
+                    if self._next_ticket() is ticket:
+                        wait = max(wait, self._capacity_wait(now, tokens))
+                        if wait <= 0:
+                            self._take(client_id, tokens)
+                            return
+                    self._cond.wait(timeout=wait if wait > 0 else None)
+            finally:
+                # Leave the queue even if the wait was interrupted
+                queue = self._queues.get(client_id)
+                if queue is not None and ticket in queue:
+                    queue.remove(ticket)
+                    if not queue:
+                        del self._queues[client_id]
+                self._cond.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every request for `seconds`, e.g. after the API returned a rate limit."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def queue_position(self, client_id: str) -> Optional[int]:
+        """Number of clients whose next request will be sent before this client's, or None if idle."""
+        with self._cond:
+            if client_id not in self._queues:
+                return None
+            return list(self._queues).index(client_id)
+
+    def queued(self) -> int:
+        """Total number of requests waiting."""
+        with self._cond:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def _next_ticket(self) -> Optional[object]:
+        for queue in self._queues.values():
+            return queue[0]
+        return None
+
+    def _capacity_wait(self, now: float, tokens: int) -> float:
+        wait = 0.0
+        for bucket, amount in ((self._requests, 1), (self._tokens, tokens)):
+            if bucket is not None:
+                bucket.refill(now)
+                wait = max(wait, bucket.wait_time(amount))
+        return wait
+
+    def _take(self, client_id: str, tokens: int) -> None:
+        if self._requests is not None:
+            self._requests.take(1)
+        if self._tokens is not None:
+            self._tokens.take(tokens)
+        queue = self._queues[client_id]
+        queue.popleft()
+        # Rotate the served client to the back of the round-robin order
+        del self._queues[client_id]
+        if queue:
+            self._queues[client_id] = queue
+
+
+class ScheduledClueProvider:
+    """Wraps a clue provider so that one client's requests go through the shared scheduler.
+
+    Calls the provider reports as rate limited pause the scheduler and are
+    queued again, up to max_requeues times. The tokens the
+    API reports for this client's requests are totalled in usage, when the
+    provider reports them.
+    """
+
+    # Rough allowance for the reply, on top of the prompt's estimated tokens
+    COMPLETION_TOKENS = 60
+
+    def __init__(self, provider, scheduler: LLMScheduler, client_id: str, max_requeues: int = 5,
+                 default_pause: float = 10.0):
+        self.provider = provider
+        self.scheduler = scheduler
+        self.client_id = client_id
+        self.max_requeues = max_requeues
+        self.default_pause = default_pause
+        self.usage = {'requests': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+        self._usage_lock = threading.Lock()
+
+    @property
+    def model_id(self) -> str:
+        return self.provider.model_id
+
+    def complete(self, system_prompt: str, user_prompt: str) -> str:
+        """Wait for a scheduling slot, then forward the request to the wrapped provider."""
+        # About four characters per token; batch prompts also get longer replies
+        tokens = (len(system_prompt) + 3 * len(user_prompt)) // 4 + self.COMPLETION_TOKENS
+        requeues = 0
+        while True:
+            with metrics.timer('llm_queue_wait'):
+                self.scheduler.acquire(self.client_id, tokens)
+            try:
+                complete_with_usage = getattr(self.provider, 'complete_with_usage', None)
+                if complete_with_usage is None:
+                    return self.provider.complete(system_prompt, user_prompt)
+                content, usage = complete_with_usage(system_prompt, user_prompt)
+                with self._usage_lock:
+                    self.usage['requests'] += 1
+                    self.usage['prompt_tokens'] += usage['prompt_tokens']
+                    self.usage['completion_tokens'] += usage['completion_tokens']
+                return content
+            except RateLimitedError as e:
+                if requeues >= self.max_requeues:
+                    raise
+                requeues += 1
+                self.scheduler.pause(e.retry_after or self.default_pause)
+                print(f"Rate limited, re-queueing request for {self.client_id} ({requeues}/{self.max_requeues})")
@@ -0,0 +1,376 @@
+import argparse
+import json
+import math
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import requests
+
+from benchmark import VOCABULARY
+from clue_provider import StubClueProvider
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+ENDPOINTS = ('generate_grid', 'stream_grid', 'stream_clues', 'export_pdf')
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    """OpenAI-compatible chat completions endpoint with injected latency and rate limits.
+
+    Replies come from StubClueProvider. Each request sleeps latency seconds
+    (plus up to jitter more); a rate_limit_share of requests, and any beyond
+    requests_per_minute, are answered 429 with a Retry-After header. Any
+    other GET is treated as the auth API and accepts every auth_token cookie.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.5, jitter: float = 0.2,
+                 rate_limit_share: float = 0.0, requests_per_minute: int = 0,
+                 retry_after: float = 1.0):
+        super().__init__(address, _StubHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_share = rate_limit_share
+        self.requests_per_minute = requests_per_minute
+        self.retry_after = retry_after
+        self.provider = StubClueProvider(model_id='loadtest')
+        self.completions = 0
+        self.rate_limited = 0
+        self.auth_checks = 0
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def admit(self) -> bool:
+        """Decide whether a completion request is served or rate limited."""
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0] >= 60:
+                self._recent.popleft()
+            limited = (random.random() < self.rate_limit_share or
+                       0 < self.requests_per_minute <= len(self._recent))
+            if limited:
+                self.rate_limited += 1
+            else:
+                self._recent.append(now)
+                self.completions += 1
+            return not limited
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+        if not self.path.endswith('/chat/completions'):
+            return self._reply(404, {'error': {'message': 'Not found'}})
+        server = self.server
+        if not server.admit():
+            return self._reply(429, {'error': {'message': 'Rate limit reached', 'type': 'requests'}},
+                               {'Retry-After': f'{server.retry_after:g}'})
+
+        time.sleep(server.latency + random.uniform(0, server.jitter))
+        messages = {message['role']: message['content'] for message in body.get('messages', [])}
+        prompt = messages.get('system', '') + messages.get('user', '')
+        content = server.provider.complete(messages.get('system', ''), messages.get('user', ''))
+        # Roughly four characters per token, as for English text
+        prompt_tokens, completion_tokens = len(prompt) // 4 + 1, len(content) // 4 + 1
+        self._reply(200, {
+            'id': f'chatcmpl-{random.getrandbits(64):x}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'loadtest'),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens},
+        })
+
+    def do_GET(self):
+        self.server.auth_checks += 1
+        if 'auth_token=' not in (self.headers.get('Cookie') or ''):
+            return self._reply(401, {'error': 'Not logged in'})
+        self._reply(200, {'name': 'loadtest'})
+
+    def _reply(self, status: int, data: Dict, headers: Optional[Dict] = None) -> None:
+        payload = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_web_server(port: int, stub_url: str, data_dir: str, web_workers: int,
+                     env: Dict[str, str]) -> subprocess.Popen:
+    """Start web.py (or gunicorn with web_workers > 1) against the stubs and wait until it listens."""
+    env = dict(os.environ, **env)
+    env.update({
+        'WEB_LISTEN_ADDRESS': f'127.0.0.1:{port}',
+        'OPENAI_ADDRESS': f'{stub_url}/v1',
+        'OPENAI_SECRET': 'loadtest',
+        'MODEL_ID': 'loadtest',
+        'CLUE_PROVIDER': 'openai',
+        'AUTH_API_URL': f'{stub_url}/webapi/user',
+    })
+    if web_workers > 1:
+        env.setdefault('SESSION_STORE', 'sqlite')
+        env['WEB_WORKERS'] = str(web_workers)
+        command = ['gunicorn', '--pythonpath', BACKEND_DIR, '-c',
+                   os.path.join(BACKEND_DIR, 'gunicorn.conf.py'), 'web:app']
+    else:
+        command = [sys.executable, os.path.join(BACKEND_DIR, 'web.py')]
+    # web.py keeps its data/ directory under the working directory
+    log = open(os.path.join(data_dir, 'server.log'), 'w')
+    # In its own process group, so stopping it also stops its grid worker processes
+    process = subprocess.Popen(command, cwd=data_dir, env=env, stdout=log, stderr=subprocess.STDOUT,
+                               start_new_session=True)
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Web server exited; see {log.name}")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    stop_web_server(process)
+    raise RuntimeError("Web server did not start within 60 seconds")
+
+
+def stop_web_server(process: subprocess.Popen) -> None:
+    """Stop the server and every process it started."""
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    process.wait(timeout=30)
+
+
+def read_events(response):
+    """Yield the JSON events of a server-sent event stream."""
+    for line in response.iter_lines(decode_unicode=True):
+        if line and line.startswith('data: '):
+            yield json.loads(line[len('data: '):])
+
+
+def run_client(base_url: str, client_index: int, puzzles: int, words_per_puzzle: int,
+               seed: int, results: Dict, lock: threading.Lock) -> None:
+    """One simulated user: generate a grid, stream its clues and export PDFs, puzzles times."""
+    rng = random.Random(f'{seed}:{client_index}')
+    session = requests.Session()
+    session.cookies.set('auth_token', f'loadtest-{client_index}')
+
+    def record(key: str, value: float) -> None:
+        with lock:
+            results[key].append(value)
+
+    def fail(endpoint: str, message: str) -> None:
+        with lock:
+            results['errors'][endpoint] = results['errors'].get(endpoint, 0) + 1
+            results['messages'].append(f"{endpoint}: {message}")
+
+    for puzzle in range(puzzles):
+        client_id = f'loadtest-{client_index}-{puzzle}'
+        words = rng.sample(VOCABULARY, words_per_puzzle)
+        started = time.monotonic()
+        try:
+            start = time.monotonic()
+            response = session.post(f'{base_url}/api/generate_grid', json={
+                'words': '\n'.join(words), 'clientId': client_id})
+            data = response.json()
+            if not data.get('success'):
+                fail('generate_grid', data.get('message', response.status_code))
+                continue
+            record('generate_grid', time.monotonic() - start)
+
+            start = time.monotonic()
+            with session.get(f'{base_url}/api/stream_grid', params={'jobId': data['jobId']},
+                             stream=True) as response:
+                final = next((event for event in read_events(response)
+                              if event.get('complete') or event.get('error')), {})
+            if not final.get('success'):
+                fail('stream_grid', final.get('message') or final.get('error') or 'no result')
+                continue
+            record('stream_grid', time.monotonic() - start)
+
+            start = time.monotonic()
+            first_clue = None
+            final = {}
+            with session.get(f'{base_url}/api/stream_clues', params={'clientId': client_id},
+                             stream=True) as response:
+                for event in read_events(response):
+                    if 'clue' in event and first_clue is None:
+                        first_clue = time.monotonic() - start
+                    if event.get('complete') or event.get('error'):
+                        final = event
+                        break
+            if not final.get('complete'):
+                fail('stream_clues', final.get('error') or 'stream ended early')
+                continue
+            record('stream_clues', time.monotonic() - start)
+            if first_clue is not None:
+                record('time_to_first_clue', first_clue)
+
+            start = time.monotonic()
+            data = session.post(f'{base_url}/api/export_pdf', json={'clientId': client_id}).json()
+            if not data.get('success'):
+                fail('export_pdf', data.get('message', 'failed'))
+                continue
+            record('export_pdf', time.monotonic() - start)
+            record('puzzle', time.monotonic() - started)
+        except (requests.RequestException, ValueError) as e:
+            fail('request', str(e))
+        finally:
+            try:
+                session.post(f'{base_url}/api/cleanup', json={'clientId': client_id})
+            except requests.RequestException:
+                pass
+
+
+def percentiles(values: List[float]) -> Dict:
+    """Count, mean and nearest-rank p50/p95/p99 of latencies, in milliseconds."""
+    if not values:
+        return {'count': 0}
+    ordered = sorted(values)
+
+    def rank(p):
+        return round(ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] * 1000, 1)
+
+    return {
+        'count': len(ordered),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 1),
+        'p50_ms': rank(50),
+        'p95_ms': rank(95),
+        'p99_ms': rank(99),
+        'max_ms': round(ordered[-1] * 1000, 1),
+    }
+
+
+def run_load_test(base_url: str, clients: int, puzzles: int, words_per_puzzle: int,
+                  seed: int = 0) -> Dict:
+    """Drive clients concurrent simulated users against base_url and return the report."""
+    results = {key: [] for key in ENDPOINTS + ('time_to_first_clue', 'puzzle')}
+    results.update(errors={}, messages=[])
+    lock = threading.Lock()
+    threads = [threading.Thread(target=run_client, args=(
+        base_url, index, puzzles, words_per_puzzle, seed, results, lock)) for index in range(clients)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.monotonic() - start
+
+    return {
+        'clients': clients,
+        'puzzles_per_client': puzzles,
+        'words_per_puzzle': words_per_puzzle,
+        'seconds': round(seconds, 3),
+        'puzzles_completed': len(results['puzzle']),
+        'puzzles_per_minute': round(len(results['puzzle']) / seconds * 60, 2),
+        'requests_per_sec': round(sum(len(results[key]) for key in ENDPOINTS) / seconds, 2),
+        'endpoints': {key: percentiles(results[key]) for key in ENDPOINTS},
+        'time_to_first_clue': percentiles(results['time_to_first_clue']),
+        'puzzle': percentiles(results['puzzle']),
+        'errors': results['errors'],
+        'error_samples': results['messages'][:10],
+    }
+
+
+def main():
+    """Load-test the web API end to end against local model and auth stubs."""
+    parser = argparse.ArgumentParser(
+        description="Load-test grid, clue and PDF endpoints with a stubbed model API and auth service.")
+    parser.add_argument("--clients", type=int, default=8,
+                        help="Number of simulated users running at once")
+    parser.add_argument("--puzzles", type=int, default=3,
+                        help="Number of puzzles each user makes, one after another")
+    parser.add_argument("--words", type=int, default=10,
+                        help="Number of words in each puzzle")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed for the users' word lists")
+    parser.add_argument("--llm-latency", type=float, default=0.5,
+                        help="Seconds the stub model takes per request")
+    parser.add_argument("--llm-jitter", type=float, default=0.2,
+                        help="Up to this many extra seconds of random latency per request")
+    parser.add_argument("--llm-rate-limit-share", type=float, default=0.0,
+                        help="Share of model requests answered 429, e.g. 0.05")
+    parser.add_argument("--llm-rpm", type=int, default=0,
+                        help="Answer 429 beyond this many model requests per minute (0: no limit)")
+    parser.add_argument("--retry-after", type=float, default=1.0,
+                        help="Retry-After seconds sent with 429 responses")
+    parser.add_argument("--web-workers", type=int, default=1,
+                        help="Serve with gunicorn and this many worker processes when above 1")
+    parser.add_argument("--warm-clue-cache", action="store_true",
+                        help="Let the server reuse cached clues instead of asking the model every time")
+    parser.add_argument("--url", default=None,
+                        help="Test an already running server at this URL instead of starting one")
+    parser.add_argument("--output", default=None,
+                        help="File to write the JSON report to (default: stdout)")
+    args = parser.parse_args()
+
+    stub = StubLLMServer(('127.0.0.1', free_port()), latency=args.llm_latency,
+                         jitter=args.llm_jitter, rate_limit_share=args.llm_rate_limit_share,
+                         requests_per_minute=args.llm_rpm, retry_after=args.retry_after)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    stub_url = f'http://127.0.0.1:{stub.server_address[1]}'
+
+    process = None
+    base_url = args.url
+    with tempfile.TemporaryDirectory(prefix='crossword-loadtest-') as data_dir:
+        try:
+            if base_url is None:
+                port = free_port()
+                env = {} if args.warm_clue_cache else {'CLUE_CACHE_TTL_DAYS': '0'}
+                process = start_web_server(port, stub_url, data_dir, args.web_workers, env)
+                base_url = f'http://127.0.0.1:{port}'
+            print(f"Running {args.clients} clients x {args.puzzles} puzzles against {base_url}",
+                  file=sys.stderr)
+            report = run_load_test(base_url, args.clients, args.puzzles, args.words, args.seed)
+        finally:
+            if process is not None:
+                stop_web_server(process)
+            stub.shutdown()
+
+    report['llm_stub'] = {
+        'url': stub_url,
+        'latency': args.llm_latency,
+        'jitter': args.llm_jitter,
+        'completions': stub.completions,
+        'rate_limited': stub.rate_limited,
+        'auth_checks': stub.auth_checks,
+    }
+    report['web_workers'] = args.web_workers
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f"Results written to {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+PREFIX = 'crossword_'
+# Upper bounds (seconds) of the timing histogram buckets, from a fast auth cache hit to a slow model reply
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Timers are exported as <name>_seconds histograms and counters as <name>_total
+HELP = {
+    'grid_search': 'Time spent searching for a grid layout',
+    'grid_attempts': 'Grid layout attempts made',
+    'grid_jobs': 'Grid jobs finished, by status',
+    'grid_render': 'Time spent rendering grids, by format',
+    'llm_request': 'Model API request latency, by outcome',
+    'llm_requests': 'Model API requests, by outcome',
+    'llm_tokens': 'Model API tokens reported by the API, by kind',
+    'llm_queue_wait': 'Time clue requests waited for the shared scheduler',
+    'pdf_export': 'Time spent creating PDFs',
+    'auth_check': 'Time spent verifying auth tokens, by result',
+    'auth_checks': 'Auth token verifications, by result',
+    'http_request': 'HTTP request duration including streamed bodies, by endpoint',
+    'http_requests': 'HTTP requests, by endpoint and status',
+}
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict) -> LabelKey:
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+class Metrics:
+    """Thread-safe counters and timing histograms, rendered in the Prometheus text format.
+
+    Samples can be moved between processes with drain() and merge(), e.g.
+    from a grid worker process to the server that reports them.
+    """
+
+    def __init__(self):
+        self._counters: Dict[LabelKey, float] = {}
+        # key -> [count per bucket (plus +Inf), sum of observations]
+        self._timers: Dict[LabelKey, List] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Add value to a counter."""
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        """Record one duration in a timer's histogram, and in the current trace if any."""
+        key = _key(name, labels)
+        with self._lock:
+            entry = self._timers.setdefault(key, [[0] * (len(BUCKETS) + 1), 0.0])
+            for index, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    entry[0][index] += 1
+                    break
+            else:
+                entry[0][-1] += 1
+            entry[1] += seconds
+        add_span(name, seconds, **labels)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Time the enclosed block into the named timer."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def drain(self) -> Dict:
+        """Return all samples recorded so far and start again from zero."""
+        with self._lock:
+            data = {'counters': self._counters, 'timers': self._timers}
+            self._counters, self._timers = {}, {}
+            return data
+
+    def merge(self, data: Dict) -> None:
+        """Add samples returned by another registry's drain()."""
+        with self._lock:
+            for key, value in data['counters'].items():
+                self._counters[key] = self._counters.get(key, 0) + value
+            for key, (counts, total) in data['timers'].items():
+                entry = self._timers.setdefault(key, [[0] * (len(BUCKETS) + 1), 0.0])
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            timers = sorted((key, (list(counts), total)) for key, (counts, total) in self._timers.items())
+
+        lines = []
+        described = set()
+
+        def describe(name: str, metric: str, kind: str) -> None:
+            if metric not in described:
+                described.add(metric)
+                if name in HELP:
+                    lines.append(f'# HELP {metric} {HELP[name]}')
+                lines.append(f'# TYPE {metric} {kind}')
+
+        for (name, labels), value in counters:
+            metric = f'{PREFIX}{name}_total'
+            describe(name, metric, 'counter')
+            lines.append(f'{metric}{_format_labels(labels)} {value:g}')
+        for (name, labels), (counts, total) in timers:
+            metric = f'{PREFIX}{name}_seconds'
+            describe(name, metric, 'histogram')
+            cumulative = 0
+            for bound, count in zip(BUCKETS + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                lines.append(f'{metric}_bucket{_format_labels(labels + (("le", le),))} {cumulative}')
+            lines.append(f'{metric}_sum{_format_labels(labels)} {total:.6f}')
+            lines.append(f'{metric}_count{_format_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in labels)
+    return '{' + ','.join(f'{label}="{value}"' for (label, _), value in zip(labels, escaped)) + '}'
+
+
+# Process-wide registry
+metrics = Metrics()
+
+# The trace being collected on this thread, if any
+_local = threading.local()
+
+
+def start_trace(**fields) -> None:
+    """Start collecting the timers observed on this thread, e.g. for one HTTP request."""
+    _local.trace = {'fields': dict(fields), 'spans': [], 'start': time.perf_counter()}
+
+
+def add_span(name: str, seconds: float, **labels) -> None:
+    """Add a timing to this thread's trace; does nothing when no trace is being collected."""
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        span = {'name': name, 'ms': round(seconds * 1000, 3)}
+        span.update(labels)
+        trace['spans'].append(span)
+
+
+def annotate_trace(**fields) -> None:
+    """Attach fields to this thread's trace, if one is being collected."""
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace['fields'].update(fields)
+
+
+def end_trace() -> Optional[Dict]:
+    """Stop collecting and return this thread's trace, or None if there was none."""
+    trace = getattr(_local, 'trace', None)
+    _local.trace = None
+    if trace is None:
+        return None
+    return dict(trace['fields'], ms=round((time.perf_counter() - trace['start']) * 1000, 3),
+                spans=trace['spans'])
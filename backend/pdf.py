@@ -1,53 +1,203 @@
-from typing import List, Tuple
+import time
+from typing import Dict, List, Optional, Tuple, Union
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import mm
 from reportlab.lib import colors
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from PIL import Image
-
-def create_crossword_pdf(image_path: str, clues_path: str, output_pdf_path: str) -> None:
-    # Load clues
-    with open(clues_path, 'r', encoding='utf-8') as f:
-        clues_text = f.read()
-
-    across_clues, down_clues = parse_clues(clues_text)
-
-    # Create PDF
+from metrics import metrics
+
+# Grid proportions relative to the cell size, matching the raster renderer (40px cells)
+GRID_PADDING = 0.5
+GRID_LETTER_SIZE = 0.5
+GRID_NUMBER_SIZE = 0.25
+
+# Clue text settings, and the gaps (in points) after a column title and after each clue
+CLUE_FONT = "Helvetica"
+CLUE_FONT_SIZE = 11
+TITLE_FONT = "Helvetica-Bold"
+TITLE_FONT_SIZE = 12
+TITLE_GAP = 5
+CLUE_GAP = 3
+PAGE_MARGIN = 10*mm
+# Most of the first page the clues may take before the rest flows onto continuation pages
+MAX_CLUES_SHARE = 0.4
+
+def create_crossword_pdfs(clues_text: str, question_pdf_path: str, answer_pdf_path: str,
+                          combined_pdf_path: Optional[str] = None, grid: Optional[Dict] = None,
+                          question_image: Union[str, Image.Image, None] = None,
+                          answer_image: Union[str, Image.Image, None] = None) -> None:
+    """Write the question and answer PDFs, and optionally both in one file, in one pass.
+
+    The grid is either a CrosswordGenerator.grid_drawing(), or a pair of
+    question and answer images of the same size. Clues are wrapped and laid
+    out once and the same pages are drawn into every document.
+    """
+    start = time.perf_counter()
+    if grid is not None:
+        question = answer = grid
+    else:
+        question, answer = ImageReader(question_image), ImageReader(answer_image)
+    plan = plan_pages(grid_size(question), *parse_clues(clues_text))
+
+    documents = [(question_pdf_path, [(question, False)]), (answer_pdf_path, [(answer, True)])]
+    if combined_pdf_path:
+        documents.append((combined_pdf_path, [(question, False), (answer, True)]))
+    for path, parts in documents:
+        c = canvas.Canvas(path, pagesize=A4)
+        for source, is_answer in parts:
+            draw_document(c, plan, source, is_answer)
+        c.save()
+        print(f"PDF created successfully at {path}")
+    metrics.observe('pdf_export', time.perf_counter() - start)
+
+def grid_size(source: Union[Dict, ImageReader]) -> Tuple[float, float]:
+    """Return the width and height of a grid drawing (in cells) or an image (in pixels)."""
+    if isinstance(source, dict):
+        # Half a cell of padding on each side, as in the raster image
+        return source['columns'] + 2 * GRID_PADDING, source['rows'] + 2 * GRID_PADDING
+    return source.getSize()
+
+def plan_pages(size: Tuple[float, float], across_clues: List[str], down_clues: List[str]) -> Dict:
+    """Work out the grid's scale and which wrapped clue lines go where on each page.
+
+    The grid gets the first page less the space the clues need, but never
+    less than (1 - MAX_CLUES_SHARE) of it; clues that do not fit below the
+    grid continue at the top of further pages, keeping each clue on one page.
+    """
     width, height = A4
-    c = canvas.Canvas(output_pdf_path, pagesize=A4)
-
-    # Estimate space needed for clues
-    clues_height = estimate_clues_height(c, across_clues, down_clues, (width - 30*mm) / 2)
-
-    # Calculate image height based on available space
-    img = Image.open(image_path)
-    img_width, img_height = img.size
+    column_width = (width - 3 * PAGE_MARGIN) / 2
+    across = [wrap_clue(clue, column_width) for clue in across_clues]
+    down = [wrap_clue(clue, column_width) for clue in down_clues]
+
+    clues_height = max(column_height(across), column_height(down))
+    img_width, img_height = size
+    scale = min(width / img_width,
+                (height - min(clues_height, height * MAX_CLUES_SHARE) - 20*mm) / img_height)
+    separator_y = height - img_height * scale - 5*mm
+    clues_y = separator_y - 10*mm
 
-    # Adjust image size to fit everything on one page
-    scale_factor = min(width / img_width, (height - clues_height - 20*mm) / img_height)
-    new_img_width = img_width * scale_factor
-    new_img_height = img_height * scale_factor
+    first_space = clues_y - PAGE_MARGIN
+    page_space = height - 2 * PAGE_MARGIN - TITLE_FONT_SIZE
+    across_pages = paginate_column("Across", across, first_space, page_space)
+    down_pages = paginate_column("Down", down, first_space, page_space)
+    return {
+        'scale': scale,
+        'separator_y': separator_y,
+        'clues_y': clues_y,
+        'column_width': column_width,
+        'columns': (across_pages, down_pages),
+        'pages': max(len(across_pages), len(down_pages)),
+    }
+
+def wrap_clue(clue: str, width: float) -> List[str]:
+    """Break a clue into lines no wider than width."""
+    lines = []
+    current_line = ""
+    for word in clue.split():
+        test_line = current_line + " " + word if current_line else word
+        if not current_line or stringWidth(test_line, CLUE_FONT, CLUE_FONT_SIZE) < width:
+            current_line = test_line
+        else:
+            lines.append(current_line)
+            current_line = word
+    if current_line:
+        lines.append(current_line)
+    return lines
+
+def column_height(wrapped: List[List[str]]) -> float:
+    """Height of a column of wrapped clues under its title."""
+    return (TITLE_FONT_SIZE * 1.2 + TITLE_GAP
+            + sum(len(lines) * CLUE_FONT_SIZE * 1.2 + CLUE_GAP for lines in wrapped))
+
+def paginate_column(title: str, wrapped: List[List[str]], first_space: float,
+                    page_space: float) -> List[List[Tuple[float, str, int, str]]]:
+    """Split a column of wrapped clues into pages.
+
+    Each page is a list of (offset below the column's first baseline, font,
+    font size, text) lines; continuation pages repeat the title.
+    """
+    pages = []
+    page = [(0.0, TITLE_FONT, TITLE_FONT_SIZE, title)]
+    offset = TITLE_FONT_SIZE * 1.2 + TITLE_GAP
+    space = first_space
+    for lines in wrapped:
+        # Leave the column at least one clue per page, even one too long for it
+        if offset + len(lines) * CLUE_FONT_SIZE * 1.2 > space and len(page) > 1:
+            pages.append(page)
+            page = [(0.0, TITLE_FONT, TITLE_FONT_SIZE, f"{title} (continued)")]
+            offset = TITLE_FONT_SIZE * 1.2 + TITLE_GAP
+            space = page_space
+        for line in lines:
+            page.append((offset, CLUE_FONT, CLUE_FONT_SIZE, line))
+            offset += CLUE_FONT_SIZE * 1.2
+        offset += CLUE_GAP
+    pages.append(page)
+    return pages
+
+def draw_document(c: canvas.Canvas, plan: Dict, source: Union[Dict, ImageReader],
+                  answer: bool) -> None:
+    """Draw a grid and the planned clue pages, ending each page."""
+    width, height = A4
+    scale = plan['scale']
+    img_width, img_height = grid_size(source)
+    new_img_width = img_width * scale
 
     # Draw the crossword grid
-    c.drawImage(image_path, (width - new_img_width) / 2, height - new_img_height,
-                width=new_img_width, height=new_img_height)
+    if isinstance(source, dict):
+        draw_grid_vector(c, source, answer, (width - new_img_width) / 2 + GRID_PADDING * scale,
+                         height - GRID_PADDING * scale, scale)
+    else:
+        c.drawImage(source, (width - new_img_width) / 2, height - img_height * scale,
+                    width=new_img_width, height=img_height * scale)
 
     # Draw horizontal separator
-    separator_y = height - new_img_height - 5*mm
     c.setStrokeColor(colors.black)
     c.setLineWidth(0.5)
-    c.line(10*mm, separator_y, width - 10*mm, separator_y)
-
-    # Create side-by-side clues layout
-    clues_y = separator_y - 10*mm
-    column_width = (width - 30*mm) / 2
-
-    # Draw clues
-    draw_clues_section(c, "Across", across_clues, 10*mm, clues_y, column_width)
-    draw_clues_section(c, "Down", down_clues, 20*mm + column_width, clues_y, column_width)
-
-    c.save()
-    print(f"PDF created successfully at {output_pdf_path}")
+    c.line(PAGE_MARGIN, plan['separator_y'], width - PAGE_MARGIN, plan['separator_y'])
+
+    # Across and Down side by side, each continuing onto later pages as needed
+    for number in range(plan['pages']):
+        if number > 0:
+            c.showPage()
+        top = plan['clues_y'] if number == 0 else height - PAGE_MARGIN - TITLE_FONT_SIZE
+        for index, pages in enumerate(plan['columns']):
+            x = PAGE_MARGIN + index * (plan['column_width'] + PAGE_MARGIN)
+            for offset, font, size, text in pages[number] if number < len(pages) else []:
+                c.setFont(font, size)
+                c.drawString(x, top - offset, text)
+    c.showPage()
+
+def draw_grid_vector(c: canvas.Canvas, grid: Dict, answer: bool,
+                     left: float, top: float, cell_size: float) -> None:
+    """Draw grid cells, clue numbers and (for answers) letters with canvas primitives.
+
+    left and top give the grid's top-left corner in page coordinates.
+    """
+    c.setStrokeColor(colors.black)
+    c.setFillColor(colors.black)
+    c.setLineWidth(max(0.5, cell_size / 40))
+    path = c.beginPath()
+    for column, row, _, _ in grid['cells']:
+        path.rect(left + column * cell_size, top - (row + 1) * cell_size, cell_size, cell_size)
+    c.drawPath(path, stroke=1, fill=0)
+
+    number_size = cell_size * GRID_NUMBER_SIZE
+    c.setFont("Helvetica", number_size)
+    for column, row, _, number in grid['cells']:
+        if number is not None:
+            c.drawString(left + column * cell_size + cell_size * 0.05,
+                         top - row * cell_size - cell_size * 0.05 - number_size * 0.8, str(number))
+
+    if answer:
+        letter_size = cell_size * GRID_LETTER_SIZE
+        c.setFont("Helvetica", letter_size)
+        for column, row, letter, _ in grid['cells']:
+            # Helvetica capitals are about 0.7 em tall; centre them vertically in the cell
+            c.drawCentredString(left + (column + 0.5) * cell_size,
+                                top - (row + 0.5) * cell_size - letter_size * 0.35, letter.upper())
 
 def parse_clues(clues_text: str) -> Tuple[List[str], List[str]]:
     sections = clues_text.split("\n\n")
@@ -68,72 +218,3 @@ def parse_clues(clues_text: str) -> Tuple[List[str], List[str]]:
             down_clues = lines[1:] if len(lines) > 1 else []
 
     return across_clues, down_clues
-
-def estimate_clues_height(c: canvas.Canvas, across_clues: List[str],
-                          down_clues: List[str], column_width: float) -> float:
-    font_size = 11
-    line_height = font_size * 1.2
-    title_height = 20  # Space for title and padding
-
-    # Estimate height for across clues
-    across_height = title_height
-    for clue in across_clues:
-        words = clue.split()
-        current_line = ""
-        line_count = 1
-
-        for word in words:
-            test_line = current_line + " " + word if current_line else word
-            if c.stringWidth(test_line, "Helvetica", font_size) < column_width:
-                current_line = test_line
-            else:
-                line_count += 1
-                current_line = word
-
-        across_height += line_count * line_height + 3  # 3 points padding between clues
-
-    # Estimate height for down clues
-    down_height = title_height
-    for clue in down_clues:
-        words = clue.split()
-        current_line = ""
-        line_count = 1
-
-        for word in words:
-            test_line = current_line + " " + word if current_line else word
-            if c.stringWidth(test_line, "Helvetica", font_size) < column_width:
-                current_line = test_line
-            else:
-                line_count += 1
-                current_line = word
-
-        down_height += line_count * line_height + 3  # 3 points padding between clues
-
-    return max(across_height, down_height)
-
-def draw_clues_section(c: canvas.Canvas, title: str, clues: List[str],
-                       x: float, y: float, width: float) -> None:
-    text_object = c.beginText(x, y)
-    text_object.setFont("Helvetica-Bold", 12)
-    text_object.textLine(title)
-    text_object.setFont("Helvetica", 11)
-    text_object.moveCursor(0, 5)
-
-    for line in clues:
-        words = line.split()
-        current_line = ""
-
-        for word in words:
-            test_line = current_line + " " + word if current_line else word
-            if c.stringWidth(test_line, "Helvetica", 11) < width:
-                current_line = test_line
-            else:
-                text_object.textLine(current_line)
-                current_line = word
-
-        if current_line:
-            text_object.textLine(current_line)
-
-        text_object.moveCursor(0, 3)
-
-    c.drawText(text_object)
@@ -0,0 +1,63 @@
+from typing import Tuple
+
+
+def _dimensions(bounds: Tuple[int, int, int, int]) -> Tuple[int, int]:
+    """Return (rows, cols) spanned by (min_row, max_row, min_col, max_col) bounds."""
+    min_row, max_row, min_col, max_col = bounds
+    return max_row - min_row + 1, max_col - min_col + 1
+
+
+class OverlapScorer:
+    """Scores a layout by its number of crossings only."""
+
+    name = 'overlaps'
+
+    def score(self, overlaps: int, filled: int, bounds: Tuple[int, int, int, int]) -> float:
+        """Score a layout from its overlap count, filled cell count and bounds."""
+        return float(overlaps)
+
+    def upper_bound(self, overlaps: int, filled: int, bounds: Tuple[int, int, int, int],
+                    remaining_overlaps: int) -> float:
+        """Best score a partial layout could still reach with at most remaining_overlaps more."""
+        return float(overlaps + remaining_overlaps)
+
+
+class CompactScorer:
+    """Scores crossings plus fill density, penalising elongated bounding boxes.
+
+    score = overlaps + density_weight * filled / area - aspect_weight * (long side / short side - 1)
+    """
+
+    name = 'compact'
+
+    def __init__(self, density_weight: float = 5.0, aspect_weight: float = 0.5):
+        self.density_weight = density_weight
+        self.aspect_weight = aspect_weight
+
+    def score(self, overlaps: int, filled: int, bounds: Tuple[int, int, int, int]) -> float:
+        """Score a layout from its overlap count, filled cell count and bounds."""
+        rows, cols = _dimensions(bounds)
+        density = filled / (rows * cols)
+        aspect = max(rows, cols) / min(rows, cols)
+        return overlaps + self.density_weight * density - self.aspect_weight * (aspect - 1)
+
+    def upper_bound(self, overlaps: int, filled: int, bounds: Tuple[int, int, int, int],
+                    remaining_overlaps: int) -> float:
+        """Best score a partial layout could still reach with at most remaining_overlaps more."""
+        # Later words can still fill the box completely and square it up
+        return overlaps + remaining_overlaps + self.density_weight
+
+
+SCORERS = {
+    'overlaps': OverlapScorer,
+    'compact': CompactScorer,
+}
+
+
+def make_scorer(name: str = 'compact'):
+    """Create a layout scorer by name."""
+    try:
+        return SCORERS[name]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown scoring '{name}'. Choose from: {', '.join(SCORERS)}") from None
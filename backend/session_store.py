@@ -0,0 +1,268 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+SESSION_STORES = ('memory', 'sqlite')
+
+
+class MemorySessionStore:
+    """Session state kept in this process; only suitable for a single server process."""
+
+    def __init__(self):
+        # key -> (state JSON, expiry time or None), least recently used first
+        self._entries: 'OrderedDict[str, Tuple[str, Optional[float]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Optional[Dict]:
+        """Return the state stored under key, or None if missing or expired.
+
+        With a ttl, the entry's expiry is pushed back to ttl seconds from now.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry[1] is not None and entry[1] <= now):
+                return None
+            self._entries.move_to_end(key)
+            if ttl is not None:
+                self._entries[key] = (entry[0], now + ttl)
+            # Stored as JSON so callers never share mutable state, as with other stores
+            return json.loads(entry[0])
+
+    def put(self, key: str, state: Dict, ttl: Optional[float] = None) -> None:
+        """Store state under key, expiring after ttl seconds if given."""
+        expires = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (json.dumps(state), expires)
+            self._entries.move_to_end(key)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def keys(self, prefix: str) -> List[str]:
+        """Return the live keys starting with prefix, least recently used first."""
+        now = time.time()
+        with self._lock:
+            return [key for key, (_, expires) in self._entries.items()
+                    if key.startswith(prefix) and (expires is None or expires > now)]
+
+    def pop_expired(self, prefix: str) -> List[str]:
+        """Delete the expired keys starting with prefix and return them."""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (_, expires) in self._entries.items()
+                       if key.startswith(prefix) and expires is not None and expires <= now]
+            for key in expired:
+                del self._entries[key]
+            return expired
+
+
+class SQLiteSessionStore:
+    """Session state in a SQLite file, shared by every server process on the host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._local = threading.local()
+        db = self._db()
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS sessions ('
+            ' key TEXT PRIMARY KEY, state TEXT NOT NULL, expires REAL, accessed REAL)')
+        columns = [row[1] for row in db.execute('PRAGMA table_info(sessions)')]
+        if 'accessed' not in columns:
+            db.execute('ALTER TABLE sessions ADD COLUMN accessed REAL')
+        db.execute('CREATE INDEX IF NOT EXISTS sessions_accessed ON sessions (accessed)')
+        db.commit()
+
+    def _db(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets readers proceed while another process writes
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Optional[Dict]:
+        """Return the state stored under key, or None if missing or expired.
+
+        With a ttl, the entry's expiry is pushed back to ttl seconds from now.
+        """
+        now = time.time()
+        db = self._db()
+        row = db.execute(
+            'SELECT state, expires FROM sessions WHERE key = ?', (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            return None
+        if ttl is not None:
+            db.execute('UPDATE sessions SET expires = ?, accessed = ? WHERE key = ?',
+                       (now + ttl, now, key))
+        else:
+            db.execute('UPDATE sessions SET accessed = ? WHERE key = ?', (now, key))
+        db.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, state: Dict, ttl: Optional[float] = None) -> None:
+        """Store state under key, expiring after ttl seconds if given."""
+        now = time.time()
+        expires = now + ttl if ttl is not None else None
+        db = self._db()
+        db.execute('INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?)',
+                   (key, json.dumps(state), expires, now))
+        db.commit()
+
+    def delete(self, key: str) -> None:
+        db = self._db()
+        db.execute('DELETE FROM sessions WHERE key = ?', (key,))
+        db.commit()
+
+    def keys(self, prefix: str) -> List[str]:
+        """Return the live keys starting with prefix, least recently used first."""
+        rows = self._db().execute(
+            'SELECT key FROM sessions WHERE substr(key, 1, ?) = ?'
+            ' AND (expires IS NULL OR expires > ?) ORDER BY accessed',
+            (len(prefix), prefix, time.time())).fetchall()
+        return [row[0] for row in rows]
+
+    def pop_expired(self, prefix: str) -> List[str]:
+        """Delete the expired keys starting with prefix and return them."""
+        db = self._db()
+        now = time.time()
+        expired = [row[0] for row in db.execute(
+            'SELECT key FROM sessions WHERE substr(key, 1, ?) = ? AND expires <= ?',
+            (len(prefix), prefix, now))]
+        db.execute('DELETE FROM sessions WHERE substr(key, 1, ?) = ? AND expires <= ?',
+                   (len(prefix), prefix, now))
+        db.commit()
+        return expired
+
+
+def make_session_store(name: str = 'memory', path: Optional[str] = None):
+    """Create a session store by name: 'memory', or 'sqlite' (which needs a path)."""
+    if name == 'memory':
+        return MemorySessionStore()
+    if name == 'sqlite':
+        if not path:
+            raise ValueError("The sqlite session store needs a path.")
+        return SQLiteSessionStore(path)
+    raise ValueError(
+        f"Unknown session store '{name}'. Choose from: {', '.join(SESSION_STORES)}")
+
+
+class SessionManager:
+    """Bounds the sessions held in a store and cleans up after abandoned ones.
+
+    Sessions expire after idle_ttl seconds without being loaded or saved, and
+    once there are more than max_sessions the least recently used are evicted.
+    Removing a session, for whatever reason, also removes its output
+    directory. A background sweeper deletes expired sessions, expired
+    entries under the other given prefixes (such as grid job snapshots), and
+    output directories no longer belonging to any session.
+    """
+
+    PREFIX = 'session:'
+
+    def __init__(self, store, output_dir: str, max_sessions: int = 1000,
+                 idle_ttl: float = 6 * 3600, sweep_interval: float = 60.0,
+                 sweep_prefixes: Tuple[str, ...] = ()):
+        self.store = store
+        self.output_dir = output_dir
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.sweep_interval = sweep_interval
+        self.sweep_prefixes = sweep_prefixes
+        self.evictions = 0
+        self.expirations = 0
+        self._sweeper: Optional[threading.Thread] = None
+
+    def load(self, client_id: str) -> Optional[Dict]:
+        """Return a session's state and mark it as recently used, or None if there is none."""
+        return self.store.get(self.PREFIX + client_id, ttl=self.idle_ttl)
+
+    def save(self, client_id: str, state: Dict) -> None:
+        """Store a session's state, evicting the least recently used sessions if over the limit."""
+        self.store.put(self.PREFIX + client_id, state, ttl=self.idle_ttl)
+        keys = self.store.keys(self.PREFIX)
+        for key in keys[:max(0, len(keys) - self.max_sessions)]:
+            if key != self.PREFIX + client_id:
+                self.evictions += 1
+                self.delete(key[len(self.PREFIX):])
+
+    def delete(self, client_id: str) -> None:
+        """Remove a session and its output directory."""
+        self.store.delete(self.PREFIX + client_id)
+        self._remove_output(client_id)
+
+    def sweep(self) -> int:
+        """Remove expired sessions and orphaned output directories; return how many sessions went."""
+        expired = self.store.pop_expired(self.PREFIX)
+        for key in expired:
+            self._remove_output(key[len(self.PREFIX):])
+        self.expirations += len(expired)
+        for prefix in self.sweep_prefixes:
+            self.store.pop_expired(prefix)
+
+        # Directories left by sessions that ended elsewhere (another process, or a
+        # restart with the memory store), once they have been idle for the TTL
+        live = {key[len(self.PREFIX):] for key in self.store.keys(self.PREFIX)}
+        cutoff = time.time() - self.idle_ttl
+        try:
+            entries = list(os.scandir(self.output_dir))
+        except OSError:
+            entries = []
+        for entry in entries:
+            if entry.is_dir() and entry.name not in live:
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                except OSError:
+                    pass
+
+        if expired:
+            print(f"Removed {len(expired)} expired sessions")
+        return len(expired)
+
+    def start_sweeper(self) -> None:
+        """Run sweep() every sweep_interval seconds in a daemon thread."""
+        if self._sweeper is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(self.sweep_interval)
+                try:
+                    self.sweep()
+                except Exception as e:
+                    print(f"Error sweeping sessions: {e}")
+
+        self._sweeper = threading.Thread(target=run, daemon=True)
+        self._sweeper.start()
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of live sessions, evictions so far and bytes used by output files."""
+        bytes_on_disk = 0
+        for root, _, files in os.walk(self.output_dir):
+            for name in files:
+                try:
+                    bytes_on_disk += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return {
+            'sessions': len(self.store.keys(self.PREFIX)),
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'bytes_on_disk': bytes_on_disk,
+        }
+
+    def _remove_output(self, client_id: str) -> None:
+        # Client ids come from requests, so never let one point outside the output directory
+        name = os.path.basename(client_id)
+        if name and name not in ('.', '..'):
+            shutil.rmtree(os.path.join(self.output_dir, name), ignore_errors=True)
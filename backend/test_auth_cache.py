@@ -0,0 +1,122 @@
+import io
+from contextlib import redirect_stdout
+
+import pytest
+import requests
+
+import auth_cache
+from auth_cache import AuthVerifier
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Response:
+    def __init__(self, status_code: int, user: dict = None):
+        self.status_code = status_code
+        self.user = user
+
+    def json(self):
+        return self.user
+
+
+class FakeAuthAPI:
+    """Stands in for the pooled session: answers each token from `users`, or fails when down."""
+
+    def __init__(self):
+        self.users = {'good': {'name': 'Ada'}}
+        self.status_code = None
+        self.down = False
+        self.calls = 0
+
+    def get(self, url, cookies, timeout):
+        self.calls += 1
+        if self.down:
+            raise requests.ConnectionError('auth API unreachable')
+        if self.status_code is not None:
+            return Response(self.status_code)
+        user = self.users.get(cookies['auth_token'])
+        return Response(200, user) if user is not None else Response(401)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(auth_cache.time, 'monotonic', clock)
+    return clock
+
+
+def make_verifier(**options):
+    verifier = AuthVerifier('http://auth.invalid/user', **options)
+    verifier.session = FakeAuthAPI()
+    return verifier
+
+
+def verify(verifier, token):
+    with redirect_stdout(io.StringIO()):
+        return verifier.verify(token)
+
+
+def test_answers_are_cached_for_their_ttl(clock):
+    verifier = make_verifier(ttl=60, negative_ttl=10)
+    assert verify(verifier, 'good') == (True, {'name': 'Ada'})
+    assert verify(verifier, 'bad') == (False, None)
+    clock.now += 9
+    assert verify(verifier, 'good') == (True, {'name': 'Ada'})
+    assert verify(verifier, 'bad') == (False, None)
+    assert verifier.session.calls == 2
+
+    clock.now += 2
+    verify(verifier, 'bad')
+    assert verifier.session.calls == 3
+    clock.now += 50
+    verify(verifier, 'good')
+    assert verifier.session.calls == 4
+    assert verifier.stats() == {'hits': 2, 'misses': 4, 'errors': 0, 'stale_hits': 0, 'entries': 2}
+
+
+def test_least_recently_used_tokens_are_evicted(clock):
+    verifier = make_verifier(max_entries=2)
+    verifier.session.users.update({'a': {}, 'b': {}})
+    for token in ('good', 'a', 'good', 'b'):
+        verify(verifier, token)
+    assert verifier.session.calls == 3
+
+    verify(verifier, 'good')
+    assert verifier.session.calls == 3
+    verify(verifier, 'a')
+    assert verifier.session.calls == 4
+    assert verifier.stats()['entries'] == 2
+
+
+def test_tokens_are_rejected_during_an_outage_by_default(clock):
+    verifier = make_verifier(ttl=60)
+    verify(verifier, 'good')
+    clock.now += 61
+    verifier.session.down = True
+    assert verify(verifier, 'good') == (False, None)
+    assert verifier.stats()['errors'] == 1
+
+
+@pytest.mark.parametrize('failure', ['down', 'server error'])
+def test_stale_ttl_keeps_verified_tokens_through_an_outage(clock, failure):
+    verifier = make_verifier(ttl=60, stale_ttl=600)
+    verify(verifier, 'good')
+    verify(verifier, 'bad')
+    clock.now += 61
+    if failure == 'down':
+        verifier.session.down = True
+    else:
+        verifier.session.status_code = 503
+
+    assert verify(verifier, 'good') == (True, {'name': 'Ada'})
+    assert verify(verifier, 'bad') == (False, None)
+    assert verify(verifier, 'unknown') == (False, None)
+    clock.now += 600
+    assert verify(verifier, 'good') == (False, None)
+    assert verifier.stats()['stale_hits'] == 1
@@ -0,0 +1,82 @@
+import pytest
+
+import clue_cache
+from clue_cache import ClueCache, make_clue_key, make_topic_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(clue_cache.time, 'time', clock)
+    return clock
+
+
+def key(word: str):
+    return make_clue_key(word, 'Fruit', 'model', 1)
+
+
+def test_keys_normalize_words_and_topics():
+    assert make_clue_key(' Apple ', 'fruit', 'model', 1) == make_clue_key('apple', 'Fruit', 'model', 1)
+    assert make_clue_key('apple', 'fruit', 'model', 1) != make_clue_key('apple', 'fruit', 'model', 2)
+    assert make_topic_key(['pear', 'Apple'], 'model', 1) == make_topic_key(['apple', 'pear'], 'model', 1)
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ClueCache(max_entries=2)
+    cache.put(key('apple'), 'n. Red fruit.')
+    cache.put(key('pear'), 'n. Green fruit.')
+    assert cache.get(key('apple')) == 'n. Red fruit.'
+    cache.put(key('plum'), 'n. Purple fruit.')
+
+    assert cache.get(key('pear')) is None
+    assert cache.get(key('apple')) == 'n. Red fruit.'
+    assert cache.get(key('plum')) == 'n. Purple fruit.'
+    assert cache.stats()['entries'] == 2
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ClueCache(ttl=60)
+    cache.put(key('apple'), 'n. Red fruit.')
+    cache.put_topic(make_topic_key(['apple'], 'model', 1), 'Fruit')
+    clock.now += 59
+    assert cache.get(key('apple')) == 'n. Red fruit.'
+    assert cache.get_topic(make_topic_key(['apple'], 'model', 1)) == 'Fruit'
+    clock.now += 2
+    assert cache.get(key('apple')) is None
+    assert cache.get_topic(make_topic_key(['apple'], 'model', 1)) is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['topic_hits'], stats['topic_misses']) == (1, 1, 1, 1)
+
+
+def test_sqlite_tier_outlives_the_process_cache(tmp_path, clock):
+    path = str(tmp_path / 'clues.sqlite3')
+    ClueCache(path=path, ttl=60).put(key('apple'), 'n. Red fruit.')
+
+    # A fresh cache (e.g. after a restart, or with memory evicted) reads it back from disk
+    assert ClueCache(path=path, ttl=60).get(key('apple')) == 'n. Red fruit.'
+    evicting = ClueCache(path=path, ttl=60, max_entries=1)
+    evicting.put(key('pear'), 'n. Green fruit.')
+    assert evicting.get(key('apple')) == 'n. Red fruit.'
+
+    clock.now += 61
+    assert ClueCache(path=path, ttl=60).get(key('apple')) is None
+
+
+def test_purge_expired_deletes_old_rows(tmp_path, clock):
+    cache = ClueCache(path=str(tmp_path / 'clues.sqlite3'), ttl=60)
+    cache.put(key('apple'), 'n. Red fruit.')
+    cache.put_topic(make_topic_key(['apple'], 'model', 1), 'Fruit')
+    clock.now += 30
+    cache.put(key('pear'), 'n. Green fruit.')
+    assert cache.purge_expired() == 0
+    clock.now += 45
+    assert cache.purge_expired() == 2
+    assert cache.get(key('pear')) == 'n. Green fruit.'
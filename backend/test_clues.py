@@ -0,0 +1,73 @@
+import io
+import json
+import threading
+from contextlib import redirect_stdout
+
+import pytest
+
+from clue_provider import ClueProviderError, StubClueProvider
+from generator import MISSING_CLUE, CrosswordGenerator
+
+WORDS = ['apple', 'banana', 'cherry', 'grape', 'lemon', 'mango', 'melon', 'orange', 'peach',
+         'pear', 'plum', 'apricot', 'coconut', 'tomato', 'potato', 'carrot', 'onion', 'garlic']
+
+
+class RecordingProvider(StubClueProvider):
+    """Stub provider that records its prompts and fails for the given words."""
+
+    def __init__(self, failing=(), skip_in_batches=()):
+        super().__init__()
+        self.failing = set(failing)
+        self.skip_in_batches = set(skip_in_batches)
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def complete(self, system_prompt: str, user_prompt: str) -> str:
+        with self._lock:
+            self.prompts.append(user_prompt)
+        if not system_prompt.startswith('Deduce') and any(
+                word in user_prompt for word in self.failing):
+            raise ClueProviderError('unavailable')
+        reply = super().complete(system_prompt, user_prompt)
+        if user_prompt.startswith('Words: ['):
+            clues = json.loads(reply)
+            reply = json.dumps({word: clue for word, clue in clues.items()
+                                if word not in self.skip_in_batches})
+        return reply
+
+
+def make_generator(provider) -> CrosswordGenerator:
+    generator = CrosswordGenerator(WORDS, seed=1, clue_provider=provider)
+    with redirect_stdout(io.StringIO()):
+        assert generator.generate_grid(max_attempts=5)
+    return generator
+
+
+@pytest.mark.parametrize('batch_size', [1, 3])
+def test_seeded_layout_gets_every_clue(batch_size):
+    generator = make_generator(StubClueProvider())
+    with redirect_stdout(io.StringIO()):
+        assert generator.generate_clues(concurrency=2, batch_size=batch_size) == []
+    for direction, ids in generator.clue_ids.items():
+        assert set(generator.clues[direction]) == set(ids)
+        assert all(clue != MISSING_CLUE for clue in generator.clues[direction].values())
+
+
+@pytest.mark.parametrize('batch_size', [1, 3])
+def test_failed_clues_are_reported(batch_size):
+    generator = make_generator(RecordingProvider(failing=['lemon']))
+    with redirect_stdout(io.StringIO()):
+        assert generator.generate_clues(concurrency=2, batch_size=batch_size) == ['lemon']
+    clues = {generator.clue_ids[direction][number]: clue
+             for direction, numbered in generator.clues.items()
+             for number, clue in numbered.items()}
+    assert clues['lemon'] == MISSING_CLUE
+    assert all(clue != MISSING_CLUE for word, clue in clues.items() if word != 'lemon')
+
+
+def test_words_skipped_in_a_batch_are_asked_for_alone():
+    provider = RecordingProvider(skip_in_batches=['melon'])
+    generator = make_generator(provider)
+    with redirect_stdout(io.StringIO()):
+        assert generator.generate_clues(concurrency=1, batch_size=4) == []
+    assert 'Word: melon' in provider.prompts
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from benchmark import LENGTH_DISTRIBUTIONS, synthetic_words
+from grid_jobs import GridJobManager, JobQueueFull
+
+WORDS = ['apple', 'grape', 'lemon', 'melon', 'onion', 'pear']
+
+
+@pytest.fixture
+def updates():
+    return []
+
+
+@pytest.fixture
+def manager(updates):
+    manager = GridJobManager(workers=1, max_queue=3, on_update=updates.append)
+    yield manager
+    manager.shutdown()
+
+
+def wait_until_finished(manager, job_id):
+    version = -1
+    while True:
+        job = manager.wait(job_id, version, timeout=30)
+        assert job['version'] > version
+        version = job['version']
+        if job['status'] not in ('queued', 'running'):
+            return job
+
+
+def test_jobs_report_their_result(manager, updates):
+    results = []
+    job_id = manager.submit(WORDS, 1, 10, 5.0, on_done=results.append)
+    job = wait_until_finished(manager, job_id)
+
+    assert job['status'] == 'done'
+    assert results == [job['result']]
+    assert len(job['result']['layout']['placed_words']) == len(WORDS)
+    assert job['result']['questionSvg'].startswith('<svg')
+    # Every change is published, in order
+    versions = [update['version'] for update in updates if update['id'] == job_id]
+    assert versions == list(range(1, job['version'] + 1))
+
+
+def test_queued_jobs_can_be_cancelled_and_the_queue_is_bounded(manager):
+    words = synthetic_words(random.Random(1), 120, LENGTH_DISTRIBUTIONS['mixed'])
+    results = []
+    busy = manager.submit(words, 1, 1000, 1.0)
+    manager.submit(WORDS, 1, 10, 5.0)
+    # The pool hands one job beyond its workers to them early, so the third is still waiting
+    waiting = manager.submit(WORDS, 2, 10, 5.0, on_done=results.append)
+    with pytest.raises(JobQueueFull):
+        manager.submit(WORDS, 3, 10, 5.0)
+
+    assert manager.cancel(waiting)
+    assert not manager.cancel(busy)
+    assert manager.get(waiting)['status'] == 'cancelled'
+    assert wait_until_finished(manager, busy)['status'] in ('done', 'failed')
+    assert results == []
+    assert manager.stats()['cancelled'] == 1
+
+
+def test_overdue_jobs_time_out():
+    manager = GridJobManager(workers=1, timeout=0.0)
+    try:
+        job_id = manager.submit(WORDS, 1, 10, 5.0)
+        job = manager.get(job_id)
+        assert job['status'] == 'timeout'
+        assert manager.get('unknown') is None
+    finally:
+        manager.shutdown()
@@ -0,0 +1,156 @@
+import io
+import random
+from contextlib import redirect_stdout
+
+import pytest
+
+from generator import SEARCH_MODES, CrosswordGenerator
+from grid import GRID_BACKENDS, ArrayGrid
+
+WORDS = ['apple', 'banana', 'cherry', 'grape', 'lemon', 'mango', 'melon', 'orange', 'peach',
+         'pear', 'plum', 'apricot', 'coconut', 'tomato', 'potato', 'carrot', 'onion', 'garlic']
+
+
+def check_invariants(generator: CrosswordGenerator) -> None:
+    """Check that the grid, counters and letter index all agree with the placed words."""
+    cells = {}
+    coverage = {}
+    for pw in generator.placed_words:
+        horizontal = pw.direction == 'horizontal'
+        for i, letter in enumerate(pw.word):
+            pos = (pw.row, pw.col + i) if horizontal else (pw.row + i, pw.col)
+            assert cells.setdefault(pos, letter) == letter
+            coverage.setdefault(pos, []).append(pw.direction)
+
+    grid = generator.grid
+    assert dict(grid.items()) == cells
+    assert len(grid) == len(cells)
+    for pos, letter in cells.items():
+        assert grid.get(*pos) == letter
+
+    assert generator.overlap_count == sum(len(pw.word) for pw in generator.placed_words) - len(cells)
+
+    if cells:
+        rows = [row for row, _ in cells]
+        cols = [col for _, col in cells]
+        assert grid.bounds() == (min(rows), max(rows), min(cols), max(cols))
+    else:
+        assert grid.bounds() == (0, 0, 0, 0)
+    assert generator.score == generator.scorer.score(
+        generator.overlap_count, len(cells), grid.bounds())
+
+    # Anchors are exactly the cells crossed by one word, indexed under their letter
+    anchors = {pos: directions[0] for pos, directions in coverage.items() if len(directions) == 1}
+    indexed = [(letter, entry) for letter, entries in generator.letter_index.items()
+               for entry in entries]
+    assert sorted(indexed) == sorted((cells[pos], (pos[0], pos[1], direction))
+                                     for pos, direction in anchors.items())
+    assert set(generator._anchor_slots) == set(anchors)
+    for pos, slot in generator._anchor_slots.items():
+        assert generator.letter_index[cells[pos]][slot][:2] == pos
+
+
+@pytest.mark.parametrize('backend', sorted(GRID_BACKENDS))
+@pytest.mark.parametrize('seed', range(5))
+def test_random_place_and_undo(backend, seed):
+    rng = random.Random(seed)
+    generator = CrosswordGenerator(WORDS, grid_backend=backend, seed=seed)
+    generator.place_word('coconut', 0, 0, 'horizontal')
+    check_invariants(generator)
+
+    for _ in range(200):
+        placed = {pw.word for pw in generator.placed_words}
+        unplaced = [word for word in generator.words if word not in placed]
+        if unplaced and (len(placed) == 1 or rng.random() < 0.6):
+            generator._try_place_word(rng.choice(unplaced))
+        else:
+            generator.undo_last_word()
+        check_invariants(generator)
+
+    while len(generator.placed_words) > 1:
+        generator.undo_last_word()
+        check_invariants(generator)
+    assert dict(generator.grid.items()) == {(0, i): letter for i, letter in enumerate('coconut')}
+
+
+@pytest.mark.parametrize('search', SEARCH_MODES)
+@pytest.mark.parametrize('backend', sorted(GRID_BACKENDS))
+def test_search_keeps_invariants(backend, search):
+    generator = CrosswordGenerator(WORDS, grid_backend=backend, seed=7)
+    place_word, undo_last_word = generator.place_word, generator.undo_last_word
+
+    # Check after every placement and undo the search makes, on this instance only
+    def checked_place_word(*args):
+        place_word(*args)
+        check_invariants(generator)
+
+    def checked_undo_last_word():
+        pw = undo_last_word()
+        check_invariants(generator)
+        return pw
+
+    generator.place_word = checked_place_word
+    generator.undo_last_word = checked_undo_last_word
+    with redirect_stdout(io.StringIO()):
+        assert generator.generate_grid(max_attempts=10, search=search, node_budget=200)
+    check_invariants(generator)
+    assert sorted(pw.word for pw in generator.placed_words) == generator.words
+
+
+@pytest.mark.parametrize('search', SEARCH_MODES)
+def test_backends_find_the_same_layout(search):
+    layouts = []
+    for backend in sorted(GRID_BACKENDS):
+        generator = CrosswordGenerator(WORDS, grid_backend=backend, seed=3)
+        with redirect_stdout(io.StringIO()):
+            assert generator.generate_grid(max_attempts=10, search=search)
+        layouts.append(generator.export_layout())
+    assert layouts[0] == layouts[1]
+
+
+@pytest.mark.parametrize('horizontal', [True, False])
+def test_array_undo_after_regrow(horizontal):
+    grid = ArrayGrid()
+    grid.place('apple', 0, 0, True)
+    before = (dict(grid.items()), len(grid), grid.bounds())
+    plane = (grid._row0, grid._col0, grid._width, grid._height)
+
+    # A long word running back past the origin moves the plane's offsets as it grows
+    word = 'papaya' * 6 + 'a'
+    row, col = (0, -len(word) + 1) if horizontal else (-len(word) + 1, 0)
+    assert grid.place(word, row, col, horizontal) == 1
+    assert (grid._row0, grid._col0, grid._width, grid._height) != plane
+
+    # A probe far away grows it again before the undo
+    grid.can_place('melon', 500, -500, False)
+    assert grid.undo() == 1
+    assert (dict(grid.items()), len(grid), grid.bounds()) == before
+    assert not grid.is_filled(row, col)
+
+
+def test_array_and_dict_undo_agree():
+    rng = random.Random(0)
+    grids = [GRID_BACKENDS[backend]() for backend in sorted(GRID_BACKENDS)]
+    for grid in grids:
+        grid.place('coconut', 0, 0, True)
+    for _ in range(300):
+        if len(grids[0]._history) > 1 and rng.random() < 0.3:
+            results = [grid.undo() for grid in grids]
+        else:
+            # Line a word up with a letter already on the grid, so most probes cross it
+            (row, col), letter = rng.choice(sorted(grids[1].items()))
+            word = rng.choice(WORDS)
+            offset = word.find(letter)
+            if offset < 0:
+                continue
+            horizontal = rng.random() < 0.5
+            row, col = (row, col - offset) if horizontal else (row - offset, col)
+            fits = [grid.can_place(word, row, col, horizontal) for grid in grids]
+            assert fits[0] == fits[1]
+            if not fits[0]:
+                continue
+            results = [grid.place(word, row, col, horizontal) for grid in grids]
+        assert results[0] == results[1]
+        assert dict(grids[0].items()) == dict(grids[1].items())
+        assert len(grids[0]) == len(grids[1])
+        assert grids[0].bounds() == grids[1].bounds()
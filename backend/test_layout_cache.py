@@ -0,0 +1,89 @@
+import io
+import os
+import random
+from contextlib import redirect_stdout
+
+from benchmark import LENGTH_DISTRIBUTIONS, synthetic_words
+from generator import CrosswordGenerator
+from layout_cache import LayoutCache, derive_seed, make_layout_key
+from scoring import make_scorer
+
+WORDS = ['apple', 'grape', 'lemon', 'melon', 'onion', 'pear']
+
+
+def test_keys_and_seeds_ignore_word_order_and_whitespace():
+    scorer = make_scorer('compact')
+    assert (make_layout_key(['pear', ' apple'], 1, scorer, {}) ==
+            make_layout_key(['apple', 'pear', 'apple'], 1, scorer, {}))
+    assert make_layout_key(['apple'], 1, scorer, {}) != make_layout_key(['apple'], 2, scorer, {})
+    assert derive_seed(['pear', ' apple']) == derive_seed(['apple', 'pear'])
+    assert derive_seed(['apple', 'pear']) != derive_seed(['apple', 'plum'])
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = LayoutCache(max_entries=2)
+    cache.put('a', {'n': 1})
+    cache.put('b', {'n': 2})
+    assert cache.get('a') == {'n': 1}
+    cache.put('c', {'n': 3})
+    assert cache.get('b') is None
+    assert cache.get('a') == {'n': 1}
+
+
+def test_disk_tier_survives_memory_eviction(tmp_path):
+    cache = LayoutCache(max_entries=1, directory=str(tmp_path))
+    cache.put('a', {'n': 1})
+    cache.put('b', {'n': 2})
+    assert cache.get('a') == {'n': 1}
+    assert LayoutCache(directory=str(tmp_path)).get('b') == {'n': 2}
+
+
+def test_disk_tier_prunes_least_recently_used(tmp_path):
+    cache = LayoutCache(directory=str(tmp_path), max_disk_entries=10)
+    for i in range(10):
+        cache.put(f'k{i}', {'n': i})
+        os.utime(tmp_path / f'k{i}.json', (i, i))
+    # Reading an entry from disk marks it as recently used
+    assert LayoutCache(directory=str(tmp_path)).get('k0') == {'n': 0}
+
+    cache.put('k10', {'n': 10})
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        ['k0.json', 'k10.json'] + [f'k{i}.json' for i in range(3, 10)])
+
+
+def generate(words, seed, cache, **options):
+    generator = CrosswordGenerator(words, seed=seed)
+    with redirect_stdout(io.StringIO()):
+        assert generator.generate_grid(cache=cache, **options)
+    return generator.export_layout()
+
+
+def test_seeded_searches_are_cached_and_reused():
+    cache = LayoutCache()
+    layout = generate(WORDS, 5, cache, max_attempts=10)
+    assert len(cache._entries) == 1
+
+    # A hit loads the stored layout without searching
+    searches = []
+    generator = CrosswordGenerator(WORDS, seed=5)
+    generator._generate_grid_serial = lambda *args: searches.append(args)
+    with redirect_stdout(io.StringIO()):
+        assert generator.generate_grid(max_attempts=10, cache=cache)
+    assert searches == []
+    assert generator.export_layout() == layout
+
+
+def test_unseeded_searches_skip_the_cache():
+    cache = LayoutCache()
+    cache.put(make_layout_key(WORDS, None, make_scorer('compact'), {}), {'stale': True})
+    generate(WORDS, None, cache, max_attempts=5)
+    assert len(cache._entries) == 1
+
+
+def test_searches_cut_short_are_not_cached():
+    words = synthetic_words(random.Random(1), 120, LENGTH_DISTRIBUTIONS['mixed'])
+    cache = LayoutCache()
+    generator = CrosswordGenerator(words, seed=1)
+    with redirect_stdout(io.StringIO()):
+        generator.generate_grid(max_attempts=50, time_limit=0.05, cache=cache)
+    assert len(cache._entries) == 0
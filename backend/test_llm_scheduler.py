@@ -0,0 +1,114 @@
+import threading
+import time
+
+import pytest
+
+from clue_provider import RateLimitedError
+from llm_scheduler import LLMScheduler, ScheduledClueProvider, TokenBucket
+
+
+def queue_requests(scheduler, clients):
+    """Start one acquiring thread per client id, in order, each queued before the next starts."""
+    threads = []
+    for client_id in clients:
+        thread = threading.Thread(target=scheduler.acquire, args=(client_id, 10))
+        thread.start()
+        threads.append(thread)
+        deadline = time.monotonic() + 5
+        while scheduler.queued() < len(threads):
+            assert time.monotonic() < deadline
+            time.sleep(0.005)
+    return threads
+
+
+def test_waiting_clients_are_served_round_robin():
+    scheduler = LLMScheduler()
+    served = []
+    take = scheduler._take
+
+    def recording_take(client_id, tokens):
+        served.append(client_id)
+        take(client_id, tokens)
+
+    scheduler._take = recording_take
+    # Hold every request back until all are queued
+    scheduler.pause(0.3)
+    threads = queue_requests(scheduler, ['a', 'a', 'a', 'b', 'c', 'c'])
+    assert scheduler.queue_position('a') == 0
+    assert scheduler.queue_position('b') == 1
+    assert scheduler.queue_position('c') == 2
+    assert scheduler.queue_position('d') is None
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert served == ['a', 'b', 'c', 'a', 'c', 'a']
+    assert scheduler.queued() == 0
+    assert scheduler.queue_position('a') is None
+
+
+def test_pause_holds_back_requests():
+    scheduler = LLMScheduler()
+    scheduler.pause(0.2)
+    start = time.monotonic()
+    scheduler.acquire('a', 10)
+    assert time.monotonic() - start >= 0.19
+
+
+def test_requests_wait_for_the_request_bucket():
+    # 600 a minute: the bucket starts with 600 and refills one every 0.1 seconds
+    scheduler = LLMScheduler(requests_per_minute=600)
+    scheduler._requests.level = 1
+    scheduler.acquire('a', 10)
+    start = time.monotonic()
+    scheduler.acquire('a', 10)
+    assert 0.05 <= time.monotonic() - start < 1.0
+
+
+def test_token_bucket_refills_evenly():
+    bucket = TokenBucket(per_minute=60)
+    now = time.monotonic()
+    bucket.refill(now)
+    bucket.take(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    # Requests above capacity wait for a full bucket rather than forever
+    assert bucket.wait_time(600) == pytest.approx(60.0)
+    bucket.refill(now + 30)
+    assert bucket.level == pytest.approx(30)
+    bucket.refill(now + 300)
+    assert bucket.level == pytest.approx(60)
+
+
+class FlakyProvider:
+    """Provider that reports a rate limit for its first `failures` calls."""
+
+    model_id = 'stub'
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    def complete_with_usage(self, system_prompt, user_prompt):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RateLimitedError('429', retry_after=0.01)
+        return 'n. A clue.', {'prompt_tokens': 7, 'completion_tokens': 3}
+
+
+def test_rate_limited_calls_pause_the_scheduler_and_requeue():
+    scheduler = LLMScheduler()
+    pauses = []
+    pause = scheduler.pause
+    scheduler.pause = lambda seconds: (pauses.append(seconds), pause(seconds))
+    provider = ScheduledClueProvider(FlakyProvider(failures=2), scheduler, 'a')
+
+    assert provider.complete('system', 'Word: apple') == 'n. A clue.'
+    assert pauses == [0.01, 0.01]
+    assert provider.usage == {'requests': 1, 'prompt_tokens': 7, 'completion_tokens': 3}
+
+
+def test_requeues_are_bounded():
+    provider = ScheduledClueProvider(
+        FlakyProvider(failures=10), LLMScheduler(), 'a', max_requeues=2)
+    with pytest.raises(RateLimitedError):
+        provider.complete('system', 'Word: apple')
+    assert provider.provider.calls == 3
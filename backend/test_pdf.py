@@ -0,0 +1,53 @@
+import pytest
+
+from pdf import CLUE_FONT, TITLE_FONT, create_crossword_pdfs, paginate_column, parse_clues, plan_pages
+
+GRID = {'columns': 2, 'rows': 2, 'cells': [(0, 0, 'a', 1), (1, 0, 'b', None), (0, 1, 'c', 2)]}
+
+
+def clue_texts(page):
+    return [text for _, font, _, text in page if font == CLUE_FONT]
+
+
+def test_columns_continue_on_further_pages_without_splitting_clues():
+    wrapped = [['1. one'], ['2. two', 'still two'], ['3. three']]
+    # Room for the title and two lines on the first page, and three lines after
+    pages = paginate_column('Across', wrapped, first_space=50, page_space=65)
+
+    assert [clue_texts(page) for page in pages] == [['1. one'], ['2. two', 'still two', '3. three']]
+    assert pages[1][0][1:] == (TITLE_FONT, 12, 'Across (continued)')
+    offsets = [offset for offset, *_ in pages[1]]
+    assert offsets == sorted(offsets)
+
+
+def test_a_clue_taller_than_a_page_still_gets_one():
+    pages = paginate_column('Down', [['a'] * 10, ['b']], first_space=30, page_space=30)
+    assert [len(clue_texts(page)) for page in pages] == [10, 1]
+
+
+def test_short_clue_lists_fit_on_one_page():
+    across, down = parse_clues('Across:\n1. One\n3. Three\n\nDown:\n2. Two')
+    assert (across, down) == (['1. One', '3. Three'], ['2. Two'])
+    plan = plan_pages((GRID['columns'], GRID['rows']), across, down)
+    assert plan['pages'] == 1
+
+
+@pytest.mark.parametrize('count', [40, 200])
+def test_long_clue_lists_keep_every_clue_in_order(count):
+    clues = [f'{i}. ' + 'A rather long clue that wraps onto another line. ' * 2 for i in range(count)]
+    plan = plan_pages((GRID['columns'], GRID['rows']), clues, clues[:5])
+    across_pages, down_pages = plan['columns']
+
+    assert plan['pages'] == len(across_pages) > 1
+    assert len(down_pages) == 1
+    starts = [text.split('.')[0] for page in across_pages for text in clue_texts(page)
+              if text[0].isdigit()]
+    assert starts == [str(i) for i in range(count)]
+
+
+def test_documents_are_written_together(tmp_path):
+    paths = [str(tmp_path / name) for name in ('question.pdf', 'answer.pdf', 'combined.pdf')]
+    create_crossword_pdfs('Across:\n1. One\n\nDown:\n2. Two', *paths, grid=GRID)
+    for path in paths:
+        with open(path, 'rb') as f:
+            assert f.read(5) == b'%PDF-'
@@ -0,0 +1,39 @@
+import random
+
+import pytest
+
+from generator import CrosswordGenerator
+
+WORDS = ['apple', 'banana', 'cherry', 'grape', 'lemon', 'mango', 'melon', 'orange', 'peach',
+         'pear', 'plum', 'apricot', 'coconut', 'tomato', 'potato', 'carrot', 'onion', 'garlic']
+
+
+@pytest.mark.parametrize('scoring', ['overlaps', 'compact'])
+def test_pruning_keeps_attempts_that_beat_the_best(scoring):
+    """An attempt pruned against a best score just below its own would have been lost."""
+    checked = 0
+    for seed in range(20):
+        generator = CrosswordGenerator(WORDS, scoring=scoring, seed=seed)
+        crossing_caps = generator._crossing_caps()
+        rng = random.Random(seed)
+        words = sorted(generator.words, key=lambda word: (-len(word), rng.random()))
+        # As in _generate_grid_serial: remaining[i] is the most words i+1 onwards can add
+        remaining = [0] * len(words)
+        for i in range(len(words) - 2, -1, -1):
+            remaining[i] = remaining[i + 1] + crossing_caps[words[i + 1]]
+
+        def attempt(best_score):
+            generator._reset_layout()
+            generator.rng.seed(seed)
+            generator.place_word(words[0], 0, -len(words[0]) // 2, 'horizontal')
+            # Without backtracking the attempt follows one path, so pruning is its only difference
+            placed = generator._place_backtracking(
+                words[1:], 10 ** 6, 0, None, remaining[1:], best_score)
+            return placed, generator.score
+
+        placed, score = attempt(None)
+        if not placed:
+            continue
+        checked += 1
+        assert attempt(score - 0.01) == (True, score)
+    assert checked > 0
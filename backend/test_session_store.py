@@ -0,0 +1,109 @@
+import os
+
+import pytest
+
+import session_store
+from session_store import SESSION_STORES, SessionManager, make_session_store
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000000.0
+
+    def __call__(self):
+        return self.now
+
+    def tick(self, seconds: float = 1.0) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(session_store.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture(params=SESSION_STORES)
+def store(request, tmp_path, clock):
+    return make_session_store(request.param, path=str(tmp_path / 'sessions.sqlite3'))
+
+
+def test_entries_expire_unless_refreshed(store, clock):
+    store.put('session:a', {'words': ['apple']}, ttl=60)
+    store.put('session:b', {'words': ['pear']}, ttl=60)
+    store.put('other:c', {}, ttl=60)
+    clock.tick(50)
+    # Reading with a ttl pushes the expiry back
+    assert store.get('session:a', ttl=60) == {'words': ['apple']}
+    clock.tick(20)
+
+    assert store.get('session:b') is None
+    assert store.keys('session:') == ['session:a']
+    assert store.pop_expired('session:') == ['session:b']
+    assert store.pop_expired('other:') == ['other:c']
+    assert store.get('session:a') == {'words': ['apple']}
+
+
+def test_entries_without_ttl_never_expire(store, clock):
+    store.put('session:a', {'n': 1})
+    clock.tick(10 ** 9)
+    assert store.get('session:a') == {'n': 1}
+    assert store.pop_expired('session:') == []
+
+
+def test_callers_never_share_state(store):
+    state = {'words': ['apple']}
+    store.put('session:a', state)
+    state['words'].append('pear')
+    loaded = store.get('session:a')
+    loaded['words'].append('plum')
+    assert store.get('session:a') == {'words': ['apple']}
+
+
+def test_manager_evicts_least_recently_used_sessions(store, clock, tmp_path):
+    output_dir = tmp_path / 'output'
+    manager = SessionManager(store, str(output_dir), max_sessions=2)
+    for client_id in ('a', 'b'):
+        (output_dir / client_id).mkdir(parents=True)
+        manager.save(client_id, {'id': client_id})
+        clock.tick()
+    assert manager.load('a') == {'id': 'a'}
+    clock.tick()
+    manager.save('c', {'id': 'c'})
+
+    assert manager.load('b') is None
+    assert not (output_dir / 'b').exists()
+    assert (output_dir / 'a').exists()
+    assert manager.stats()['sessions'] == 2
+    assert manager.evictions == 1
+
+
+def test_sweep_removes_expired_sessions_and_orphaned_output(store, clock, tmp_path):
+    output_dir = tmp_path / 'output'
+    manager = SessionManager(store, str(output_dir), idle_ttl=60, sweep_prefixes=('job:',))
+    for client_id in ('live', 'idle', 'orphan'):
+        (output_dir / client_id).mkdir(parents=True)
+    manager.save('idle', {})
+    store.put('job:1', {}, ttl=30)
+    clock.tick(50)
+    manager.save('live', {})
+    clock.tick(20)
+    # Orphaned directories are only removed once they have been idle for the TTL too
+    os.utime(output_dir / 'orphan', (clock.now - 61, clock.now - 61))
+
+    assert manager.sweep() == 1
+    assert sorted(os.listdir(output_dir)) == ['live']
+    assert store.keys('job:') == []
+    assert manager.load('live') == {}
+    assert manager.expirations == 1
+
+
+def test_client_ids_cannot_escape_the_output_directory(store, tmp_path):
+    output_dir = tmp_path / 'output'
+    (output_dir / 'a').mkdir(parents=True)
+    outside = tmp_path / 'keep'
+    outside.mkdir()
+    manager = SessionManager(store, str(output_dir))
+    manager.delete('../keep')
+    assert outside.exists()
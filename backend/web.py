@@ -1,53 +1,129 @@
 from dotenv import load_dotenv
 import os
-from flask import Flask, request, jsonify, send_file, Response
-from typing import Dict
-import base64
-from generator import CrosswordGenerator
+from flask import Flask, request, jsonify, send_file, Response, g
+from typing import Optional
+from generator import MISSING_CLUE, CrosswordGenerator
+from grid_jobs import GridJobManager, JobQueueFull
+from layout_cache import derive_seed
+from auth_cache import AuthVerifier
+from clue_cache import ClueCache
+from clue_provider import OpenAIClueProvider, StubClueProvider
+from llm_scheduler import LLMScheduler, ScheduledClueProvider
+from pdf import create_crossword_pdfs
+from metrics import annotate_trace, end_trace, metrics, start_trace
+from session_store import SESSION_STORES, SessionManager, make_session_store
 import json
 import datetime
-import requests
+import hmac
+import queue
+import threading
+import time
+import uuid
 
 PROJECT_ROOT = os.getcwd()
 
 app = Flask(__name__, static_folder=f'{PROJECT_ROOT}/frontend/build')
 
-# Store generators by UUID
-generators: Dict[str, CrosswordGenerator] = {}
-
-
 load_dotenv()
 openai_address = os.getenv("OPENAI_ADDRESS")
 openai_secret = os.getenv("OPENAI_SECRET")
 model_id = os.getenv("MODEL_ID")
 web_listen_address = os.getenv("WEB_LISTEN_ADDRESS")
 auth_api_url = os.getenv("AUTH_API_URL", "https://auth.yfzhou.fyi/webapi/user")
-if not openai_address or not openai_secret or not model_id or not web_listen_address:
+# Seconds to trust a verified (or rejected) token before asking the auth API again,
+# how many tokens to remember, and connections kept open to the auth API
+auth_cache_ttl = float(os.getenv("AUTH_CACHE_TTL") or 60)
+auth_negative_ttl = float(os.getenv("AUTH_NEGATIVE_TTL") or 10)
+auth_cache_size = int(os.getenv("AUTH_CACHE_SIZE") or 10000)
+auth_pool_size = int(os.getenv("AUTH_POOL_SIZE") or 16)
+# Seconds a token verified earlier is still accepted while the auth API is unreachable (0: never)
+auth_stale_ttl = float(os.getenv("AUTH_STALE_TTL") or 0)
+# Worker processes running grid jobs; each job searches in a single process
+grid_workers = int(os.getenv("GRID_WORKERS") or os.cpu_count() or 1)
+# Most grid jobs queued or running at once, and how long one may take in seconds
+grid_job_queue_depth = int(os.getenv("GRID_JOB_QUEUE_DEPTH") or 16)
+grid_job_timeout = float(os.getenv("GRID_JOB_TIMEOUT") or 60)
+# Also write grid PNGs to data/output/<clientId> (in the background); they are rendered in memory
+grid_save_images = (os.getenv("GRID_SAVE_IMAGES") or "false").lower() in ("1", "true", "yes")
+# Upper bound on time spent searching for a grid, whatever the client asks for
+grid_time_budget_ms = int(os.getenv("GRID_TIME_BUDGET_MS") or 10000)
+layout_cache_size = int(os.getenv("LAYOUT_CACHE_SIZE") or 256)
+# Most layouts kept in data/layout_cache; the least recently used are deleted beyond it
+layout_cache_disk_size = int(os.getenv("LAYOUT_CACHE_DISK_SIZE") or 10000)
+clue_concurrency = int(os.getenv("CLUE_CONCURRENCY") or 8)
+clue_batch_size = int(os.getenv("CLUE_BATCH_SIZE") or 1)
+clue_cache_ttl_days = float(os.getenv("CLUE_CACHE_TTL_DAYS") or 90)
+# "openai" for the real API, or "stub" for canned offline clues in local testing
+clue_provider_name = os.getenv("CLUE_PROVIDER") or "openai"
+llm_timeout = float(os.getenv("LLM_TIMEOUT") or 60)
+llm_max_retries = int(os.getenv("LLM_MAX_RETRIES") or 4)
+llm_max_connections = int(os.getenv("LLM_MAX_CONNECTIONS") or 16)
+# Process-wide model API limits; 0 disables a limit
+llm_requests_per_minute = float(os.getenv("LLM_REQUESTS_PER_MINUTE") or 0)
+llm_tokens_per_minute = float(os.getenv("LLM_TOKENS_PER_MINUTE") or 0)
+# "memory" keeps sessions in this process; "sqlite" shares them between server processes
+session_store_name = os.getenv("SESSION_STORE") or "memory"
+# Sessions idle this long (seconds) are removed with their output files; beyond
+# SESSION_MAX_ENTRIES sessions, the least recently used are evicted
+session_max_entries = int(os.getenv("SESSION_MAX_ENTRIES") or 1000)
+session_idle_ttl = float(os.getenv("SESSION_IDLE_TTL") or 6 * 3600)
+session_sweep_interval = float(os.getenv("SESSION_SWEEP_INTERVAL") or 60)
+# Append each request's stage timings as a JSON line to data/trace.log
+trace_requests = (os.getenv("TRACE_REQUESTS") or "false").lower() in ("1", "true", "yes")
+# Bearer token a metrics scraper sends to read /metrics; without it, only logged-in users can
+metrics_token = os.getenv("METRICS_TOKEN") or ""
+if clue_provider_name not in ("openai", "stub"):
+    raise ValueError(f"Unknown CLUE_PROVIDER '{clue_provider_name}'.")
+if not web_listen_address or (
+        clue_provider_name == "openai" and not (openai_address and openai_secret and model_id)):
     raise ValueError(
         "Missing required environment variables. Please check your configuration.")
+if session_store_name not in SESSION_STORES:
+    raise ValueError(f"Unknown SESSION_STORE '{session_store_name}'.")
 print(json.dumps({
     "api_address": openai_address,
     "api_secret": bool(openai_secret),
     "model_id": model_id,
+    "clue_provider": clue_provider_name,
+    "llm_timeout": llm_timeout,
+    "llm_max_retries": llm_max_retries,
+    "llm_max_connections": llm_max_connections,
+    "llm_requests_per_minute": llm_requests_per_minute,
+    "llm_tokens_per_minute": llm_tokens_per_minute,
     "web_listen_address": web_listen_address,
     "auth_api_url": auth_api_url,
+    "auth_cache_ttl": auth_cache_ttl,
+    "auth_negative_ttl": auth_negative_ttl,
+    "auth_stale_ttl": auth_stale_ttl,
+    "auth_cache_size": auth_cache_size,
+    "auth_pool_size": auth_pool_size,
+    "grid_workers": grid_workers,
+    "grid_job_queue_depth": grid_job_queue_depth,
+    "grid_job_timeout": grid_job_timeout,
+    "grid_save_images": grid_save_images,
+    "grid_time_budget_ms": grid_time_budget_ms,
+    "layout_cache_size": layout_cache_size,
+    "layout_cache_disk_size": layout_cache_disk_size,
+    "clue_concurrency": clue_concurrency,
+    "clue_batch_size": clue_batch_size,
+    "clue_cache_ttl_days": clue_cache_ttl_days,
+    "session_store": session_store_name,
+    "session_max_entries": session_max_entries,
+    "session_idle_ttl": session_idle_ttl,
+    "session_sweep_interval": session_sweep_interval,
+    "trace_requests": trace_requests,
+    "metrics_token": bool(metrics_token),
 }))
 
 
+auth_verifier = AuthVerifier(
+    auth_api_url, ttl=auth_cache_ttl, negative_ttl=auth_negative_ttl, stale_ttl=auth_stale_ttl,
+    max_entries=auth_cache_size, pool_size=auth_pool_size)
+
+
 def verify_auth_token(auth_token):
-    """Verify auth token with the auth API"""
-    try:
-        response = requests.get(
-            auth_api_url,
-            cookies={"auth_token": auth_token},
-            timeout=5
-        )
-        if response.status_code == 200:
-            return True, response.json()
-        return False, None
-    except Exception as e:
-        print(f"Error verifying auth token: {e}")
-        return False, None
+    """Verify auth token with the auth API, answering repeat checks from the cache"""
+    return auth_verifier.verify(auth_token)
 
 
 def require_auth(f):
@@ -76,53 +152,206 @@ def require_auth(f):
 OUTPUT_DIR = f"{PROJECT_ROOT}/data/output"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Session state (words, layout, clues) by client id, and grid job snapshots by job id.
+# Every request loads the session from the store, so any server process can serve it.
+session_store = make_session_store(
+    session_store_name, path=f"{PROJECT_ROOT}/data/sessions.sqlite3")
+sessions = SessionManager(
+    session_store, OUTPUT_DIR, max_sessions=session_max_entries, idle_ttl=session_idle_ttl,
+    sweep_interval=session_sweep_interval, sweep_prefixes=("job:",))
+sessions.start_sweeper()
+GRID_JOB_RETENTION = 600  # Seconds a finished grid job can still be fetched
+
+
+def publish_grid_job(job):
+    session_store.put(f"job:{job['id']}", job, ttl=GRID_JOB_RETENTION)
+
+
+# Grid searches run as jobs in worker processes, off the request threads. Winning
+# layouts are cached on disk, shared by the workers, so resubmitted word lists skip the search.
+grid_jobs = GridJobManager(
+    workers=grid_workers, max_queue=grid_job_queue_depth, timeout=grid_job_timeout,
+    retention=GRID_JOB_RETENTION, cache_dir=f"{PROJECT_ROOT}/data/layout_cache",
+    cache_size=layout_cache_size, cache_disk_size=layout_cache_disk_size,
+    on_update=publish_grid_job)
+
+# One model client shared by every request, so connections are pooled and kept alive
+if clue_provider_name == "stub":
+    clue_provider = StubClueProvider(model_id=model_id or "stub")
+else:
+    clue_provider = OpenAIClueProvider(
+        openai_address, openai_secret, model_id, timeout=llm_timeout,
+        max_retries=llm_max_retries, max_connections=llm_max_connections,
+        # Rate limits go straight back to the scheduler, which pauses every client's requests
+        rate_limit_retries=0)
+
+# Admission control for model requests across all sessions, served fairly per client
+llm_scheduler = LLMScheduler(
+    requests_per_minute=llm_requests_per_minute, tokens_per_minute=llm_tokens_per_minute)
+
+# Generated clues shared across sessions, keyed by word, topic, model and prompt version
+clue_cache = ClueCache(
+    path=f"{PROJECT_ROOT}/data/clue_cache.sqlite3", ttl=clue_cache_ttl_days * 24 * 3600)
+
+
+def load_generator(client_id: str) -> Optional[CrosswordGenerator]:
+    """Rebuild a client's generator from the session store, or None if there is no session."""
+    state = sessions.load(client_id)
+    if state is None:
+        return None
+    return CrosswordGenerator.from_state(
+        state, clue_cache=clue_cache,
+        clue_provider=ScheduledClueProvider(clue_provider, llm_scheduler, client_id))
+
+
+def save_generator(client_id: str, generator: CrosswordGenerator,
+                   grid_job: Optional[str] = None) -> None:
+    """Store a client's generator, with the id of the grid job the session expects a layout from.
+
+    Without a grid_job, the session keeps the one it already had.
+    """
+    state = generator.export_state()
+    if grid_job is None:
+        previous = sessions.load(client_id)
+        grid_job = previous.get('grid_job') if previous is not None else None
+    state['grid_job'] = grid_job
+    sessions.save(client_id, state)
+
 
 @app.route('/api/generate_grid', methods=['POST'])
 @require_auth
 def generate_grid():
-    """Generate a crossword grid from the provided words."""
+    """Queue a grid generation job for the provided words and return its id."""
     data = request.json
     words = [word.strip()
              for word in data['words'].split('\n') if word.strip()]
     client_id = data['clientId']
+    seed = data.get('seed')
+    # Without a seed, the same word list gets the same search, and so its cached layout
+    seed = int(seed) if seed is not None else derive_seed(words)
+
+    # Start a fresh session for this client, replacing any earlier grid and clues. The
+    # session records this job's id, so a result from a job it replaced is never loaded.
+    # It is saved before submitting because a cached layout can finish the job at once.
+    previous = sessions.load(client_id)
+    job_id = uuid.uuid4().hex
+    generator = CrosswordGenerator(words, seed=seed)
+    save_generator(client_id, generator, grid_job=job_id)
+
+    def load_result(result):
+        # The job searched in another process; store its layout in the session,
+        # unless the client has started another grid since
+        if result is None:
+            return
+        state = sessions.load(client_id)
+        if state is None or state.get('grid_job') != job_id:
+            print(f"Ignoring result of replaced grid job {job_id}")
+            return
+        generator.load_layout(result['layout'])
+        save_generator(client_id, generator, grid_job=job_id)
 
-    # Create or get the generator for this client
-    if client_id not in generators:
-        generators[client_id] = CrosswordGenerator(words)
-    else:
-        # Update words for existing generator
-        generators[client_id].words = list(set(words))
-        generators[client_id].grid = {}
-        generators[client_id].placed_words = []
-        generators[client_id].overlap_count = 0
-        generators[client_id].clue_ids = {'across': {}, 'down': {}}
-        generators[client_id].clues = {'across': {}, 'down': {}}
-
-    generator = generators[client_id]
-
-    # Generate the grid
     max_attempts = int(data.get('maxAttempts', 30))
-    success = generator.generate_grid(max_attempts=max_attempts)
-
-    if not success:
+    time_budget_ms = min(
+        int(data.get('timeBudgetMs', grid_time_budget_ms)), grid_time_budget_ms)
+    try:
+        job_id = grid_jobs.submit(
+            words, seed, max_attempts, time_budget_ms / 1000,
+            output_dir=os.path.join(OUTPUT_DIR, client_id) if grid_save_images else None,
+            client_id=client_id,
+            on_done=load_result,
+            job_id=job_id)
+    except JobQueueFull:
+        # Leave the client's earlier grid and its job as they were
+        if previous is not None:
+            sessions.save(client_id, previous)
+        else:
+            sessions.delete(client_id)
         return jsonify({
             'success': False,
-            'message': 'Failed to generate grid with all words.'
-        })
+            'message': 'The server is busy. Please try again shortly.'
+        }), 503
 
-    # Generate images
-    temp_output_dir = os.path.join(OUTPUT_DIR, client_id)
-    os.makedirs(temp_output_dir, exist_ok=True)
+    if previous is not None and previous.get('grid_job'):
+        grid_jobs.cancel(previous['grid_job'])
+    return jsonify({
+        'success': True,
+        'jobId': job_id
+    })
 
-    generator.draw_grid(answer=False, output_dir=temp_output_dir)
-    generator.draw_grid(answer=True, output_dir=temp_output_dir)
 
-    # Read the image file and convert to base64
-    with open(f'{temp_output_dir}/crossword_puzzle_question.png', 'rb') as img_file:
-        question_img_data = base64.b64encode(img_file.read()).decode('utf-8')
+@app.route('/api/stream_grid', methods=['GET'])
+def stream_grid():
+    """Stream a grid job's progress using SSE, ending with the generated grid."""
+    job_id = request.args.get('jobId')
 
-    with open(f'{temp_output_dir}/crossword_puzzle_answer.png', 'rb') as img_file:
-        answer_img_data = base64.b64encode(img_file.read()).decode('utf-8')
+    auth_token = request.cookies.get('auth_token')
+    if not auth_token or not verify_auth_token(auth_token)[0]:
+        def error_stream_auth():
+            yield 'data: ' + json.dumps({
+                'error': 'Authentication required'
+            }) + '\n\n'
+        return Response(error_stream_auth(), mimetype='text/event-stream')
+
+    def generate():
+        version = -1
+        while True:
+            job = wait_for_grid_job(job_id, version, timeout=15)
+            if job is None:
+                yield 'data: ' + json.dumps({
+                    'error': 'Grid job not found.'
+                }) + '\n\n'
+                return
+            if job['version'] == version:
+                # Keep idle connections alive while the job waits in the queue
+                yield ': keep-alive\n\n'
+                continue
+            version = job['version']
+
+            if job['status'] == 'done':
+                yield 'data: ' + json.dumps(grid_job_response(job)) + '\n\n'
+                return
+            if job['status'] in ('failed', 'timeout', 'cancelled'):
+                yield 'data: ' + json.dumps({
+                    'complete': True,
+                    'success': False,
+                    'message': job['error'] or 'Failed to generate grid.'
+                }) + '\n\n'
+                return
+
+            yield 'data: ' + json.dumps({
+                'status': job['status'],
+                'attempt': job['attempt'],
+                'maxAttempts': job['max_attempts'],
+                'bestOverlaps': job['best_overlaps']
+            }) + '\n\n'
+
+    return Response(generate(), mimetype='text/event-stream')
+
+
+def wait_for_grid_job(job_id, version, timeout):
+    """Wait for a grid job to change past version and return a snapshot (None if unknown)."""
+    job = grid_jobs.wait(job_id, version, timeout)
+    if job is not None:
+        return job
+
+    # The job was submitted to another server process; follow the snapshots it publishes
+    deadline = time.monotonic() + timeout
+    while True:
+        job = session_store.get(f"job:{job_id}")
+        if job is None or job['version'] > version or time.monotonic() >= deadline:
+            return job
+        time.sleep(0.25)
+
+
+def grid_job_response(job):
+    """Build the final grid event for a finished job."""
+    result = job['result']
+    if result is None:
+        return {
+            'complete': True,
+            'success': False,
+            'message': 'Failed to generate grid with all words.'
+        }
 
     # Generate clue structure without actual clues
     clues_structure = {
@@ -131,22 +360,66 @@ def generate_grid():
     }
 
     for direction in ['across', 'down']:
-        for number, word in generator.clue_ids[direction].items():
+        for number, word in result['layout']['clue_ids'][direction].items():
             clues_structure[direction][number] = {
                 'word': word,
                 'clue': f"({len(word)}) Enter clue for {word}"
             }
 
-    return jsonify({
+    return {
+        'complete': True,
         'success': True,
-        'questionImage': question_img_data,
-        'answerImage': answer_img_data,
+        'questionSvg': result['questionSvg'],
+        'answerSvg': result['answerSvg'],
         'cluesStructure': clues_structure
-    })
+    }
 
 
 PRICE_PER_TOKEN = 7 * 1 * 1e-6  # gpt-4o price per token
 
+# Seconds between queue position updates while no clue has completed
+QUEUE_HEARTBEAT_INTERVAL = 1.0
+
+
+def with_heartbeat(items, interval):
+    """Yield items from an iterator run in a background thread, or None after each idle interval.
+
+    Stops consuming the iterator once the caller stops iterating (e.g. the client disconnected).
+    """
+    results = queue.Queue()
+    stopped = threading.Event()
+    done = object()
+
+    def consume():
+        try:
+            for item in items:
+                results.put(item)
+                if stopped.is_set():
+                    break
+        except Exception as e:
+            results.put(e)
+        finally:
+            close = getattr(items, 'close', None)
+            if close is not None:
+                close()
+            results.put(done)
+
+    threading.Thread(target=consume, daemon=True).start()
+    try:
+        while True:
+            try:
+                item = results.get(timeout=interval)
+            except queue.Empty:
+                yield None
+                continue
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+
 
 @app.route('/api/stream_clues', methods=['GET'])
 def stream_clues():
@@ -169,58 +442,62 @@ def stream_clues():
             }) + '\n\n'
         return Response(error_stream_auth(), mimetype='text/event-stream')
 
-    # verify requisite files (puzzle and answer image) were generated
-    temp_output_dir = os.path.join(OUTPUT_DIR, client_id)
-    if not os.path.exists(f"{temp_output_dir}/crossword_puzzle_question.png") or not os.path.exists(f"{temp_output_dir}/crossword_puzzle_answer.png"):
-        def error_stream_clientid():
+    generator = load_generator(client_id)
+    if generator is None or not generator.placed_words:
+        def error_stream_session():
             yield 'data: ' + json.dumps({
                 'error': 'No grid found. Please generate a grid first.'
             }) + '\n\n'
-        return Response(error_stream_clientid(), mimetype='text/event-stream')
-
-    generator = generators[client_id]
+        return Response(error_stream_session(), mimetype='text/event-stream')
 
     def generate():
         try:
             total_words = len(
                 generator.clue_ids['across']) + len(generator.clue_ids['down'])
             current_word = 0
-            total_token_count = 0
-
-            topic = generator.analyze_topic(
-                openai_address, openai_secret, model_id)
 
             # Initialize clues dictionaries
             generator.clues = {'across': {}, 'down': {}}
 
-            # Generate clues with progress updates
-            for direction in ['across', 'down']:
-                for number, word in generator.clue_ids[direction].items():
-                    current_word += 1
-                    progress = (current_word / total_words) * 100
-
-                    # Generate clue for current word
-                    clue = generator.generate_single_clue(
-                        topic, word, openai_address, openai_secret, model_id)
-                    generator.clues[direction][number] = clue
-
-                    total_token_count += len(clue.split()) * 5
-
-                    # Send progress update
+            # Generate clues concurrently, sending progress updates as each one completes;
+            # the topic is inferred alongside the first requests instead of before them.
+            # While requests wait in the shared scheduler, report the queue position instead.
+            for result in with_heartbeat(generator.iter_clues(
+                    None, clue_concurrency, clue_batch_size), QUEUE_HEARTBEAT_INTERVAL):
+                if result is None:
                     yield 'data: ' + json.dumps({
-                        'progress': progress,
-                        'currentWord': word,
-                        'direction': direction,
-                        'number': number,
-                        'clue': clue
+                        'progress': (current_word / total_words) * 100,
+                        'queuePosition': llm_scheduler.queue_position(client_id),
                     }) + '\n\n'
+                    continue
+
+                direction, number, word, clue = result
+                if clue is None:
+                    clue = MISSING_CLUE
+                current_word += 1
+                progress = (current_word / total_words) * 100
+                generator.clues[direction][number] = clue
+
+                # Send progress update
+                yield 'data: ' + json.dumps({
+                    'progress': progress,
+                    'currentWord': word,
+                    'direction': direction,
+                    'number': number,
+                    'clue': clue
+                }) + '\n\n'
 
             # Save clues to text file
             temp_output_dir = os.path.join(OUTPUT_DIR, client_id)
             os.makedirs(temp_output_dir, exist_ok=True)
             generator.save_clues_text(temp_output_dir)
+            save_generator(client_id, generator)
 
-            # Log clue generation info to file with timestamp
+            # Log clue generation info to file with timestamp, using the tokens the API reported
+            usage = generator.clue_provider.usage
+            total_token_count = usage['prompt_tokens'] + usage['completion_tokens']
+            annotate_trace(llm_requests=usage['requests'], prompt_tokens=usage['prompt_tokens'],
+                           completion_tokens=usage['completion_tokens'])
             log_message = f"{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - stream_clues - User: {user_info.get('name', '')}, Total tokens: {total_token_count}, Cost: {total_token_count * PRICE_PER_TOKEN:.4f}"
             with open("./data/clue_generation.log", "a", encoding="utf-8") as log_file:
                 log_file.write(log_message + "\n")
@@ -251,14 +528,13 @@ def update_clues():
     client_id = data['clientId']
     clues_data = data['clues']
 
-    if client_id not in generators:
+    generator = load_generator(client_id)
+    if generator is None:
         return jsonify({
             'success': False,
             'message': 'No grid found. Please generate a grid first.'
         })
 
-    generator = generators[client_id]
-
     # Update clues in the generator
     for direction in ['across', 'down']:
         for number_str, clue_info in clues_data[direction].items():
@@ -269,6 +545,7 @@ def update_clues():
     temp_output_dir = os.path.join(OUTPUT_DIR, client_id)
     os.makedirs(temp_output_dir, exist_ok=True)
     generator.save_clues_text(temp_output_dir)
+    save_generator(client_id, generator)
 
     return jsonify({
         'success': True,
@@ -284,43 +561,46 @@ def export_pdf():
     client_id = data['clientId']
     temp_output_dir = os.path.join(OUTPUT_DIR, client_id)
 
-    # check prerequisite files exist
-    if not os.path.exists(f"{temp_output_dir}/crossword_puzzle_question.png"):
-        return jsonify({
-            'success': False,
-            'message': 'Question image not found. Please generate a grid first.'
-        })
-    if not os.path.exists(f"{temp_output_dir}/crossword_puzzle_answer.png"):
+    generator = load_generator(client_id)
+    if generator is None or not generator.placed_words:
         return jsonify({
             'success': False,
-            'message': 'Answer image not found. Please generate a grid first.'
+            'message': 'No grid found. Please generate a grid first.'
         })
+
+    # Write out the session's latest clues, whichever server process last changed them
+    if any(generator.clues.values()):
+        generator.save_clues_text(temp_output_dir)
+
     if not os.path.exists(f"{temp_output_dir}/crossword_clues.txt"):
         return jsonify({
             'success': False,
             'message': 'Clues file not found. Please generate clues first.'
         })
 
-    # Create PDFs
-    from generator import create_crossword_pdf
-
-    create_crossword_pdf(
-        image_path=f"{temp_output_dir}/crossword_puzzle_question.png",
-        clues_path=f"{temp_output_dir}/crossword_clues.txt",
-        output_pdf_path=f"{temp_output_dir}/crossword_puzzle.pdf"
+    # Create both PDFs in one pass, drawing the grid as vector shapes rather than a bitmap
+    with open(f"{temp_output_dir}/crossword_clues.txt", 'r', encoding='utf-8') as f:
+        clues_text = f.read()
+    combined = bool(data.get('combined'))
+    create_crossword_pdfs(
+        clues_text,
+        question_pdf_path=f"{temp_output_dir}/crossword_puzzle.pdf",
+        answer_pdf_path=f"{temp_output_dir}/crossword_puzzle_answer.pdf",
+        combined_pdf_path=f"{temp_output_dir}/crossword_puzzle_combined.pdf" if combined else None,
+        grid=generator.grid_drawing()
     )
 
-    create_crossword_pdf(
-        image_path=f"{temp_output_dir}/crossword_puzzle_answer.png",
-        clues_path=f"{temp_output_dir}/crossword_clues.txt",
-        output_pdf_path=f"{temp_output_dir}/crossword_puzzle_answer.pdf"
-    )
+    urls = {
+        'questionPdfUrl': f'/api/download_pdf/{client_id}/question',
+        'answerPdfUrl': f'/api/download_pdf/{client_id}/answer'
+    }
+    if combined:
+        urls['combinedPdfUrl'] = f'/api/download_pdf/{client_id}/combined'
 
     return jsonify({
         'success': True,
         'message': 'PDFs created successfully',
-        'questionPdfUrl': f'/api/download_pdf/{client_id}/question',
-        'answerPdfUrl': f'/api/download_pdf/{client_id}/answer'
+        **urls
     })
 
 
@@ -335,6 +615,9 @@ def download_pdf(client_id, pdf_type):
     elif pdf_type == 'answer':
         pdf_path = f"{temp_output_dir}/crossword_puzzle_answer.pdf"
         filename = "crossword_puzzle_answer.pdf"
+    elif pdf_type == 'combined':
+        pdf_path = f"{temp_output_dir}/crossword_puzzle_combined.pdf"
+        filename = "crossword_puzzle_combined.pdf"
     else:
         return "Invalid PDF type", 400
 
@@ -350,20 +633,71 @@ def cleanup():
     data = request.json
     client_id = data['clientId']
 
-    if client_id in generators:
-        del generators[client_id]
-
-    temp_output_dir = os.path.join(OUTPUT_DIR, client_id)
-    if os.path.exists(temp_output_dir):
-        for file in os.listdir(temp_output_dir):
-            os.remove(os.path.join(temp_output_dir, file))
-        os.rmdir(temp_output_dir)
+    sessions.delete(client_id)
 
     return jsonify({
         'success': True,
         'message': 'Cleanup completed'
     })
 
+@app.route('/api/stats', methods=['GET'])
+@require_auth
+def stats():
+    """Report session, disk, grid job, clue and auth cache usage for this server process."""
+    return jsonify({
+        'sessions': sessions.stats(),
+        'gridJobs': grid_jobs.stats(),
+        'clueCache': clue_cache.stats(),
+        'authCache': auth_verifier.stats(),
+        'llmQueued': llm_scheduler.queued(),
+    })
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Expose stage timings and counters for this server process in the Prometheus text format.
+
+    Readable with the METRICS_TOKEN bearer token, or by a logged-in user like /api/stats.
+    """
+    authorization = request.headers.get('Authorization', '')
+    if not (metrics_token and hmac.compare_digest(authorization.encode('utf-8'),
+                                                  f"Bearer {metrics_token}".encode('utf-8'))):
+        auth_token = request.cookies.get('auth_token')
+        if not auth_token or not verify_auth_token(auth_token)[0]:
+            return jsonify({
+                'success': False,
+                'message': 'Authentication required'
+            }), 401
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.before_request
+def begin_request_metrics():
+    g.request_start = time.perf_counter()
+    if trace_requests:
+        start_trace(method=request.method, path=request.path)
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Time each request until its body has been sent, which for SSE streams is when they end."""
+    start = g.request_start
+    # Route patterns rather than paths, so client ids do not become separate series
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    status = response.status_code
+
+    def finish():
+        trace = end_trace()
+        metrics.observe('http_request', time.perf_counter() - start, endpoint=endpoint)
+        metrics.inc('http_requests', endpoint=endpoint, status=status)
+        if trace is not None:
+            trace.update(time=datetime.datetime.now().isoformat(timespec='seconds'),
+                         endpoint=endpoint, status=status)
+            with open("./data/trace.log", "a", encoding="utf-8") as log_file:
+                log_file.write(json.dumps(trace) + "\n")
+
+    response.call_on_close(finish)
+    return response
+
 # Serve Svelte frontend (catch-all route)
 
 
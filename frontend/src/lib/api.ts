@@ -1,5 +1,5 @@
 // src/lib/api.ts
-import type { CluesData, GridGenerationResponse, UpdateCluesResponse, ExportPdfResponse, UserInfo } from './types';
+import type { CluesData, GridGenerationResponse, GridJobResponse, GridProgressEvent, UpdateCluesResponse, ExportPdfResponse, UserInfo } from './types';
 
 export function generateUUID(): string {
   return 'xxxxxxxx-xxxx-4xxx-yxxx-xxxxxxxxxxxx'.replace(/[xy]/g, function (c) {
@@ -17,19 +17,49 @@ export function getApiHeaders(): HeadersInit {
   };
 }
 
-export async function generateGrid(words: string): Promise<GridGenerationResponse> {
+// Without a seed the server derives one from the words, so a known list loads its cached layout
+export async function generateGrid(
+  words: string,
+  onProgress?: (event: GridProgressEvent) => void,
+  seed?: number
+): Promise<GridGenerationResponse> {
   const response = await fetch('/api/generate_grid', {
     method: 'POST',
     headers: getApiHeaders(),
     body: JSON.stringify({
       words,
       clientId,
-      maxAttempts: 30
+      maxAttempts: 30,
+      seed
     }),
     credentials: 'include', // Include cookies in the request
   });
 
-  return await response.json();
+  const job: GridJobResponse = await response.json();
+  if (!job.success || !job.jobId) {
+    return { success: false, message: job.message };
+  }
+
+  // The grid is generated in the background; follow its progress until it finishes
+  return new Promise((resolve, reject) => {
+    const eventSource = new EventSource(`/api/stream_grid?jobId=${job.jobId}`, { withCredentials: true });
+    eventSource.onmessage = (event) => {
+      const data: GridProgressEvent = JSON.parse(event.data);
+      if (data.error) {
+        eventSource.close();
+        reject(new Error(data.error));
+      } else if (data.complete) {
+        eventSource.close();
+        resolve(data);
+      } else if (onProgress) {
+        onProgress(data);
+      }
+    };
+    eventSource.onerror = () => {
+      eventSource.close();
+      reject(new Error('SSE connection failed'));
+    };
+  });
 }
 
 export function streamClues(): EventSource {
@@ -12,11 +12,26 @@ export interface CluesData {
 export interface GridGenerationResponse {
   success: boolean;
   message?: string;
-  questionImage?: string;
-  answerImage?: string;
+  questionSvg?: string;
+  answerSvg?: string;
   cluesStructure?: CluesData;
 }
 
+export interface GridJobResponse {
+  success: boolean;
+  message?: string;
+  jobId?: string;
+}
+
+export interface GridProgressEvent extends GridGenerationResponse {
+  error?: string;
+  complete?: boolean;
+  status?: string;
+  attempt?: number;
+  maxAttempts?: number;
+  bestOverlaps?: number | null;
+}
+
 export interface ClueProgressEvent {
   error?: string;
   complete?: boolean;
@@ -26,6 +41,7 @@ export interface ClueProgressEvent {
   currentWord?: string;
   clue?: string;
   clues?: CluesData;
+  queuePosition?: number | null;
 }
 
 export interface UpdateCluesResponse {
@@ -38,6 +54,7 @@ export interface ExportPdfResponse {
   message?: string;
   questionPdfUrl?: string;
   answerPdfUrl?: string;
+  combinedPdfUrl?: string;
 }
 
 export interface UserInfo {